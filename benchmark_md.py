@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LAD Markdown Viewer 性能基准脚本
+用于验证渲染流水线各项优化的效果
+
+使用方法：
+  python benchmark_md.py [基准项 ...]
+
+基准项：
+  mermaid-restore  Mermaid占位符恢复的线性扩展性
+  unescape         全文 html.unescape 兼容模式与单次转义模式对比
+  render-file      整体读取文件与内存映射 render_file 的峰值内存对比
+  asset-startup    从CDN与从本地Web查看器加载Mermaid等首屏阻塞资源的耗时对比
+  front-matter     正则提取+Markdown表格与前缀检查+YAML解析+直接生成表格HTML的对比
+  stages           各渲染阶段（front matter、解析、unescape等）的耗时分布
+"""
+
+import html as html_module
+import logging
+import re
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from lad_markdown_viewer.front_matter import metadata_table_html, parse_front_matter
+from lad_markdown_viewer.instrumentation import collect_render_stats
+from lad_markdown_viewer.markdown_processor import MarkdownProcessor, render_file, render_markdown_to_html
+from lad_markdown_viewer.markdown_utils import restore_mermaid_blocks
+
+
+def _best_of(func, repeat=5):
+    """多次运行取最短耗时（秒），减少系统抖动的影响。"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def make_document(sections):
+    """生成包含标题、表格、代码块和Mermaid图表的大型测试文档。"""
+    parts = ["---\ntitle: 基准测试文档\nauthor: LAD\n---\n"]
+    for i in range(sections):
+        parts.append(
+            f"## {i}.1 第{i}节 标题 & 说明\n\n"
+            f"这是第{i}节的正文，包含 **粗体**、`a<b` 和 [链接](doc{i}.md#{i}1-标题)。\n\n"
+            f"| 字段 | 值 |\n|------|----|\n| 编号 | {i} |\n\n"
+            f"```python\nif a < b and c > d:\n    print('<script>')\n```\n\n"
+            f"```mermaid\ngraph TD\n    A{i}[开始] --> B{i}[结束]\n```\n\n"
+            f"- [x] 已完成 {i}\n- [ ] 待办 ~~{i}~~\n\n"
+        )
+    return ''.join(parts)
+
+
+def _legacy_restore_mermaid_blocks(html, mermaid_blocks):
+    # 旧实现：每个图表一次全文 replace，用作对比基准
+    for i, code in enumerate(mermaid_blocks):
+        html = html.replace(f"@@MERMAID{i}@@", f'<div class="mermaid">{code}</div>')
+    return html
+
+
+def bench_mermaid_restore():
+    """Mermaid占位符恢复：图表数量与文档长度同步增长，单次扫描应保持线性。"""
+    print("Mermaid占位符恢复基准（图表数 ∝ 文档长度）")
+    print(f"{'图表数':>8} {'HTML大小':>12} {'旧实现(ms)':>12} {'单次扫描(ms)':>14} {'每图表(us)':>12}")
+    for count in (100, 200, 400, 800, 1600):
+        blocks = [f"graph TD\n    A{i}[开始] --> B{i}[结束]" for i in range(count)]
+        paragraph = "<p>" + "正文内容 " * 40 + "</p>\n"
+        html = ''.join(f"{paragraph}<p>@@MERMAID{i}@@</p>\n" for i in range(count))
+        legacy = _best_of(lambda: _legacy_restore_mermaid_blocks(html, blocks))
+        single = _best_of(lambda: restore_mermaid_blocks(html, blocks))
+        print(f"{count:>8} {len(html):>12} {legacy * 1000:>12.2f} "
+              f"{single * 1000:>14.2f} {single / count * 1e6:>12.2f}")
+
+
+def bench_unescape():
+    """对比旧的全文 html.unescape 流程和单次转义流程在大文档上的耗时。"""
+    legacy = MarkdownProcessor(legacy_unescape=True)
+    single_pass = MarkdownProcessor()
+    print("全文unescape兼容模式 vs 单次转义模式")
+    print(f"{'文档大小(KB)':>12} {'兼容模式(ms)':>14} {'单次转义(ms)':>14} {'unescape遍历(ms)':>18}")
+    for sections in (200, 1000, 5000):
+        doc = make_document(sections)
+        t_legacy = _best_of(lambda: legacy.process_markdown(doc), repeat=5)
+        t_single = _best_of(lambda: single_pass.process_markdown(doc), repeat=5)
+        # 单独测量被去掉的那次全文遍历，它与解析耗时相比很小，整体对比容易被抖动掩盖
+        html_body = single_pass.process_markdown(doc)
+        t_pass = _best_of(lambda: html_module.unescape(html_body))
+        print(f"{len(doc.encode('utf-8')) / 1024:>12.0f} {t_legacy * 1000:>14.1f} "
+              f"{t_single * 1000:>14.1f} {t_pass * 1000:>18.2f}")
+
+
+def _legacy_front_matter(md_text):
+    # 旧实现：全文正则查找并替换，逐行按 ':' 拆分，再拼成Markdown表格
+    yaml_pattern = r'^---\s*\n(.*?)\n---\s*\n'
+    match = re.search(yaml_pattern, md_text, re.DOTALL)
+    if match:
+        md_text = re.sub(yaml_pattern, '', md_text, count=1, flags=re.DOTALL)
+        rows = []
+        for line in match.group(1).strip().split('\n'):
+            if ':' in line:
+                key, value = line.split(':', 1)
+                rows.append(f"| {key.strip()} | {value.strip()} |")
+        if rows:
+            md_text = "## 文档元信息\n\n| 字段 | 值 |\n|------|----|\n" + '\n'.join(rows) + '\n\n' + md_text
+    return md_text
+
+
+def bench_front_matter():
+    """front matter 阶段：有/无 front matter 的大文档，旧流程需要额外解析Markdown表格。"""
+    table_parser = MarkdownProcessor()
+    print("front matter 处理基准")
+    print(f"{'文档':>10} {'大小(KB)':>10} {'旧流程(ms)':>12} {'新流程(ms)':>12}")
+    with_front_matter = make_document(2000)
+    without_front_matter = with_front_matter.split('---\n', 2)[2]
+    for label, doc in (('有元信息', with_front_matter), ('无元信息', without_front_matter)):
+        def legacy():
+            md_text = _legacy_front_matter(doc)
+            # 旧流程中表格随正文一起再经过一次Markdown解析，这里只计入表格部分
+            if md_text is not doc:
+                table_parser.process_markdown(md_text[:len(md_text) - len(without_front_matter)],
+                                              front_matter=False)
+
+        def current():
+            metadata, _ = parse_front_matter(doc)
+            metadata_table_html(metadata)
+
+        print(f"{label:>10} {len(doc.encode('utf-8')) / 1024:>10.0f} "
+              f"{_best_of(legacy) * 1000:>12.3f} {_best_of(current) * 1000:>12.3f}")
+
+
+def bench_stages():
+    """按阶段统计一次完整渲染的耗时，找出慢渲染的瓶颈。"""
+    doc = make_document(2000)
+    for label, processor in (('单次转义模式', MarkdownProcessor()),
+                             ('兼容模式', MarkdownProcessor(legacy_unescape=True))):
+        processor.render(doc)
+        with collect_render_stats() as stats:
+            for _ in range(3):
+                processor.render(doc)
+        print(f"渲染阶段耗时分布（{label}，{len(doc.encode('utf-8')) / 1024:.0f} KB，3次合计）")
+        print(stats.report())
+        print("")
+
+
+def _peak_rss_mb():
+    """当前进程的峰值常驻内存（MB）；不支持 resource 模块的平台返回 None。"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节为单位，Linux 以KB为单位
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _render_file_child(mode, path):
+    # 在独立子进程中运行，使每种方式的峰值内存互不影响
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    if mode == 'read':
+        with open(path, 'r', encoding='utf-8') as f:
+            html_body = render_markdown_to_html(f.read())
+    else:
+        html_body = render_file(path)
+    elapsed = time.perf_counter() - start
+    peak = _peak_rss_mb()
+    if peak is None:
+        print(f"{elapsed:.3f} nan")
+    else:
+        print(f"{elapsed:.3f} {peak - baseline:.1f}")
+
+
+def bench_render_file():
+    """对比 open().read() + render_markdown_to_html 与内存映射 render_file 的峰值内存。"""
+    print("整体读取 vs 内存映射 render_file（峰值RSS增量）")
+    print(f"{'文件大小(MB)':>12} {'方式':>12} {'耗时(s)':>10} {'峰值RSS增量(MB)':>18}")
+    for sections in (2000, 10000):
+        with tempfile.NamedTemporaryFile('w', suffix='.md', delete=False, encoding='utf-8') as f:
+            f.write(make_document(sections))
+            path = f.name
+        try:
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            for mode, label in (('read', '整体读取'), ('mmap', 'render_file')):
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '_render-file-child', mode, path],
+                    capture_output=True, text=True, check=True).stdout.split()
+                print(f"{size_mb:>12.1f} {label:>12} {float(output[0]):>10.2f} {output[1]:>18}")
+        finally:
+            os.unlink(path)
+
+
+def _timed_get(url, timeout=10):
+    # 模拟浏览器首次加载：接受gzip压缩，读完整个响应体
+    request = urllib.request.Request(url, headers={'Accept-Encoding': 'gzip'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            size = len(response.read())
+        result = '成功'
+    except (urllib.error.URLError, OSError) as e:
+        size = 0
+        result = f'失败：{type(getattr(e, "reason", e)).__name__}'
+    return time.perf_counter() - start, size, result
+
+
+def bench_asset_startup():
+    """对比从CDN与从本地Web查看器加载首屏阻塞资源（Mermaid、github-markdown-css）的耗时。"""
+    from werkzeug.serving import make_server
+
+    from lad_markdown_viewer.assets import VENDOR_ASSETS, vendor_available, vendor_url
+    from lad_markdown_viewer.web_viewer import create_app
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, create_app(tempfile.gettempdir()), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    static_url = f'http://127.0.0.1:{server.server_port}/static/'
+    print("首屏阻塞资源加载耗时（CDN vs 本地）")
+    print(f"{'模式':>6} {'资源':>20} {'首次(ms)':>10} {'再次(ms)':>10} {'大小(KB)':>10}  结果")
+    try:
+        for mode in ('cdn', 'local'):
+            total = 0.0
+            for key in VENDOR_ASSETS:
+                if mode == 'local' and not vendor_available(key):
+                    print(f"{mode:>6} {key:>20} {'-':>10} {'-':>10} {'-':>10}  "
+                          f"跳过：本地副本不存在（lad-markdown-assets fetch）")
+                    continue
+                url = vendor_url(key, mode, static_url)
+                first, size, result = _timed_get(url)
+                again = _timed_get(url)[0]
+                total += first
+                print(f"{mode:>6} {key:>20} {first * 1000:>10.1f} {again * 1000:>10.1f} "
+                      f"{size / 1024:>10.0f}  {result}")
+            print(f"{mode:>6} {'首次合计':>20} {total * 1000:>10.1f}")
+    finally:
+        server.shutdown()
+
+
+BENCHMARKS = {
+    'mermaid-restore': bench_mermaid_restore,
+    'unescape': bench_unescape,
+    'render-file': bench_render_file,
+    'asset-startup': bench_asset_startup,
+    'front-matter': bench_front_matter,
+    'stages': bench_stages,
+}
+
+
+def main():
+    if sys.argv[1:2] == ['_render-file-child']:
+        _render_file_child(*sys.argv[2:4])
+        return
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"❌ 未知的基准项：{name}")
+            print(f"可用基准项：{', '.join(BENCHMARKS)}")
+            return
+    for name in names:
+        BENCHMARKS[name]()
+        print("")
+
+
+if __name__ == '__main__':
+    main()
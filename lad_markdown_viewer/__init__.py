@@ -18,11 +18,56 @@ __license__ = "MIT"
 __description__ = "A powerful Markdown viewer with YAML front-matter and Mermaid support"
 
 # 核心功能模块
-from .markdown_processor import render_markdown_to_html
+from .markdown_processor import (
+    MarkdownProcessor, render_markdown_to_html, render_file, iter_render, enable_render_cache, set_render_cache,
+    enable_mermaid_prerender, render_markdown, render_document,
+)
+from .render_result import RenderResult
+from .front_matter import parse_front_matter
+from .render_cache import DiskRenderCache, RenderCache
+from .section_index import SectionIndex
+from .document_buffer import DocumentBuffer, restore_backup
+from .undo_history import UndoHistory
+from .file_watcher import FileWatcher
+from .search_index import SearchIndex
+from .link_graph import LinkGraph
+from .instrumentation import (
+    RenderMetrics, RenderStats, add_render_collector, add_render_observer, collect_render_stats,
+    remove_render_collector, remove_render_observer,
+)
+from .mermaid_prerender import MermaidSvgCache, MmdcRenderer
 from .markdown_utils import extract_mermaid_blocks, restore_mermaid_blocks, slugify
 
 __all__ = [
+    'MarkdownProcessor',
     'render_markdown_to_html',
+    'render_file',
+    'render_markdown',
+    'render_document',
+    'RenderResult',
+    'parse_front_matter',
+    'iter_render',
+    'RenderCache',
+    'DiskRenderCache',
+    'SectionIndex',
+    'DocumentBuffer',
+    'restore_backup',
+    'UndoHistory',
+    'FileWatcher',
+    'SearchIndex',
+    'LinkGraph',
+    'RenderStats',
+    'RenderMetrics',
+    'collect_render_stats',
+    'add_render_observer',
+    'remove_render_observer',
+    'add_render_collector',
+    'remove_render_collector',
+    'enable_render_cache',
+    'set_render_cache',
+    'MermaidSvgCache',
+    'MmdcRenderer',
+    'enable_mermaid_prerender',
     'extract_mermaid_blocks',
     'restore_mermaid_blocks',
     'slugify',
@@ -0,0 +1,342 @@
+"""
+LAD Markdown Viewer ASGI应用
+
+与 web_viewer 功能相同的异步版本，适合大文档和高并发场景：
+- 文件状态检查在线程池中异步执行，不阻塞事件循环
+- CPU密集的渲染和压缩交给有界进程池完成
+- 同一文档的并发请求合并为一次渲染
+- 排队的渲染任务超过上限时返回503（背压），/metrics 以Prometheus文本格式提供队列深度等指标
+- 工作进程崩溃（BrokenProcessPool）时返回503并在下一个请求时重建进程池，其他渲染错误返回500
+
+启动方式（需要安装 uvicorn 等ASGI服务器）：
+    python -m lad_markdown_viewer.asgi_viewer --root 文档目录
+    uvicorn "lad_markdown_viewer.asgi_viewer:create_app()" --factory
+
+许可证: MIT License
+"""
+import argparse
+import asyncio
+import mimetypes
+import os
+import stat as stat_module
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs
+
+from .assets import DEFAULT_PREFETCH_MARGIN, resolve_asset
+from .markdown_processor import enable_mermaid_prerender_from_env
+from .render_cache import RenderCache
+from .web_viewer import (
+    PAGE_CACHE_CONTROL, PROMETHEUS_CONTENT_TYPE, STATIC_CACHE_CONTROL, UNVERSIONED_STATIC_CACHE_CONTROL,
+    CompressedResponse, cache_metrics_text, choose_encoding, etag_matches, render_page, resolve_document,
+)
+
+
+def render_compressed(full_path, md_path, asset_mode=None,
+                      mermaid_prefetch_margin=DEFAULT_PREFETCH_MARGIN):
+    """在工作进程中渲染页面并完成压缩，返回 CompressedResponse。"""
+    page = render_page(full_path, md_path, asset_mode=asset_mode,
+                       mermaid_prefetch_margin=mermaid_prefetch_margin)
+    return CompressedResponse(page.encode('utf-8'), 'text/html')
+
+
+def _load_static(full_path):
+    with open(full_path, 'rb') as f:
+        data = f.read()
+    return CompressedResponse(data, mimetypes.guess_type(full_path)[0] or 'application/octet-stream')
+
+
+class OverloadedError(Exception):
+    """渲染队列已满。"""
+
+
+class ViewerMetrics:
+    """渲染队列的运行指标，用于评估进程池和队列上限的配置。"""
+
+    def __init__(self):
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.renders = 0
+        self.render_errors = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.pool_restarts = 0
+        self.cache_hits = 0
+        self.render_seconds_total = 0.0
+        self.render_seconds_max = 0.0
+
+    # Prometheus导出：(属性名, 指标名, 类型, 说明)
+    PROMETHEUS_METRICS = (
+        ('queue_depth', 'queue_depth', 'gauge', '排队或执行中的渲染任务数'),
+        ('max_queue_depth', 'max_queue_depth', 'gauge', '渲染队列深度的最大值'),
+        ('renders', 'renders_total', 'counter', '完成的渲染次数'),
+        ('render_errors', 'render_errors_total', 'counter', '失败的渲染次数'),
+        ('coalesced', 'coalesced_total', 'counter', '合并到进行中渲染的请求数'),
+        ('rejected', 'rejected_total', 'counter', '队列已满被拒绝（503）的请求数'),
+        ('pool_restarts', 'pool_restarts_total', 'counter', '工作进程崩溃后丢弃进程池的次数'),
+        ('cache_hits', 'cache_hits_total', 'counter', '页面缓存命中次数'),
+        ('render_seconds_total', 'render_seconds_total', 'counter', '渲染累计耗时（秒）'),
+        ('render_seconds_max', 'render_seconds_max', 'gauge', '单次渲染的最大耗时（秒）'),
+    )
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+    def prometheus_text(self, prefix='lad_asgi'):
+        """以Prometheus文本格式（0.0.4）导出。"""
+        lines = []
+        for attr, name, kind, help_text in self.PROMETHEUS_METRICS:
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} {kind}')
+            lines.append(f'{prefix}_{name} {getattr(self, attr)}')
+        return '\n'.join(lines) + '\n'
+
+
+class AsgiViewer:
+    """
+    ASGI Markdown查看器。
+
+    参数:
+        root_dir: 文档根目录，只允许访问该目录内的文件
+        default_doc: 未指定 md 参数时显示的文档
+        max_workers: 渲染进程池的进程数
+        max_queue: 同时排队/执行的渲染任务上限，超过时返回503
+        max_cache_entries / max_cache_bytes: 页面缓存的容量上限
+        asset_mode: 第三方库的资源模式（auto/local/cdn），详见 assets 模块
+        mermaid_prefetch_margin: 浏览器渲染的图表距视口多远时开始渲染（CSS长度）
+    """
+
+    def __init__(self, root_dir=None, default_doc='README.md', max_workers=None, max_queue=64,
+                 max_cache_entries=512, max_cache_bytes=256 * 1024 * 1024, asset_mode=None,
+                 mermaid_prefetch_margin=DEFAULT_PREFETCH_MARGIN):
+        self.root_dir = os.path.realpath(
+            root_dir or os.environ.get('LAD_MARKDOWN_ROOT') or os.getcwd())
+        self.default_doc = default_doc
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.asset_mode = asset_mode
+        self.mermaid_prefetch_margin = mermaid_prefetch_margin
+        self.cache = RenderCache(max_entries=max_cache_entries, max_bytes=max_cache_bytes)
+        self.metrics = ViewerMetrics()
+        self._pool = None
+        self._inflight = {}
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            # 工作进程通过环境变量继承Mermaid预渲染设置
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             initializer=enable_mermaid_prerender_from_env)
+        return self._pool
+
+    def _discard_pool(self, pool):
+        """丢弃已损坏的进程池，下一个渲染请求会创建新的进程池。"""
+        if self._pool is pool:
+            self._pool = None
+            self.metrics.pool_restarts += 1
+            pool.shutdown(wait=False)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        if scope['method'] not in ('GET', 'HEAD'):
+            await self._send_plain(send, 405, b'Method Not Allowed')
+            return
+        path = scope['path']
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1')
+                   for name, value in scope.get('headers', [])}
+        if path == '/':
+            query = parse_qs(scope.get('query_string', b'').decode('utf-8'))
+            md_path = query.get('md', [self.default_doc])[0]
+            await self._serve_document(send, headers, md_path, scope['method'])
+        elif path.startswith('/static/'):
+            await self._serve_static(send, headers, path[len('/static/'):], scope['method'])
+        elif path == '/metrics':
+            body = self.metrics.prometheus_text() + cache_metrics_text(self.cache.stats)
+            await self._send(send, 200, body.encode('utf-8'),
+                             [(b'content-type', PROMETHEUS_CONTENT_TYPE.encode('latin-1')),
+                              (b'cache-control', b'no-store')])
+        else:
+            await self._send_plain(send, 404, b'Not Found')
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _serve_document(self, send, headers, md_path, method):
+        loop = asyncio.get_running_loop()
+        full_path = resolve_document(self.root_dir, md_path)
+        stat = None
+        if full_path is not None:
+            try:
+                stat = await loop.run_in_executor(None, os.stat, full_path)
+            except OSError:
+                stat = None
+        if stat is None or not stat_module.S_ISREG(stat.st_mode):
+            await self._send_plain(send, 404, b'Not Found')
+            return
+        key = ('page', full_path, stat.st_mtime_ns, stat.st_size)
+        content = self.cache.get(key)
+        if content is not None:
+            self.metrics.cache_hits += 1
+        else:
+            try:
+                content = await self._render(key, full_path, md_path)
+            except (OverloadedError, BrokenProcessPool):
+                await self._send(send, 503, b'Service Unavailable',
+                                 [(b'content-type', b'text/plain; charset=utf-8'),
+                                  (b'retry-after', b'1')])
+                return
+            except Exception as e:
+                # 渲染出错或参数、结果无法在进程间传递
+                print(f"❌ 渲染失败：{md_path}：{e!r}", file=sys.stderr)
+                await self._send_plain(send, 500, b'Internal Server Error')
+                return
+        await self._send_content(send, headers, content, PAGE_CACHE_CONTROL, method)
+
+    async def _render(self, key, full_path, md_path):
+        # 同一文档正在渲染时直接等待已有任务，不重复提交
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.metrics.coalesced += 1
+            return await asyncio.shield(pending)
+        if self.metrics.queue_depth >= self.max_queue:
+            self.metrics.rejected += 1
+            raise OverloadedError()
+        loop = asyncio.get_running_loop()
+        pool = self.pool
+        try:
+            future = loop.run_in_executor(pool, render_compressed, full_path, md_path,
+                                          self.asset_mode, self.mermaid_prefetch_margin)
+        except BrokenProcessPool:
+            # 进程池在之前的任务中已经损坏，提交时直接失败；任务没有开始，不占用名额
+            self.metrics.render_errors += 1
+            self._discard_pool(pool)
+            raise
+        self._inflight[key] = future
+        self.metrics.queue_depth += 1
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self.metrics.queue_depth)
+        start = time.perf_counter()
+        future.add_done_callback(lambda done: self._render_done(key, done, start, pool))
+        return await asyncio.shield(future)
+
+    def _render_done(self, key, future, start, pool):
+        # 在事件循环中回调：进程池中的任务真正结束后才释放队列名额和合并记录，
+        # 客户端断开或请求超时取消等待时，仍在执行的渲染继续占用名额，背压不会失效
+        self.metrics.queue_depth -= 1
+        self._inflight.pop(key, None)
+        if future.cancelled():
+            self.metrics.render_errors += 1
+            return
+        error = future.exception()
+        if error is not None:
+            self.metrics.render_errors += 1
+            if isinstance(error, BrokenProcessPool):
+                self._discard_pool(pool)
+            return
+        elapsed = time.perf_counter() - start
+        self.metrics.renders += 1
+        self.metrics.render_seconds_total += elapsed
+        self.metrics.render_seconds_max = max(self.metrics.render_seconds_max, elapsed)
+        self.cache.put(key, future.result())
+
+    async def _serve_static(self, send, headers, filename, method):
+        loop = asyncio.get_running_loop()
+        full_path, versioned = resolve_asset(filename)
+        if full_path is None:
+            await self._send_plain(send, 404, b'Not Found')
+            return
+        stat = await loop.run_in_executor(None, os.stat, full_path)
+        key = ('static', full_path, stat.st_mtime_ns, stat.st_size)
+        content = self.cache.get(key)
+        if content is None:
+            content = await loop.run_in_executor(None, _load_static, full_path)
+            self.cache.put(key, content)
+        cache_control = STATIC_CACHE_CONTROL if versioned else UNVERSIONED_STATIC_CACHE_CONTROL
+        await self._send_content(send, headers, content, cache_control, method)
+
+    async def _send_content(self, send, headers, content, cache_control, method):
+        encoding = choose_encoding(headers.get('accept-encoding'), content.encoded)
+        etag = content.etag_for(encoding)
+        response_headers = [
+            (b'etag', etag.encode('latin-1')),
+            (b'cache-control', cache_control.encode('latin-1')),
+            (b'vary', b'Accept-Encoding'),
+        ]
+        if etag_matches(headers.get('if-none-match'), etag):
+            await self._send(send, 304, b'', response_headers)
+            return
+        body = content.data if encoding is None else content.encoded[encoding]
+        if encoding is not None:
+            response_headers.append((b'content-encoding', encoding.encode('latin-1')))
+        content_type = content.mimetype
+        if content_type.startswith('text/'):
+            content_type += '; charset=utf-8'
+        response_headers.append((b'content-type', content_type.encode('latin-1')))
+        await self._send(send, 200, b'' if method == 'HEAD' else body, response_headers,
+                         content_length=len(body))
+
+    async def _send_plain(self, send, status, body):
+        await self._send(send, status, body, [(b'content-type', b'text/plain; charset=utf-8')])
+
+    async def _send(self, send, status, body, headers, content_length=None):
+        length = len(body) if content_length is None else content_length
+        headers = list(headers) + [(b'content-length', str(length).encode('latin-1'))]
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def create_app(root_dir=None, **kwargs):
+    """创建ASGI查看器应用，参数见 AsgiViewer。"""
+    return AsgiViewer(root_dir, **kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='lad-markdown-asgi', description='LAD Markdown ASGI查看器')
+    parser.add_argument('--root', default=None, help='文档根目录（默认为当前目录）')
+    parser.add_argument('--default', default='README.md', help='默认显示的文档')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=None, help='渲染进程数（默认为CPU核数）')
+    parser.add_argument('--max-queue', type=int, default=64, help='渲染队列上限，超过时返回503')
+    parser.add_argument('--assets', choices=('auto', 'local', 'cdn'), default=None,
+                        help='第三方库的资源模式（默认 auto：有本地副本时使用本地文件）')
+    parser.add_argument('--mermaid-svg-dir', default=None,
+                        help='Mermaid预渲染SVG的缓存目录（需要安装mermaid-cli）')
+    parser.add_argument('--mermaid-prefetch', default=DEFAULT_PREFETCH_MARGIN,
+                        help=f'Mermaid图表距视口多远时开始渲染（默认 {DEFAULT_PREFETCH_MARGIN}）')
+    args = parser.parse_args(argv)
+    if args.mermaid_svg_dir:
+        os.environ['LAD_MARKDOWN_MERMAID_SVG_DIR'] = os.path.abspath(args.mermaid_svg_dir)
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ 未安装ASGI服务器，请执行：pip install uvicorn")
+        return 1
+    app = create_app(args.root, default_doc=args.default, max_workers=args.workers,
+                     max_queue=args.max_queue, asset_mode=args.assets,
+                     mermaid_prefetch_margin=args.mermaid_prefetch)
+    print(f"✅ 文档目录：{app.root_dir}")
+    uvicorn.run(app, host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
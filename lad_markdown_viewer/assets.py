@@ -0,0 +1,375 @@
+"""
+静态资源模块
+
+管理随包发布的前端资源（lad_markdown_viewer/static/）。资源URL中带有内容哈希，
+例如 /static/zoom.3f2a9c1b.js，内容变化时URL随之变化，因此可以永久缓存。
+
+第三方前端库（Mermaid、github-markdown-css）固定为同一版本，本地副本放在
+static/vendor/ 下，由构建发布包前执行的命令下载（release.py 构建前自动执行），随包发布：
+
+    lad-markdown-assets fetch
+
+每个文件的 sha256 固定在 static/vendor/SHA256SUMS 中（sha256sum 格式，可直接用
+sha256sum -c 校验），下载后与之比较，不一致或没有固定摘要的文件不会写入。
+升级版本时在可信的网络环境中执行 lad-markdown-assets lock 重新生成摘要，
+核对后与版本号的修改一起提交。
+
+仓库中还没有 SHA256SUMS 时（尚未在可信网络中执行过 lock），第三方库处于“未固定”状态：
+release.py 构建不含本地副本的发布包并给出提示，auto 模式使用CDN；离线环境需要先固定摘要
+并执行 fetch，再使用 local 模式。lad-markdown-assets status 显示当前状态。
+
+各入口通过 vendor_tags() 引用这些库。资源模式由参数或环境变量
+LAD_MARKDOWN_ASSETS 指定：
+    auto   本地副本存在时使用本地文件，否则使用CDN（默认），回退时在标准错误输出中提示一次原因
+    local  只使用本地文件，缺失时报错（离线环境）
+    cdn    总是使用CDN
+"""
+import argparse
+import functools
+import hashlib
+import json
+import os
+import pathlib
+import posixpath
+import re
+import sys
+import urllib.request
+
+from .file_utils import write_atomic
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DEFAULT_STATIC_URL = '/static/'
+
+MERMAID_VERSION = '9.4.3'
+GITHUB_MARKDOWN_CSS_VERSION = '5.5.1'
+ASSET_MODE_ENV = 'LAD_MARKDOWN_ASSETS'
+ASSET_MODES = ('auto', 'local', 'cdn')
+# Mermaid图表距视口多远时开始渲染
+DEFAULT_PREFETCH_MARGIN = '200px'
+
+# 第三方前端库：(static/ 下的本地文件名, CDN地址)；本地文件名带版本号，升级时不会误用旧文件
+# 各文件的固定摘要见 VENDOR_LOCK_NAME
+VENDOR_ASSETS = {
+    'mermaid': (
+        f'vendor/mermaid-{MERMAID_VERSION}.min.js',
+        f'https://cdn.jsdelivr.net/npm/mermaid@{MERMAID_VERSION}/dist/mermaid.min.js',
+    ),
+    'github-markdown-css': (
+        f'vendor/github-markdown-{GITHUB_MARKDOWN_CSS_VERSION}.min.css',
+        f'https://cdn.jsdelivr.net/npm/github-markdown-css@{GITHUB_MARKDOWN_CSS_VERSION}'
+        f'/github-markdown.min.css',
+    ),
+}
+
+VENDOR_LOCK_NAME = 'vendor/SHA256SUMS'
+
+_VERSIONED_NAME_RE = re.compile(r'^(?P<stem>.+)\.(?P<digest>[0-9a-f]{12})(?P<ext>\.[^./]+)$')
+
+
+def asset_path(name):
+    """资源文件的绝对路径。"""
+    return os.path.join(STATIC_DIR, name)
+
+
+@functools.lru_cache(maxsize=None)
+def read_asset(name):
+    """读取资源文件内容（文本）。"""
+    with open(asset_path(name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@functools.lru_cache(maxsize=None)
+def asset_digest(name):
+    """资源内容的哈希前缀，用于生成带版本的文件名。"""
+    with open(asset_path(name), 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def versioned_name(name):
+    """带内容哈希的资源文件名，例如 zoom.js -> zoom.3f2a9c1b0d4e.js。"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{asset_digest(name)}{ext}"
+
+
+def asset_url(name, static_url=DEFAULT_STATIC_URL):
+    """资源的带版本URL。"""
+    return static_url + versioned_name(name)
+
+
+def resolve_asset(filename):
+    """
+    将请求的资源文件名解析为 (绝对路径, 是否带版本)。
+
+    带版本的文件名只有在哈希与当前内容一致时才有效，否则返回 (None, False)，
+    避免旧URL被永久缓存成新内容。越出静态目录的路径同样返回 (None, False)。
+    """
+    match = _VERSIONED_NAME_RE.match(filename)
+    versioned = False
+    if match:
+        name = match.group('stem') + match.group('ext')
+        if os.path.isfile(asset_path(name)) and asset_digest(name) == match.group('digest'):
+            filename = name
+            versioned = True
+    full_path = os.path.realpath(os.path.join(STATIC_DIR, filename))
+    if os.path.commonpath([full_path, STATIC_DIR]) != STATIC_DIR or not os.path.isfile(full_path):
+        return None, False
+    if match and not versioned:
+        return None, False
+    return full_path, versioned
+
+
+def zoom_asset_tags(static_url=DEFAULT_STATIC_URL):
+    """引用放大缩小控件外部资源的 <link>/<script> 标签。"""
+    return (f'\n<link rel="stylesheet" href="{asset_url("zoom.css", static_url)}">\n'
+            f'<script src="{asset_url("zoom.js", static_url)}" defer></script>\n')
+
+
+def zoom_inline_html():
+    """内联的放大缩小控件样式和脚本，用于独立的HTML文件。"""
+    return (f"\n<style>\n{read_asset('zoom.css')}</style>\n"
+            f"<script>\n{read_asset('zoom.js')}</script>\n")
+
+
+def mermaid_runtime_tags(lazy=True, prefetch_margin=DEFAULT_PREFETCH_MARGIN, static_url=None,
+                         mermaid_config=None):
+    """
+    Mermaid运行时脚本：替代 mermaid.initialize({startOnLoad: true})，
+    只在图表接近视口时才渲染，未渲染的图表显示为固定高度的占位区域。
+
+    参数:
+        lazy: 为 False 时页面加载后一次性渲染全部图表
+        prefetch_margin: 图表距视口多远时开始渲染（CSS长度，如 '200px'），
+                         越大滚动时越不容易看到占位区域，首屏渲染的图表也越多
+        static_url: 为 None 时内联脚本和样式（桌面查看器、独立HTML文件），
+                    否则引用该前缀下带内容哈希的静态资源
+        mermaid_config: 传给 mermaid.initialize 的额外配置
+    """
+    config = {'lazy': lazy, 'rootMargin': f'{prefetch_margin} 0px'}
+    if mermaid_config:
+        config['mermaid'] = mermaid_config
+    # 转义 <，避免配置中的字符串提前结束 <script> 标签
+    config_json = json.dumps(config).replace('<', '\\u003c')
+    tags = [f'<script>window.ladMermaidConfig = {config_json};</script>']
+    if static_url is None:
+        tags.append(f"<style>\n{read_asset('mermaid-lazy.css')}</style>")
+        tags.append(f"<script>\n{read_asset('mermaid-lazy.js')}</script>")
+    else:
+        tags.append(f'<link rel="stylesheet" href="{asset_url("mermaid-lazy.css", static_url)}">')
+        tags.append(f'<script src="{asset_url("mermaid-lazy.js", static_url)}"></script>')
+    return '\n'.join(tags)
+
+
+def live_reload_tags(events_url, static_url=DEFAULT_STATIC_URL):
+    """监视模式的页面脚本：连接 events_url 的事件流，把收到的补丁应用到页面。"""
+    config_json = json.dumps({'url': events_url}).replace('<', '\\u003c')
+    return (f'<script>window.ladLiveReload = {config_json};</script>\n'
+            f'<script src="{asset_url("live-reload.js", static_url)}" defer></script>')
+
+
+def get_asset_mode(mode=None):
+    """确定资源模式：参数优先，其次是环境变量 LAD_MARKDOWN_ASSETS，默认为 auto。"""
+    mode = mode or os.environ.get(ASSET_MODE_ENV) or 'auto'
+    if mode not in ASSET_MODES:
+        raise ValueError(f"未知的资源模式：{mode}（可选：{', '.join(ASSET_MODES)}）")
+    return mode
+
+
+def vendor_available(key):
+    """第三方库的本地副本是否存在。"""
+    return os.path.isfile(asset_path(VENDOR_ASSETS[key][0]))
+
+
+def vendor_pinned(key=None):
+    """第三方库（key 为 None 时为全部）是否在 SHA256SUMS 中固定了摘要。"""
+    digests = vendor_digests()
+    keys = VENDOR_ASSETS if key is None else [key]
+    return all(VENDOR_ASSETS[k][0] in digests for k in keys)
+
+
+_cdn_fallback_reported = set()
+
+
+def report_cdn_fallback(key):
+    """auto 模式下第三方库回退到CDN时，在标准错误输出中说明原因（每个库只提示一次）。"""
+    if key in _cdn_fallback_reported:
+        return
+    _cdn_fallback_reported.add(key)
+    name, cdn_url = VENDOR_ASSETS[key]
+    if vendor_pinned(key):
+        print(f"⚠️ 本地副本缺失：{asset_path(name)}，从CDN加载 {cdn_url}；"
+              f"执行 lad-markdown-assets fetch 恢复", file=sys.stderr)
+    else:
+        print(f"ℹ️ {key} 未固定摘要，当前安装不含本地副本，从CDN加载 {cdn_url}；"
+              f"离线环境请先固定摘要并执行 lad-markdown-assets fetch", file=sys.stderr)
+
+
+def vendor_url(key, mode=None, static_url=None):
+    """
+    第三方库的引用地址。
+
+    使用本地副本时，static_url 为 None 返回本地文件的 file:// URL（桌面查看器、
+    独立HTML文件），否则返回该前缀下带内容哈希的URL（由Web查看器提供，长期缓存）。
+    """
+    name, cdn_url = VENDOR_ASSETS[key]
+    mode = get_asset_mode(mode)
+    if mode == 'cdn':
+        return cdn_url
+    if mode == 'auto' and not vendor_available(key):
+        report_cdn_fallback(key)
+        return cdn_url
+    if not vendor_available(key):
+        raise FileNotFoundError(
+            f"本地资源不存在：{asset_path(name)}，请先执行 lad-markdown-assets fetch")
+    if static_url is None:
+        return pathlib.Path(asset_path(name)).as_uri()
+    return asset_url(name, static_url)
+
+
+def vendor_tags(mode=None, static_url=None, css=False):
+    """引用Mermaid（以及可选的github-markdown-css）的标签，参数含义见 vendor_url。"""
+    tags = []
+    if css:
+        tags.append(f'<link rel="stylesheet" href="{vendor_url("github-markdown-css", mode, static_url)}">')
+    tags.append(f'<script src="{vendor_url("mermaid", mode, static_url)}"></script>')
+    return '\n'.join(tags)
+
+
+def desktop_base_url():
+    """
+    桌面查看器 setHtml() 使用的基准地址。
+
+    QWebEngineView.setHtml() 默认的基准地址无权加载 file:// 资源，
+    以静态资源目录作为基准地址后页面才能引用本地的第三方库。
+    """
+    from PyQt5.QtCore import QUrl
+    return QUrl.fromLocalFile(STATIC_DIR + os.sep)
+
+
+def vendor_digests():
+    """SHA256SUMS 中固定的摘要 {本地文件名: sha256}；文件不存在时返回空字典。"""
+    digests = {}
+    try:
+        with open(asset_path(VENDOR_LOCK_NAME), 'r', encoding='utf-8') as f:
+            for line in f:
+                digest, _, name = line.strip().partition(' ')
+                name = name.strip().lstrip('*')
+                if digest and name:
+                    digests[posixpath.join(posixpath.dirname(VENDOR_LOCK_NAME), name)] = digest.lower()
+    except FileNotFoundError:
+        pass
+    return digests
+
+
+def _sha256_file(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _download(url, timeout):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read()
+
+
+def fetch_vendor_assets(force=False, timeout=60):
+    """
+    下载固定版本的第三方库到 static/vendor/，返回失败的数量。
+
+    下载内容的 sha256 必须与 SHA256SUMS 中固定的摘要一致才会写入；已存在且摘要一致的
+    文件默认跳过，摘要不一致的本地文件重新下载。
+    """
+    digests = vendor_digests()
+    failed = 0
+    for key, (name, cdn_url) in VENDOR_ASSETS.items():
+        expected = digests.get(name)
+        if expected is None:
+            failed += 1
+            print(f"❌ 没有固定摘要：{name}，请在可信的网络环境中执行 lad-markdown-assets lock")
+            continue
+        path = asset_path(name)
+        if os.path.isfile(path) and not force:
+            if _sha256_file(path) == expected:
+                print(f"✅ 已存在：{name}")
+                continue
+            print(f"⚠️ 本地文件与固定摘要不一致，重新下载：{name}")
+        try:
+            data = _download(cdn_url, timeout)
+        except OSError as e:
+            failed += 1
+            print(f"❌ 下载失败：{cdn_url}：{e}")
+            continue
+        actual = hashlib.sha256(data).hexdigest()
+        if actual != expected:
+            failed += 1
+            print(f"❌ 摘要不一致，已丢弃：{cdn_url}\n   期望 {expected}\n   实际 {actual}")
+            continue
+        write_atomic(path, data)
+        print(f"✅ 已下载并校验：{name}（{len(data) / 1024:.0f} KB）")
+    asset_digest.cache_clear()
+    read_asset.cache_clear()
+    return failed
+
+
+def lock_vendor_assets(timeout=60):
+    """
+    下载当前版本的第三方库，把摘要写入 SHA256SUMS（同时更新本地副本），返回失败的数量。
+
+    只在升级版本时执行；写入的摘要应与上游发布的校验值核对后再提交。
+    """
+    lines = []
+    failed = 0
+    for key, (name, cdn_url) in VENDOR_ASSETS.items():
+        try:
+            data = _download(cdn_url, timeout)
+        except OSError as e:
+            failed += 1
+            print(f"❌ 下载失败：{cdn_url}：{e}")
+            continue
+        digest = hashlib.sha256(data).hexdigest()
+        write_atomic(asset_path(name), data)
+        lines.append(f"{digest}  {posixpath.basename(name)}\n")
+        print(f"🔒 {name}：{digest}")
+    if failed:
+        return failed
+    write_atomic(asset_path(VENDOR_LOCK_NAME), ''.join(lines).encode('utf-8'))
+    print(f"✅ 已写入 {asset_path(VENDOR_LOCK_NAME)}，请核对后提交")
+    asset_digest.cache_clear()
+    read_asset.cache_clear()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='lad-markdown-assets', description='管理本地前端资源')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    fetch_parser = subparsers.add_parser('fetch', help='下载固定版本的Mermaid和github-markdown-css并校验摘要')
+    fetch_parser.add_argument('--force', action='store_true', help='重新下载已存在的文件')
+    fetch_parser.add_argument('--timeout', type=float, default=60, help='单个文件的下载超时（秒）')
+    lock_parser = subparsers.add_parser('lock', help='升级版本后重新生成 SHA256SUMS 中的固定摘要')
+    lock_parser.add_argument('--timeout', type=float, default=60, help='单个文件的下载超时（秒）')
+    subparsers.add_parser('status', help='显示本地资源状态')
+    args = parser.parse_args(argv)
+
+    if args.command == 'fetch':
+        return 1 if fetch_vendor_assets(force=args.force, timeout=args.timeout) else 0
+    if args.command == 'lock':
+        return 1 if lock_vendor_assets(timeout=args.timeout) else 0
+    digests = vendor_digests()
+    status = 0
+    if not digests:
+        print(f"ℹ️ 未固定第三方库（{asset_path(VENDOR_LOCK_NAME)} 不存在）：发布包不含本地副本，"
+              f"auto 模式使用CDN")
+    for key, (name, cdn_url) in VENDOR_ASSETS.items():
+        if not vendor_available(key):
+            print(f"⚠️ {key}：本地副本不存在，将使用 {cdn_url}")
+        elif name not in digests:
+            print(f"⚠️ {key}：{asset_path(name)}（没有固定摘要）")
+        elif _sha256_file(asset_path(name)) != digests[name]:
+            status = 1
+            print(f"❌ {key}：{asset_path(name)} 与固定摘要不一致")
+        else:
+            print(f"✅ {key}：{asset_path(name)}（摘要一致）")
+    print(f"📄 当前资源模式：{get_asset_mode()}")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,288 @@
+"""
+批量渲染命令行工具
+
+将整个文档目录树中的Markdown文件并行渲染为静态HTML：
+
+    lad-markdown-render --out DIR SRC_DIR [-j N] [--force]
+
+内容哈希未变化的文件会被跳过，输出文件采用“临时文件+重命名”原子写入，
+结束时打印吞吐量统计（文件/秒、MB/秒）。指向本地 .md 文件的链接改为对应的 .html，
+源文件已删除的页面从输出目录中删除。
+"""
+import argparse
+import hashlib
+import html as html_module
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .file_utils import write_atomic
+
+MANIFEST_NAME = '.lad-render-manifest.json'
+# 使用本地第三方库时，库文件复制到输出目录下的该子目录，页面以相对路径引用
+ASSETS_DIR_NAME = '_lad_assets'
+# 指向本地 .md 文件的链接（可带 ?query 和 #锚点）；外部链接、//开头的链接和 .bak.md 备份不改写
+MD_HREF_RE = re.compile(r'(<a\s[^>]*?\bhref=")(?![a-zA-Z][a-zA-Z0-9+.-]*:|//)'
+                        r'([^"?#]*?)(?<!\.bak)\.md(?=[?#"])')
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{title}</title>
+    {vendor_tags}
+    {mermaid_runtime}
+    <style>
+        body {{ font-family: '微软雅黑', 'Microsoft YaHei', Arial, sans-serif; margin: 30px auto; max-width: 1200px; line-height: 1.6; }}
+        table {{ border-collapse: collapse; width: 100%; margin: 16px 0; }}
+        th, td {{ border: 1px solid #ccc; padding: 8px; text-align: left; }}
+        th {{ background: #f6f8fa; }}
+        pre {{ background: #f6f8fa; padding: 10px; border-radius: 4px; overflow-x: auto; }}
+        code {{ background: #f6f8fa; padding: 2px 4px; border-radius: 4px; }}
+        .mermaid {{ background: white; padding: 10px; border-radius: 4px; text-align: center; }}
+    </style>
+</head>
+<body>
+<div class="markdown-body">
+{body}
+</div>
+</body>
+</html>
+"""
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def output_path_for(rel_path, out_dir):
+    """源文件相对路径对应的输出HTML路径。"""
+    return os.path.join(out_dir, os.path.splitext(rel_path)[0] + '.html')
+
+
+def rewrite_md_links(html):
+    """把HTML中指向本地 .md 文件的链接改为对应的 .html，锚点和查询参数保持不变。"""
+    return MD_HREF_RE.sub(r'\1\2.html', html)
+
+
+def page_vendor_tags(rel_path, out_dir):
+    """github-markdown-css 和 Mermaid 的引用：输出目录中有副本时以相对路径引用，否则使用CDN。"""
+    from .assets import VENDOR_ASSETS
+
+    page_dir = os.path.dirname(output_path_for(rel_path, out_dir))
+    urls = {}
+    for key in ('github-markdown-css', 'mermaid'):
+        name, cdn_url = VENDOR_ASSETS[key]
+        local_path = os.path.join(out_dir, ASSETS_DIR_NAME, os.path.basename(name))
+        if os.path.isfile(local_path):
+            urls[key] = os.path.relpath(local_path, page_dir).replace(os.sep, '/')
+        else:
+            urls[key] = cdn_url
+    return (f'<link rel="stylesheet" href="{urls["github-markdown-css"]}">\n'
+            f'    <script src="{urls["mermaid"]}"></script>')
+
+
+def copy_vendor_assets(out_dir, mode=None):
+    """
+    按资源模式把本地第三方库（Mermaid、github-markdown-css）复制到输出目录，
+    使生成的站点可以离线浏览。使用CDN时删除旧副本，返回是否使用本地副本。
+    """
+    from .assets import VENDOR_ASSETS, asset_path, get_asset_mode, report_cdn_fallback, vendor_available
+
+    mode = get_asset_mode(mode)
+    target_dir = os.path.join(out_dir, ASSETS_DIR_NAME)
+    keys = ('github-markdown-css', 'mermaid')
+    use_local = mode == 'local' or (mode == 'auto' and all(vendor_available(key) for key in keys))
+    if not use_local:
+        if mode == 'auto':
+            for key in keys:
+                if not vendor_available(key):
+                    report_cdn_fallback(key)
+        shutil.rmtree(target_dir, ignore_errors=True)
+        return False
+    missing = [key for key in keys if not vendor_available(key)]
+    if missing:
+        raise FileNotFoundError(f"本地第三方库不存在：{', '.join(missing)}，请先执行 lad-markdown-assets fetch")
+    os.makedirs(target_dir, exist_ok=True)
+    for key in keys:
+        name = VENDOR_ASSETS[key][0]
+        shutil.copyfile(asset_path(name), os.path.join(target_dir, os.path.basename(name)))
+    return True
+
+
+def render_one(src_dir, out_dir, rel_path, known_digest):
+    """
+    渲染单个文件（在工作进程中执行）。
+
+    返回 (rel_path, digest, rendered, error)；内容哈希与 known_digest 相同且输出
+    已存在时不重新渲染。
+    """
+    from .assets import mermaid_runtime_tags
+    from .markdown_processor import render_file
+
+    src_path = os.path.join(src_dir, rel_path)
+    out_path = output_path_for(rel_path, out_dir)
+    try:
+        digest = _file_digest(src_path)
+        if digest == known_digest and os.path.exists(out_path):
+            return rel_path, digest, False, None
+        html_body = rewrite_md_links(render_file(src_path))
+        title = html_module.escape(os.path.basename(rel_path))
+        write_atomic(out_path, PAGE_TEMPLATE.format(title=title, body=html_body,
+                                                     vendor_tags=page_vendor_tags(rel_path, out_dir),
+                                                     mermaid_runtime=mermaid_runtime_tags()))
+        return rel_path, digest, True, None
+    except Exception as e:
+        return rel_path, None, False, str(e)
+
+
+def iter_markdown_files(src_dir):
+    """遍历目录树，产出所有 .md 文件相对于 src_dir 的路径。"""
+    for root, dirs, files in os.walk(src_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in sorted(files):
+            if name.endswith('.md') and not name.endswith('.bak.md'):
+                yield os.path.relpath(os.path.join(root, name), src_dir)
+
+
+def _read_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def prune_outputs(out_dir, rel_paths):
+    """删除 rel_paths（源文件已不存在）对应的输出页面以及因此变空的目录，返回删除的页面数。"""
+    out_dir = os.path.abspath(out_dir)
+    removed = 0
+    for rel_path in rel_paths:
+        out_path = os.path.abspath(output_path_for(rel_path, out_dir))
+        if os.path.commonpath([out_path, out_dir]) != out_dir:
+            continue
+        try:
+            os.remove(out_path)
+        except FileNotFoundError:
+            continue
+        removed += 1
+        directory = os.path.dirname(out_path)
+        while directory != out_dir:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+    return removed
+
+
+def batch_render(src_dir, out_dir, jobs=None, force=False):
+    """
+    并行渲染 src_dir 下的全部Markdown文件到 out_dir，返回统计信息字典。
+
+    清单中记录每个文件的内容哈希以及 mtime/size；mtime和size都未变化的文件
+    直接跳过，不再读取内容计算哈希。上次清单中有、这次源目录中没有的文件，
+    其输出页面被删除（即使渲染器版本变化、清单整体失效也会清理）。
+    """
+    from . import __version__
+    from .markdown_processor import enable_mermaid_prerender_from_env, get_default_processor
+
+    # 预渲染设置影响输出内容，主进程也启用，使其计入清单签名
+    enable_mermaid_prerender_from_env()
+    use_local = copy_vendor_assets(out_dir)
+    # 资源模式或页面模板变化时所有页面都要更新，因此计入清单签名
+    signature = ([__version__] + list(get_default_processor().cache_signature)
+                 + ['local-assets' if use_local else 'cdn-assets',
+                    hashlib.sha256(PAGE_TEMPLATE.encode('utf-8')).hexdigest()[:12]])
+    previous = _read_manifest(out_dir)
+    manifest = previous.get('files', {}) if not force and previous.get('signature') == signature else {}
+    new_manifest = {}
+    pending = []
+    seen = set()
+    stats = {'total': 0, 'rendered': 0, 'skipped': 0, 'failed': 0, 'removed': 0, 'bytes': 0}
+    start = time.perf_counter()
+
+    for rel_path in iter_markdown_files(src_dir):
+        seen.add(rel_path)
+        stats['total'] += 1
+        st = os.stat(os.path.join(src_dir, rel_path))
+        entry = manifest.get(rel_path)
+        if (entry and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size
+                and os.path.exists(output_path_for(rel_path, out_dir))):
+            new_manifest[rel_path] = entry
+            stats['skipped'] += 1
+            continue
+        pending.append((rel_path, entry['digest'] if entry else None, st))
+
+    if pending:
+        # 工作进程通过环境变量 LAD_MARKDOWN_MERMAID_SVG_DIR 共享同一个SVG缓存目录，
+        # 多个文档中相同的图表只渲染一次
+        with ProcessPoolExecutor(max_workers=jobs,
+                                 initializer=enable_mermaid_prerender_from_env) as executor:
+            # 分批派发任务，减少数万个小文件时的进程间通信开销
+            chunksize = max(1, min(64, len(pending) // ((jobs or os.cpu_count() or 1) * 4)))
+            results = executor.map(render_one,
+                                   [src_dir] * len(pending), [out_dir] * len(pending),
+                                   [rel_path for rel_path, _, _ in pending],
+                                   [digest for _, digest, _ in pending],
+                                   chunksize=chunksize)
+            for (rel_path, _, st), (_, digest, rendered, error) in zip(pending, results):
+                if error is not None:
+                    stats['failed'] += 1
+                    print(f"❌ 渲染失败：{rel_path}：{error}", file=sys.stderr)
+                    continue
+                new_manifest[rel_path] = {'digest': digest, 'mtime_ns': st.st_mtime_ns,
+                                          'size': st.st_size}
+                if rendered:
+                    stats['rendered'] += 1
+                    stats['bytes'] += st.st_size
+                else:
+                    stats['skipped'] += 1
+
+    stats['removed'] = prune_outputs(out_dir, [rel_path for rel_path in previous.get('files', {})
+                                               if rel_path not in seen])
+    os.makedirs(out_dir, exist_ok=True)
+    write_atomic(os.path.join(out_dir, MANIFEST_NAME),
+                  json.dumps({'signature': signature, 'files': new_manifest}, ensure_ascii=False))
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='lad-markdown-render',
+        description='将Markdown文档目录树批量渲染为静态HTML')
+    parser.add_argument('src_dir', help='Markdown源文件目录')
+    parser.add_argument('--out', required=True, help='HTML输出目录')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='并行工作进程数（默认为CPU核数）')
+    parser.add_argument('--force', action='store_true', help='忽略清单，全部重新渲染')
+    parser.add_argument('--mermaid-svg-dir', default=None,
+                        help='Mermaid预渲染SVG的缓存目录（需要安装mermaid-cli）')
+    args = parser.parse_args(argv)
+    if args.mermaid_svg_dir:
+        os.environ['LAD_MARKDOWN_MERMAID_SVG_DIR'] = os.path.abspath(args.mermaid_svg_dir)
+
+    if not os.path.isdir(args.src_dir):
+        print(f"❌ 目录不存在：{args.src_dir}")
+        return 1
+
+    stats = batch_render(args.src_dir, args.out, jobs=args.jobs, force=args.force)
+    seconds = max(stats['seconds'], 1e-9)
+    print(f"✅ 共 {stats['total']} 个文件：渲染 {stats['rendered']}，"
+          f"跳过 {stats['skipped']}，删除 {stats['removed']}，失败 {stats['failed']}")
+    print(f"⏱️ 耗时 {stats['seconds']:.2f}s，{stats['rendered'] / seconds:.1f} 文件/秒，"
+          f"{stats['bytes'] / (1024 * 1024) / seconds:.2f} MB/秒")
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
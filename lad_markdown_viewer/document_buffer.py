@@ -0,0 +1,348 @@
+"""
+文档缓冲区模块
+
+DocumentBuffer 以分段表（piece table）的方式保存正在编辑的文档：原文件通过内存映射
+按行引用，编辑写入的新行追加到单独的缓冲区，文档由若干指向这两个来源的分段依次拼接而成。
+
+- 按行号定位分段只需一次二分查找，替换某个段落只改动分段列表，不复制整篇文档；
+- 保存时未修改的区间直接按字节从原文件复制，写入临时文件后原子替换，
+  中途失败不会留下写了一半的文件；
+- 备份不再是整篇文档的 .bak.md 副本，而是追加到 <文件名>.bak.delta 的增量记录
+  （每次保存一行JSON，记录被替换的原始行），可用 restore_backup 逐次回退。
+"""
+import json
+import mmap
+import os
+import tempfile
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+
+BACKUP_SUFFIX = '.bak.delta'
+COPY_CHUNK_SIZE = 1 << 20
+ITER_CHUNK_LINES = 4096
+
+
+def split_lines(text):
+    """按 '\\n' 切分为带换行符的行列表（与文件中的行一一对应，不把 \\r、\\f 等当作换行）。"""
+    parts = text.split('\n')
+    lines = [part + '\n' for part in parts[:-1]]
+    if parts[-1]:
+        lines.append(parts[-1])
+    return lines
+
+
+class _ListSource:
+    """以字符串列表保存的行来源（新写入的行、内存中创建的文档）。"""
+
+    def __init__(self, lines, encoding):
+        self.items = lines
+        self.encoding = encoding
+
+    @property
+    def line_count(self):
+        return len(self.items)
+
+    def get(self, start, end):
+        return self.items[start:end]
+
+    def write_to(self, f, start, end):
+        for line in self.items[start:end]:
+            f.write(line.encode(self.encoding))
+
+    def close(self):
+        pass
+
+
+class _MappedSource:
+    """通过内存映射引用原文件的行，只记录每行的字节偏移，按需解码。"""
+
+    def __init__(self, path, encoding):
+        self.encoding = encoding
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        size = len(self._mm)
+        offsets = array('q', [0])
+        find = self._mm.find
+        position = find(b'\n')
+        while position != -1:
+            offsets.append(position + 1)
+            position = find(b'\n', position + 1)
+        if offsets[-1] != size:
+            offsets.append(size)
+        self.offsets = offsets
+
+    @property
+    def line_count(self):
+        return len(self.offsets) - 1
+
+    def get(self, start, end):
+        offsets = self.offsets
+        mm = self._mm
+        encoding = self.encoding
+        return [mm[offsets[i]:offsets[i + 1]].decode(encoding) for i in range(start, end)]
+
+    def write_to(self, f, start, end):
+        position = self.offsets[start]
+        stop = self.offsets[end]
+        while position < stop:
+            chunk_end = min(position + COPY_CHUNK_SIZE, stop)
+            f.write(self._mm[position:chunk_end])
+            position = chunk_end
+
+    @property
+    def closed(self):
+        return self._mm.closed
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+class DocumentBuffer:
+    """
+    基于分段表的行缓冲区。
+
+    支持 len()、迭代和切片读取（buffer[start:end] 返回行列表），可以直接传给
+    SectionIndex；修改通过 replace/insert 完成，save 原子写回文件。
+
+    参数:
+        lines: 初始行列表（每行带换行符），用于内存中创建文档
+        encoding: 保存时使用的编码
+    """
+
+    def __init__(self, lines=(), encoding='utf-8'):
+        self.path = None
+        self.encoding = encoding
+        self._init_pieces(_ListSource(list(lines), encoding))
+
+    @classmethod
+    def open(cls, path, encoding='utf-8'):
+        """打开文件：内容通过内存映射按需读取，不会整体载入内存。"""
+        buffer = cls(encoding=encoding)
+        buffer.path = path
+        buffer._load(path)
+        return buffer
+
+    def _load(self, path):
+        if os.path.getsize(path) == 0:
+            source = _ListSource([], self.encoding)
+        else:
+            source = _MappedSource(path, self.encoding)
+        self._init_pieces(source)
+
+    def _init_pieces(self, original):
+        self._original = original
+        self._added = _ListSource([], self.encoding)
+        count = original.line_count
+        # 每个分段为 (来源, 起始行, 行数)；_starts 为各分段在文档中的起始行号
+        self._pieces = [(original, 0, count)] if count else []
+        self._line_count = count
+        self._starts = []
+        self._reindex(0)
+        # 自上次保存以来的修改：(起始行, 被替换的原始行, 新行数)，保存时写入增量备份
+        self._edits = []
+
+    def _reindex(self, first):
+        """从第 first 个分段开始重新计算起始行号（与分段数量成正比，与文档行数无关）。"""
+        del self._starts[first:]
+        line = self._starts[-1] + self._pieces[first - 1][2] if first else 0
+        for _, _, count in self._pieces[first:]:
+            self._starts.append(line)
+            line += count
+
+    def __len__(self):
+        return self._line_count
+
+    @property
+    def dirty(self):
+        return bool(self._edits)
+
+    @property
+    def piece_count(self):
+        return len(self._pieces)
+
+    def _locate(self, line):
+        """行号所在的分段序号及其在分段内的偏移。"""
+        index = bisect_right(self._starts, line) - 1
+        return index, line - self._starts[index]
+
+    def _split(self, line):
+        """确保 line 正好是某个分段的起始行，返回该分段的序号。"""
+        if line >= self._line_count:
+            return len(self._pieces)
+        index, offset = self._locate(line)
+        if offset == 0:
+            return index
+        source, start, count = self._pieces[index]
+        self._pieces[index:index + 1] = [(source, start, offset),
+                                         (source, start + offset, count - offset)]
+        self._starts.insert(index + 1, line)
+        return index + 1
+
+    def lines(self, start=0, end=None):
+        """返回 [start, end) 行组成的列表。"""
+        end = self._line_count if end is None else min(end, self._line_count)
+        if start >= end:
+            return []
+        result = []
+        index, offset = self._locate(start)
+        line = start
+        while line < end:
+            source, piece_start, count = self._pieces[index]
+            take = min(count - offset, end - line)
+            result.extend(source.get(piece_start + offset, piece_start + offset + take))
+            line += take
+            index += 1
+            offset = 0
+        return result
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._line_count)
+            if step != 1:
+                raise ValueError("DocumentBuffer 不支持带步长的切片")
+            return self.lines(start, stop)
+        if key < 0:
+            key += self._line_count
+        if not 0 <= key < self._line_count:
+            raise IndexError("行号超出范围")
+        return self.lines(key, key + 1)[0]
+
+    def __iter__(self):
+        for source, start, count in list(self._pieces):
+            for chunk_start in range(start, start + count, ITER_CHUNK_LINES):
+                yield from source.get(chunk_start, min(chunk_start + ITER_CHUNK_LINES, start + count))
+
+    def text(self):
+        return ''.join(self)
+
+    def replace(self, start, end, new_lines):
+        """
+        把 [start, end) 行替换为 new_lines（每行带换行符），返回被替换的原始行。
+
+        新行追加到新增缓冲区，文档中只插入一个指向它们的分段。
+        """
+        start = max(0, min(start, self._line_count))
+        end = max(start, min(end, self._line_count))
+        new_lines = list(new_lines)
+        old_lines = self.lines(start, end)
+        first = self._split(start)
+        last = self._split(end)
+        pieces = []
+        if new_lines:
+            added = self._added.items
+            pieces.append((self._added, len(added), len(new_lines)))
+            added.extend(new_lines)
+        self._pieces[first:last] = pieces
+        self._line_count += len(new_lines) - (end - start)
+        self._reindex(first)
+        self._edits.append((start, old_lines, len(new_lines)))
+        return old_lines
+
+    def insert(self, line, new_lines):
+        """在第 line 行之前插入 new_lines。"""
+        self.replace(line, line, new_lines)
+
+    def append_text(self, text):
+        """
+        在文档末尾追加文本，返回 (起始行, 被替换的原始行, 新行)，可直接用于更新段落索引和撤销历史。
+
+        追加的文本与最后一行拼接后重新切分：原文末行没有换行符时两者合并为一行，
+        缓冲区中的行与保存后文件中的行保持一致。
+        """
+        start = max(self._line_count - 1, 0)
+        new_lines = split_lines(''.join(self.lines(start)) + text)
+        old_lines = self.replace(start, self._line_count, new_lines)
+        return start, old_lines, new_lines
+
+    def save(self, path=None, backup=True):
+        """
+        原子写回文件：先写入同目录下的临时文件，再替换原文件。
+
+        未修改的区间按字节从原文件复制。backup 为 True 且有修改时，
+        把本次保存替换掉的原始行追加到 <文件名>.bak.delta。
+        保存后缓冲区重新映射新文件，分段表收缩为一个分段。
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("未指定保存路径")
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for source, start, count in self._pieces:
+                    source.write_to(f, start, start + count)
+                f.flush()
+                os.fsync(f.fileno())
+            if backup and self._edits and os.path.exists(path):
+                self._append_backup(path)
+            # Windows 下被映射的文件不能被替换，先释放原文件的映射
+            self._original.close()
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            self._reopen_original()
+            raise
+        self.path = path
+        self._load(path)
+
+    def _reopen_original(self):
+        """保存失败时原文件保持不变，重新映射后分段表仍然有效。"""
+        old = self._original
+        if not isinstance(old, _MappedSource) or not old.closed:
+            return
+        self._original = _MappedSource(self.path, self.encoding)
+        self._pieces = [(self._original if source is old else source, start, count)
+                        for source, start, count in self._pieces]
+
+    def _append_backup(self, path):
+        record = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'edits': [[start, old_lines, new_count] for start, old_lines, new_count in self._edits],
+        }
+        with open(path + BACKUP_SUFFIX, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def close(self):
+        """释放原文件的内存映射。"""
+        self._original.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_backup_records(path):
+    """读取 path 的增量备份记录（从旧到新）。"""
+    try:
+        with open(path + BACKUP_SUFFIX, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def restore_backup(path, steps=1, encoding='utf-8'):
+    """
+    根据增量备份计算 path 在 steps 次保存之前的内容（返回文本，不修改文件）。
+
+    增量记录只对通过 DocumentBuffer 保存的版本有效；文件被其他程序修改过时结果不可靠。
+    """
+    records = read_backup_records(path)
+    if steps > len(records):
+        raise ValueError(f"只有 {len(records)} 次保存记录")
+    with open(path, 'r', encoding=encoding, newline='') as f:
+        lines = split_lines(f.read())
+    for record in reversed(records[len(records) - steps:]):
+        for start, old_lines, new_count in reversed(record['edits']):
+            lines[start:start + new_count] = old_lines
+    return ''.join(lines)
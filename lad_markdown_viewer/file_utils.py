@@ -0,0 +1,31 @@
+"""
+文件工具模块
+
+渲染缓存、搜索索引、链接图、撤销日志、批量渲染和第三方库下载共用的原子写入。
+"""
+import os
+import tempfile
+
+
+def write_atomic(path, data, encoding='utf-8'):
+    """
+    原子地写入文件：先写入同目录下的临时文件，再用 os.replace 替换目标文件。
+
+    data 为 str 时按 encoding 编码（不做换行符转换）；上级目录不存在时自动创建。
+    写入失败时删除临时文件并重新抛出异常，目标文件保持原样，读取方不会看到写了一半的内容。
+    """
+    if isinstance(data, str):
+        data = data.encode(encoding)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,243 @@
+"""
+文件监视模块
+
+FileWatcher 监视单个文件，内容变化时回调：
+- 安装了 watchdog 时使用操作系统的文件通知（inotify、FSEvents、ReadDirectoryChangesW），
+  否则按固定间隔轮询文件的修改时间和大小；
+- 编辑器保存时的一连串写入事件合并处理：最后一次事件之后安静 debounce 秒才检查一次；
+- 只有内容哈希变化时才回调，touch 或保存相同内容不会触发重新渲染。
+
+LiveDocument 在 FileWatcher 之上维护一个增量渲染的文档：文件变化后只重新渲染变化的块，
+并按版本号保留最近的DOM补丁，供 Web 查看器的 /events 接口推送给浏览器。
+
+    pip install watchdog    # 可选，未安装时使用轮询
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+
+from .incremental import IncrementalRenderer
+
+try:
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_digest(path):
+    """文件内容的sha256，文件不存在或无法读取时返回 None。"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class _EventHandler:
+    """watchdog 事件处理器：只关心目标文件（包括重命名到目标路径的情况）。"""
+
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def dispatch(self, event):
+        paths = (getattr(event, 'src_path', None), getattr(event, 'dest_path', None))
+        if any(path and os.path.abspath(os.fsdecode(path)) == self.watcher.path for path in paths):
+            self.watcher.notify()
+
+
+class FileWatcher:
+    """
+    监视单个文件的内容变化。
+
+    参数:
+        path: 文件路径
+        callback: 内容变化时调用 callback(path)，在后台线程中执行
+        debounce: 最后一次变化事件之后等待的秒数
+        poll_interval: 轮询模式下检查文件的间隔（秒）
+        use_native: 是否使用 watchdog 的系统通知（默认在已安装时使用）
+    """
+
+    def __init__(self, path, callback, debounce=0.2, poll_interval=0.5, use_native=None):
+        self.path = os.path.abspath(path)
+        self.callback = callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_native = Observer is not None and use_native is not False
+        self.digest = file_digest(self.path)
+        self._stat = self._stat_key()
+        self._lock = threading.Lock()
+        self._check_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._timer = None
+        self._observer = None
+        self._thread = None
+
+    @property
+    def mode(self):
+        return 'native' if self.use_native else 'polling'
+
+    def _stat_key(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def start(self):
+        if self.use_native:
+            self._observer = Observer()
+            # 监视所在目录：编辑器常以“写临时文件再重命名”的方式保存，只监视文件本身会失效
+            self._observer.schedule(_EventHandler(self), os.path.dirname(self.path), recursive=False)
+            self._observer.daemon = True
+            self._observer.start()
+        else:
+            self._thread = threading.Thread(target=self._poll, name='lad-file-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _poll(self):
+        while not self._stopped.wait(self.poll_interval):
+            key = self._stat_key()
+            if key != self._stat:
+                self._stat = key
+                self.notify()
+
+    def notify(self):
+        """收到变化事件：重新开始计时，安静 debounce 秒后再检查内容。"""
+        with self._lock:
+            if self._stopped.is_set():
+                return
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self._check)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _check(self):
+        with self._check_lock:
+            digest = file_digest(self.path)
+            # 文件暂时不存在（重命名保存的中间状态）或内容没有变化时不回调
+            if digest is None or digest == self.digest or self._stopped.is_set():
+                return
+            self.digest = digest
+            self.callback(self.path)
+
+
+class LiveDocument:
+    """
+    随文件变化自动更新的增量渲染文档。
+
+    每次内容变化生成一个新版本和对应的补丁列表（格式见 IncrementalRenderer），
+    最近 max_history 个版本的补丁保留在内存中，落后更多的客户端需要整页刷新。
+    epoch 在每个实例中随机生成，客户端据此识别服务重启（版本号和块ID都已重新开始）。
+    subscribers 和 last_used 记录正在等待更新的客户端数和最近一次使用的时间，
+    供持有多个文档的调用方决定停止哪些文档；stop() 之后等待中的客户端立即返回。
+
+    参数:
+        path: Markdown文件路径
+        debounce / poll_interval / use_native: 传给 FileWatcher
+        max_history: 保留补丁的版本数
+        processor: 渲染使用的 MarkdownProcessor（默认共享实例）
+    """
+
+    def __init__(self, path, debounce=0.2, poll_interval=0.5, use_native=None, max_history=64,
+                 processor=None):
+        self.path = os.path.abspath(path)
+        self.renderer = IncrementalRenderer(processor)
+        self.epoch = os.urandom(4).hex()
+        self.version = 0
+        self._history = deque(maxlen=max_history)
+        self._condition = threading.Condition()
+        self.subscribers = 0
+        self.last_used = time.monotonic()
+        self.stopped = False
+        self.renderer.update_file(self.path)
+        self.watcher = FileWatcher(self.path, self._on_change, debounce=debounce,
+                                   poll_interval=poll_interval, use_native=use_native)
+
+    def start(self):
+        self.watcher.start()
+        return self
+
+    def stop(self):
+        self.watcher.stop()
+        with self._condition:
+            self.stopped = True
+            self._condition.notify_all()
+
+    def subscribe(self):
+        """登记一个等待更新的客户端，断开时调用 unsubscribe。"""
+        with self._condition:
+            self.subscribers += 1
+            self.last_used = time.monotonic()
+
+    def unsubscribe(self):
+        with self._condition:
+            self.subscribers -= 1
+            self.last_used = time.monotonic()
+
+    def _on_change(self, path):
+        with self._condition:
+            patches = self.renderer.update_file(path)
+            if not patches:
+                return
+            self.version += 1
+            self._history.append((self.version, patches))
+            self._condition.notify_all()
+
+    def snapshot(self):
+        """返回 (版本号, 完整HTML, 目录项)，三者属于同一个版本。"""
+        with self._condition:
+            return self.version, self.renderer.html(), self.renderer.toc_items
+
+    def wait(self, version, timeout=None):
+        """等待文档版本与 version 不同（或超时、文档已停止），返回当前版本号。"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.version != version or self.stopped, timeout=timeout)
+            return self.version
+
+    def patches_since(self, version):
+        """
+        返回 (当前版本号, 从 version 更新到当前版本需要依次应用的补丁)。
+
+        version 过旧、相应的补丁已被丢弃或不属于当前实例时补丁为 None，客户端应整页刷新。
+        """
+        with self._condition:
+            if version > self.version:
+                return self.version, None
+            if version == self.version:
+                return self.version, []
+            if not self._history or self._history[0][0] > version + 1:
+                return self.version, None
+            patches = []
+            for patch_version, items in self._history:
+                if patch_version > version:
+                    patches.extend(items)
+            return self.version, patches
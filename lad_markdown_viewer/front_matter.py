@@ -0,0 +1,102 @@
+"""
+YAML front matter 处理模块
+
+文档以 '---' 开头时才会继续查找结束分隔符（没有 front matter 的文档只做一次前缀比较），
+分隔符之间的内容交给 PyYAML 解析（优先使用 libyaml 加速的 CSafeLoader），
+支持嵌套映射、列表和多行字符串。元信息表格直接生成HTML，不再拼回Markdown重新解析。
+"""
+import html as html_module
+import re
+
+import yaml
+
+from .markdown_utils import slugify
+
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+METADATA_TITLE = '文档元信息'
+METADATA_SLUG = slugify(METADATA_TITLE)
+
+_OPENING_RE = re.compile(r'---[ \t]*\r?\n')
+_CLOSING_RE = re.compile(r'^---[ \t]*(?:\r?\n|\Z)', re.MULTILINE)
+
+
+def split_front_matter(md_text):
+    """
+    拆分 front matter，返回 (YAML文本, 正文)；没有 front matter 时 YAML文本为 None。
+
+    只扫描 front matter 本身，不会遍历整个文档。
+    """
+    if not md_text.startswith('---'):
+        return None, md_text
+    opening = _OPENING_RE.match(md_text)
+    if not opening:
+        return None, md_text
+    closing = _CLOSING_RE.search(md_text, opening.end())
+    if not closing:
+        return None, md_text
+    return md_text[opening.end():closing.start()], md_text[closing.end():]
+
+
+def parse_front_matter(md_text):
+    """
+    解析 front matter，返回 (元信息字典, 正文)。
+
+    YAML 无法解析或顶层不是映射时（例如文档以分隔线开头），视为没有 front matter，
+    原文保持不变。
+    """
+    yaml_text, body = split_front_matter(md_text)
+    if yaml_text is None:
+        return {}, md_text
+    if not yaml_text.strip():
+        return {}, body
+    try:
+        metadata = yaml.load(yaml_text, Loader=YAML_LOADER)
+    except yaml.YAMLError:
+        return {}, md_text
+    if not isinstance(metadata, dict):
+        return {}, md_text
+    return metadata, body
+
+
+def _format_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, dict):
+        return _table_html(value, header=False)
+    if isinstance(value, (list, tuple)):
+        if all(not isinstance(item, (dict, list, tuple)) for item in value):
+            return ', '.join(_format_value(item) for item in value)
+        return '<ul>' + ''.join(f'<li>{_format_value(item)}</li>' for item in value) + '</ul>'
+    return html_module.escape(str(value).rstrip('\n')).replace('\n', '<br>')
+
+
+def _table_html(metadata, header=True):
+    rows = ''.join(f'<tr>\n  <td>{html_module.escape(str(key))}</td>\n  <td>{_format_value(value)}</td>\n</tr>\n'
+                   for key, value in metadata.items())
+    head = '<thead>\n<tr>\n  <th>字段</th>\n  <th>值</th>\n</tr>\n</thead>\n' if header else ''
+    return f'<table>\n{head}<tbody>\n{rows}</tbody>\n</table>\n'
+
+
+def metadata_table_html(metadata):
+    """把元信息渲染为“文档元信息”标题和表格的HTML；没有元信息时返回空字符串。"""
+    if not metadata:
+        return ''
+    return f'<h2 id="{METADATA_SLUG}">{METADATA_TITLE}</h2>\n' + _table_html(metadata)
+
+
+def metadata_table_markdown(metadata):
+    """旧接口使用的Markdown表格形式（嵌套值按 YAML 流式写法输出在一个单元格内）。"""
+    if not metadata:
+        return ''
+    rows = []
+    for key, value in metadata.items():
+        if isinstance(value, (dict, list)):
+            value = yaml.safe_dump(value, default_flow_style=True, allow_unicode=True).strip()
+        elif value is None:
+            value = ''
+        value = str(value).replace('\n', ' ').replace('|', '\\|')
+        rows.append(f"| {key} | {value} |")
+    return f"## {METADATA_TITLE}\n\n| 字段 | 值 |\n|------|----|\n" + '\n'.join(rows) + '\n\n'
@@ -0,0 +1,169 @@
+"""
+增量渲染模块
+
+将Markdown按顶层块切分并对每块计算哈希，文档修改后只重新渲染发生变化的块，
+并生成可在WebView中直接应用的DOM补丁，适用于大文档的实时预览。
+"""
+import hashlib
+import json
+
+from .markdown_processor import get_default_processor
+from .markdown_utils import iter_blocks, iter_file_lines, split_blocks
+
+
+# 在页面中应用补丁的脚本；补丁中新插入的Mermaid图表交给按需渲染的运行时（未加载时立即渲染）
+PATCH_SCRIPT = '''
+<script>
+window.ladApplyPatches = function(patches) {
+    var root = document.getElementById('lad-md-root') || document.body;
+    function find(id) { return root.querySelector('[data-block="' + id + '"]'); }
+    function build(html, id) {
+        var div = document.createElement('div');
+        div.className = 'md-block';
+        div.setAttribute('data-block', id);
+        div.innerHTML = html;
+        return div;
+    }
+    var inserted = [];
+    patches.forEach(function(p) {
+        if (p.op === 'remove') {
+            var old = find(p.id);
+            if (old) old.parentNode.removeChild(old);
+        } else if (p.op === 'replace') {
+            var target = find(p.id);
+            if (target) {
+                target.innerHTML = p.html;
+                inserted.push(target);
+            }
+        } else if (p.op === 'insert') {
+            var node = build(p.html, p.id);
+            var before = p.before ? find(p.before) : null;
+            root.insertBefore(node, before);
+            inserted.push(node);
+        }
+    });
+    if (window.ladRenderMermaid) {
+        inserted.forEach(function(node) { window.ladRenderMermaid(node); });
+    } else if (typeof mermaid !== 'undefined') {
+        inserted.forEach(function(node) {
+            var diagrams = node.querySelectorAll('.mermaid');
+            if (diagrams.length) {
+                try { mermaid.init(undefined, diagrams); } catch (e) { console.error(e); }
+            }
+        });
+    }
+};
+</script>
+'''
+
+
+class IncrementalRenderer:
+    """
+    按块增量渲染Markdown。
+
+    每个块以其源码的哈希为键缓存渲染结果和目录项；update() 比较新旧块序列，
+    只渲染新增或修改的块，并返回补丁列表：
+        {'op': 'insert', 'id': 块ID, 'before': 后继块ID或None, 'html': HTML}
+        {'op': 'replace', 'id': 块ID, 'html': HTML}
+        {'op': 'remove', 'id': 块ID}
+    未变化的块保留原有ID，WebView中对应的DOM节点不会被触碰。
+    补丁需按返回顺序依次应用。
+
+    注意：块是独立渲染的，跨块的链接引用定义（[id]: url）不会生效。
+    """
+
+    def __init__(self, processor=None):
+        self.processor = processor or get_default_processor()
+        self._rendered = {}
+        self._blocks = []
+        self._next_id = 0
+
+    def _new_id(self):
+        self._next_id += 1
+        return f"b{self._next_id}"
+
+    def _render_block(self, digest, text):
+        rendered = self._rendered.get(digest)
+        if rendered is None:
+            # 只有文档第一个块可能是YAML front matter，键中以前缀区分
+            result = self.processor.render(text, front_matter=digest[0] == 'F')
+            rendered = (result.html, result.toc)
+            self._rendered[digest] = rendered
+        return rendered
+
+    def update(self, new_text):
+        """用新的文档内容更新渲染状态，返回需要应用到页面的补丁列表。"""
+        return self._update_blocks(split_blocks(new_text))
+
+    def update_file(self, path):
+        """从文件（内存映射逐行读取）更新渲染状态，返回补丁列表。"""
+        return self._update_blocks(list(iter_blocks(iter_file_lines(path))))
+
+    def _update_blocks(self, texts):
+        digests = [('F' if index == 0 else 'B')
+                   + hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest()
+                   for index, text in enumerate(texts)]
+        old_blocks = self._blocks
+        # 编辑通常集中在一处：先跳过首尾相同的块，只处理中间变化的区间（线性时间）
+        limit = min(len(old_blocks), len(digests))
+        head = 0
+        while head < limit and old_blocks[head][1] == digests[head]:
+            head += 1
+        tail = 0
+        while (tail < limit - head
+               and old_blocks[len(old_blocks) - 1 - tail][1] == digests[len(digests) - 1 - tail]):
+            tail += 1
+        old_middle = old_blocks[head:len(old_blocks) - tail]
+        new_blocks = list(old_blocks[:head])
+        patches = []
+        for k, j in enumerate(range(head, len(digests) - tail)):
+            html_body = self._render_block(digests[j], texts[j])[0]
+            if k < len(old_middle):
+                # 原位修改的块复用ID，直接替换内容
+                block_id = old_middle[k][0]
+                new_blocks.append((block_id, digests[j]))
+                if old_middle[k][1] != digests[j]:
+                    patches.append({'op': 'replace', 'id': block_id, 'html': html_body})
+            else:
+                block_id = self._new_id()
+                new_blocks.append((block_id, digests[j]))
+                patches.append({'op': 'insert', 'id': block_id, 'before': None,
+                                'html': html_body})
+        for block_id, _ in old_middle[len(digests) - tail - head:]:
+            patches.append({'op': 'remove', 'id': block_id})
+        new_blocks.extend(old_blocks[len(old_blocks) - tail:])
+        # 插入位置在所有块确定后再计算：指向新序列中的下一个块。
+        # 插入补丁按从后往前的顺序排列，保证应用时 before 指向的节点已经存在
+        positions = {block_id: index for index, (block_id, _) in enumerate(new_blocks)}
+        inserts = [patch for patch in patches if patch['op'] == 'insert']
+        for patch in inserts:
+            index = positions[patch['id']] + 1
+            patch['before'] = new_blocks[index][0] if index < len(new_blocks) else None
+        patches = [patch for patch in patches if patch['op'] != 'insert']
+        patches.extend(reversed(inserts))
+        self._blocks = new_blocks
+        # 只保留当前文档用得到的块，避免长时间编辑后缓存无限增长
+        live = set(digests)
+        self._rendered = {d: r for d, r in self._rendered.items() if d in live}
+        return patches
+
+    @property
+    def toc_items(self):
+        """当前文档的目录项，由各块的目录项按顺序拼接而成。"""
+        items = []
+        for _, digest in self._blocks:
+            items.extend(self._rendered[digest][1])
+        return items
+
+    def html(self):
+        """返回当前文档的完整HTML，每个块包裹在带 data-block 属性的div中。"""
+        parts = []
+        for block_id, digest in self._blocks:
+            parts.append(f'<div class="md-block" data-block="{block_id}">'
+                         f'{self._rendered[digest][0]}</div>\n')
+        return '<div id="lad-md-root">\n' + ''.join(parts) + '</div>\n'
+
+
+def patches_to_js(patches):
+    """将补丁列表转换为可通过 QWebEnginePage.runJavaScript 执行的脚本。"""
+    return f"window.ladApplyPatches({json.dumps(patches, ensure_ascii=False)});"
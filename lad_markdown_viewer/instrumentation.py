@@ -0,0 +1,266 @@
+"""
+渲染性能统计模块
+
+MarkdownProcessor.render 按阶段计时，每次渲染结束后把一个 RenderTimer 交给观察者：
+- front_matter   YAML front matter 的识别和解析
+- parse          mistune解析和HTML输出（Mermaid图表在解析过程中直接输出，不再单独提取和恢复）
+- unescape       兼容模式下对全文执行 html.unescape
+- mermaid_svg    内联服务端预渲染的Mermaid SVG
+- metadata_table 生成“文档元信息”表格
+
+没有观察者时不读取时钟、不计算字节数，渲染流程只多一次判断。
+
+    with collect_render_stats() as stats:
+        render_markdown_to_html(md_text)
+    print(stats.report())
+
+全局观察者（add_render_observer）接收所有线程的渲染；add_render_collector 只接收当前线程的渲染，
+Web 查看器在处理每个请求期间以此把 RenderMetrics 挂在请求线程上，多个应用实例互不干扰，
+按阶段保留最近的样本，以Prometheus文本格式导出 p50/p99。
+每次渲染带有类别 kind：页面渲染为 'page'，链接检查和搜索索引等内部渲染使用各自的类别，
+RenderMetrics 可以只统计指定的类别。
+流式渲染（iter_render，以及超过 WHOLE_DOCUMENT_LIMIT 的文件）的每个分片各计一次渲染。
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+STAGES = ('front_matter', 'parse', 'unescape', 'mermaid_svg', 'metadata_table')
+# Prometheus导出的分位数
+QUANTILES = (0.5, 0.9, 0.99)
+DEFAULT_WINDOW = 1024
+
+_observers = []
+_local = threading.local()
+
+
+class RenderTimer:
+    """
+    一次渲染的计时结果。
+
+    属性:
+        kind: 渲染类别，如 'page'、'link_graph'、'search_index'
+        stages: {阶段名: 秒数}，只包含实际执行的阶段
+        seconds: 整次渲染的耗时
+        input_bytes / output_bytes: 输入Markdown和输出HTML的UTF-8字节数
+        mermaid_blocks: 渲染的Mermaid图表数量
+    """
+    __slots__ = ('kind', 'stages', 'seconds', 'input_bytes', 'output_bytes', 'mermaid_blocks',
+                 '_start', '_mark', '_observers')
+
+    def __init__(self, md_text, observers, kind='page'):
+        self.kind = kind
+        self.stages = {}
+        self.seconds = 0.0
+        self.input_bytes = len(md_text.encode('utf-8', 'surrogatepass'))
+        self.output_bytes = 0
+        self.mermaid_blocks = 0
+        self._observers = observers
+        self._start = self._mark = time.perf_counter()
+
+    def stage(self, name):
+        """结束一个阶段：从上一个阶段结束（或渲染开始）到现在的耗时计入 name。"""
+        now = time.perf_counter()
+        self.stages[name] = self.stages.get(name, 0.0) + now - self._mark
+        self._mark = now
+
+    def finish(self, result):
+        """渲染完成，记录输出大小并通知观察者；观察者抛出的异常不影响渲染。"""
+        self.seconds = time.perf_counter() - self._start
+        self.output_bytes = len(result.html.encode('utf-8', 'surrogatepass'))
+        self.mermaid_blocks = len(result.mermaid_blocks)
+        for observer in self._observers:
+            try:
+                observer(self)
+            except Exception:
+                pass
+
+    def as_dict(self):
+        return {'kind': self.kind, 'seconds': self.seconds, 'stages': dict(self.stages),
+                'input_bytes': self.input_bytes, 'output_bytes': self.output_bytes,
+                'mermaid_blocks': self.mermaid_blocks}
+
+
+def start_render_timer(md_text, kind='page'):
+    """开始一次渲染的计时；没有观察者时返回 None，渲染流程跳过所有计时。"""
+    collectors = getattr(_local, 'collectors', None)
+    if not _observers and not collectors:
+        return None
+    return RenderTimer(md_text, list(_observers) + (collectors or []), kind)
+
+
+def add_render_observer(callback):
+    """注册全局观察者：每次渲染结束后调用 callback(timer)（在执行渲染的线程中）。"""
+    _observers.append(callback)
+    return callback
+
+
+def remove_render_observer(callback):
+    try:
+        _observers.remove(callback)
+    except ValueError:
+        pass
+
+
+def add_render_collector(callback):
+    """只在当前线程注册观察者，之后本线程中的每次渲染结束后调用 callback(timer)。"""
+    collectors = getattr(_local, 'collectors', None)
+    if collectors is None:
+        collectors = _local.collectors = []
+    collectors.append(callback)
+    return callback
+
+
+def remove_render_collector(callback):
+    try:
+        _local.collectors.remove(callback)
+    except (AttributeError, ValueError):
+        pass
+
+
+class RenderStats:
+    """
+    多次渲染的累计统计，可直接作为观察者使用。
+
+    属性:
+        renders: 渲染次数
+        seconds: 累计耗时
+        stage_seconds: {阶段名: 累计秒数}
+        input_bytes / output_bytes / mermaid_blocks: 累计值
+        last: 最近一次渲染的 RenderTimer
+    """
+
+    def __init__(self):
+        self.renders = 0
+        self.seconds = 0.0
+        self.stage_seconds = {}
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.mermaid_blocks = 0
+        self.last = None
+
+    def __call__(self, timer):
+        self.observe(timer)
+
+    def observe(self, timer):
+        self.renders += 1
+        self.seconds += timer.seconds
+        for name, seconds in timer.stages.items():
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+        self.input_bytes += timer.input_bytes
+        self.output_bytes += timer.output_bytes
+        self.mermaid_blocks += timer.mermaid_blocks
+        self.last = timer
+
+    def as_dict(self):
+        return {'renders': self.renders, 'seconds': self.seconds,
+                'stage_seconds': dict(self.stage_seconds), 'input_bytes': self.input_bytes,
+                'output_bytes': self.output_bytes, 'mermaid_blocks': self.mermaid_blocks}
+
+    def report(self):
+        """各阶段耗时及占比的文本表格。"""
+        lines = [f"{'阶段':<16}{'耗时(ms)':>12}{'占比':>8}"]
+        total = self.seconds or 1e-12
+        for name in STAGES:
+            if name in self.stage_seconds:
+                seconds = self.stage_seconds[name]
+                lines.append(f"{name:<16}{seconds * 1000:>12.2f}{seconds / total:>8.1%}")
+        lines.append(f"{'total':<16}{self.seconds * 1000:>12.2f}{'':>8}")
+        lines.append(f"{self.renders} 次渲染，输入 {self.input_bytes / 1024:.1f} KB，"
+                     f"输出 {self.output_bytes / 1024:.1f} KB，Mermaid图表 {self.mermaid_blocks} 个")
+        return '\n'.join(lines)
+
+
+@contextmanager
+def collect_render_stats(stats=None, all_threads=False):
+    """
+    在 with 块中收集渲染统计，返回 RenderStats（也可传入已有实例继续累计）。
+
+    默认只统计当前线程中的渲染，并发的其他请求不会混入；all_threads=True 时
+    注册为全局观察者，统计所有线程。
+    """
+    stats = RenderStats() if stats is None else stats
+    if all_threads:
+        add_render_observer(stats)
+        try:
+            yield stats
+        finally:
+            remove_render_observer(stats)
+        return
+    add_render_collector(stats)
+    try:
+        yield stats
+    finally:
+        remove_render_collector(stats)
+
+
+def _quantile(sorted_samples, q):
+    # 最近秩法：第 ceil(q*n) 个样本
+    return sorted_samples[max(0, math.ceil(q * len(sorted_samples)) - 1)]
+
+
+class RenderMetrics(RenderStats):
+    """
+    线程安全的渲染指标：在 RenderStats 的累计值之外，按阶段保留最近 window 次的耗时样本，
+    用于计算分位数。可以同时在多个线程中作为观察者使用。
+
+    kinds 为渲染类别的集合时只统计这些类别（例如 Web 查看器只统计 'page'），
+    链接检查、搜索索引等内部渲染不会混入页面渲染的分位数。
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, kinds=None):
+        super().__init__()
+        self.window = window
+        self.kinds = frozenset(kinds) if kinds is not None else None
+        self._samples = {}
+        self._stage_counts = {}
+        self._lock = threading.Lock()
+
+    def observe(self, timer):
+        if self.kinds is not None and timer.kind not in self.kinds:
+            return
+        with self._lock:
+            super().observe(timer)
+            for name, seconds in list(timer.stages.items()) + [('total', timer.seconds)]:
+                samples = self._samples.get(name)
+                if samples is None:
+                    samples = self._samples[name] = deque(maxlen=self.window)
+                samples.append(seconds)
+                self._stage_counts[name] = self._stage_counts.get(name, 0) + 1
+
+    def quantiles(self, name, quantiles=QUANTILES):
+        """阶段 name（或 'total'）最近样本的分位数 {q: 秒数}，没有样本时返回空字典。"""
+        with self._lock:
+            samples = sorted(self._samples.get(name, ()))
+        if not samples:
+            return {}
+        return {q: _quantile(samples, q) for q in quantiles}
+
+    def prometheus_text(self, prefix='lad_render'):
+        """以Prometheus文本格式（0.0.4）导出：各阶段耗时的 summary 以及字节数等计数器。"""
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+            counts = dict(self._stage_counts)
+            stage_seconds = dict(self.stage_seconds)
+            stage_seconds['total'] = self.seconds
+            totals = (('renders', '渲染次数', self.renders),
+                      ('input_bytes', '输入Markdown的字节数', self.input_bytes),
+                      ('output_bytes', '输出HTML的字节数', self.output_bytes),
+                      ('mermaid_blocks', '渲染的Mermaid图表数', self.mermaid_blocks))
+        lines = [f'# HELP {prefix}_stage_seconds 各渲染阶段的耗时（分位数基于最近 {self.window} 次）',
+                 f'# TYPE {prefix}_stage_seconds summary']
+        for name in [stage for stage in STAGES if stage in samples] + ['total']:
+            if name not in samples:
+                continue
+            for q in QUANTILES:
+                lines.append(f'{prefix}_stage_seconds{{stage="{name}",quantile="{q}"}} '
+                             f'{_quantile(samples[name], q):.9f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {stage_seconds[name]:.9f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {counts[name]}')
+        for name, help_text, value in totals:
+            lines.append(f'# HELP {prefix}_{name}_total {help_text}')
+            lines.append(f'# TYPE {prefix}_{name}_total counter')
+            lines.append(f'{prefix}_{name}_total {value}')
+        return '\n'.join(lines) + '\n'
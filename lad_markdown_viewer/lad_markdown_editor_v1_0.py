@@ -10,7 +10,9 @@ from tkhtmlview import HTMLLabel
 import os
 import re
 import datetime
-import shutil
+
+from .document_buffer import DocumentBuffer, split_lines
+from .section_index import SectionIndex
 
 # 预设 LAD 段落模板
 default_templates = {
@@ -26,8 +28,8 @@ class MarkdownEditorApp:
         self.force_timestamp = tk.BooleanVar(value=True)
 
         self.current_file = None
-        self.paragraphs = []
-        self.original_content = ""
+        self.buffer = DocumentBuffer()
+        self.index = SectionIndex()
 
         self.create_widgets()
 
@@ -67,33 +69,30 @@ class MarkdownEditorApp:
         if not path:
             return
         self.current_file = path
-        with open(path, "r", encoding="utf-8") as f:
-            self.original_content = f.read()
+        self.buffer.close()
+        self.buffer = DocumentBuffer.open(path)
+        self.index = SectionIndex(self.buffer)
         self.extract_paragraphs()
         messagebox.showinfo("提示", f"成功加载文件：{os.path.basename(path)}")
 
     def extract_paragraphs(self):
-        self.paragraphs.clear()
+        # 段落标题由段落索引维护，这里只刷新列表
         self.paragraph_selector.delete(0, tk.END)
-        pattern = r"(?m)^(#{1,3})\s*(.+?)\s*$"
-        self.paragraph_map = {}
-        for match in re.finditer(pattern, self.original_content):
-            header = match.group(0)
-            title = match.group(2)
-            self.paragraphs.append((title, match.start(), match.end()))
-            self.paragraph_selector.insert(tk.END, title)
-            self.paragraph_map[title] = match.start()
+        self.paragraph_selector.insert(tk.END, *self.index.titles)
+
+    def selected_paragraph(self):
+        """列表中当前选中段落的序号，没有时返回 -1。"""
+        selection = self.paragraph_selector.curselection()
+        idx = selection[0] if selection else self.paragraph_selector.index(tk.ACTIVE)
+        return idx if 0 <= idx < len(self.index) else -1
 
     def display_paragraph(self, event):
-        selection = self.paragraph_selector.get(tk.ACTIVE)
-        start = self.paragraph_map.get(selection)
-        if start is None:
+        idx = self.selected_paragraph()
+        if idx == -1:
             return
 
-        next_titles = [p[1] for p in self.paragraphs if p[1] > start]
-        end = min(next_titles) if next_titles else len(self.original_content)
-
-        segment = self.original_content[start:end].strip()
+        start, end = self.index.section_range(idx)
+        segment = "".join(self.buffer[start:end]).strip()
         self.editor.delete("1.0", tk.END)
         self.editor.insert("1.0", segment)
         self.preview.set_html(self.md_to_html(segment))
@@ -108,13 +107,10 @@ class MarkdownEditorApp:
     def save_changes(self):
         if not self.current_file:
             return
-        selected = self.paragraph_selector.get(tk.ACTIVE)
-        if selected not in self.paragraph_map:
+        idx = self.selected_paragraph()
+        if idx == -1:
             return
-
-        # 备份原文件
-        bak_file = self.current_file.replace(".md", ".bak.md")
-        shutil.copyfile(self.current_file, bak_file)
+        selected = self.index.titles[idx]
 
         # 获取修改内容
         edited = self.editor.get("1.0", tk.END).strip()
@@ -122,45 +118,32 @@ class MarkdownEditorApp:
             timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             edited += f"\n\n<!-- 编辑时间：{timestamp} -->"
 
-        lines = self.original_content.splitlines()
-        pattern = re.compile(rf"(?m)^#+\s*{re.escape(selected)}\s*$")
-        found = False
-        for i, line in enumerate(lines):
-            if pattern.match(line):
-                found = True
-                start = i
-                break
-        if not found:
-            messagebox.showerror("错误", "段落起始行未找到")
-            return
-
-        # 查找段落结束
-        end = len(lines)
-        for j in range(start + 1, len(lines)):
-            if re.match(r"^#+\s", lines[j]):
-                end = j
-                break
-
-        # 替换段落内容
-        edited_lines = edited.splitlines()
-        lines[start:end] = edited_lines
-        self.original_content = "\n".join(lines)
+        # 替换段落内容，段落索引只更新被替换的区间
+        start, end = self.index.section_range(idx)
+        edited_lines = split_lines(edited + "\n")
+        self.buffer.replace(start, end, edited_lines)
+        self.index.apply_edit(start, end, edited_lines, self.buffer)
 
         # 追加至编辑日志
         self.append_edit_log(selected)
 
-        # 保存
-        with open(self.current_file, "w", encoding="utf-8") as f:
-            f.write(self.original_content)
+        # 原子保存；备份为 .bak.delta 中的增量记录，不再复制整个文件
+        self.buffer.save()
 
         messagebox.showinfo("成功", "修改已保存并记录日志")
+        self.extract_paragraphs()
+
+    def append_text(self, text):
+        """在文档末尾追加文本（与最后一行拼接），并增量更新段落索引。"""
+        start, old_lines, new_lines = self.buffer.append_text(text)
+        self.index.apply_edit(start, start + len(old_lines), new_lines, self.buffer)
 
     def append_edit_log(self, title):
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log = f"- {timestamp} 修改段落：{title}"
-        if "## 编辑日志" not in self.original_content:
-            self.original_content += "\n\n## 编辑日志\n"
-        self.original_content += f"\n{log}"
+        if self.index.find("编辑日志", level=2) == -1:
+            self.append_text("\n\n## 编辑日志\n")
+        self.append_text(f"\n{log}")
 
     def insert_template(self):
         template_name = tk.simpledialog.askstring("模板名", "请输入段落模板名：平台概述/合作机制")
@@ -173,9 +156,8 @@ class MarkdownEditorApp:
         if self.force_timestamp.get():
             timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             content += f"\n\n<!-- 编辑时间：{timestamp} -->"
-        self.original_content += f"\n\n{content}"
-        with open(self.current_file, "w", encoding="utf-8") as f:
-            f.write(self.original_content)
+        self.append_text(f"\n\n{content}")
+        self.buffer.save()
         messagebox.showinfo("成功", f"已追加模板段落：{template_name}")
         self.extract_paragraphs()
 
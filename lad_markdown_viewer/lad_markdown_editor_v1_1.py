@@ -11,10 +11,11 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from tkhtmlview import HTMLLabel
 from datetime import datetime
-import re
 import shutil
 
-history_stack = []  # 用于撤销操作的历史记录
+from .document_buffer import DocumentBuffer, split_lines
+from .section_index import SectionIndex
+from .undo_history import JOURNAL_SUFFIX, UndoHistory
 
 class MarkdownEditor:
     def __init__(self, root):
@@ -46,6 +47,7 @@ class MarkdownEditor:
         button_frame.pack(fill='x')
         tk.Button(button_frame, text="保存修改", command=self.save_changes).pack(side='left')
         tk.Button(button_frame, text="撤销修改", command=self.undo_last_change).pack(side='left')
+        tk.Button(button_frame, text="重做修改", command=self.redo_last_change).pack(side='left')
         tk.Button(button_frame, text="插入锚点", command=self.insert_anchor).pack(side='left')
 
         # 模板段插入
@@ -68,26 +70,27 @@ class MarkdownEditor:
     def load_file(self):
         if not self.filename:
             return
-        with open(self.filename, 'r', encoding='utf-8') as f:
-            self.lines = f.readlines()
+        if getattr(self, 'buffer', None) is not None:
+            self.buffer.close()
+        self.buffer = DocumentBuffer.open(self.filename)
+        self.index = SectionIndex(self.buffer)
+        # 每个文档独立的撤销历史，日志文件保证崩溃后仍可撤销
+        self.history = UndoHistory.open(self.filename + JOURNAL_SUFFIX, len(self.buffer))
         self.update_section_list()
 
     def update_section_list(self):
-        self.sections = []
-        self.section_indices = []
-        for i, line in enumerate(self.lines):
-            if re.match(r'^(#{1,3})\s+[^#\s]', line):
-                self.sections.append(line.strip())
-                self.section_indices.append(i)
+        # 标题列表由段落索引维护，打开下拉框时不再逐行扫描
+        if not self.filename:
+            return
+        self.sections = self.index.headings()
         self.section_selector['values'] = self.sections
 
     def display_section(self, event=None):
         idx = self.section_selector.current()
         if idx == -1:
             return
-        start = self.section_indices[idx]
-        end = self.section_indices[idx + 1] if idx + 1 < len(self.section_indices) else len(self.lines)
-        section_text = ''.join(self.lines[start:end])
+        start, end = self.index.section_range(idx)
+        section_text = ''.join(self.buffer[start:end])
         self.current_section_range = (start, end)
         self.editor.delete('1.0', 'end')
         self.editor.insert('1.0', section_text)
@@ -102,33 +105,56 @@ class MarkdownEditor:
             return
         new_content = self.editor.get("1.0", "end").strip() + "\n"
         start, end = self.current_section_range
-        history_stack.append((start, end, self.lines[start:end]))  # 保存原文用于撤销
-
-        self.lines[start:end] = [line + "\n" for line in new_content.splitlines()]
-        self.append_edit_log(self.sections[self.section_selector.current()])
-        with open(self.filename + ".bak.md", 'w', encoding='utf-8') as f:
-            f.writelines(self.lines)
-        with open(self.filename, 'w', encoding='utf-8') as f:
-            f.writelines(self.lines)
+        # 段落修改与编辑日志作为一条历史记录，一次撤销
+        with self.history.group():
+            self.replace_lines(start, end, split_lines(new_content))
+            self.append_edit_log(self.sections[self.section_selector.current()])
+        # 原子写回；备份为 .bak.delta 中的增量记录，不再写整篇 .bak.md 副本
+        self.save_buffer()
         messagebox.showinfo("保存成功", "段落修改已保存")
 
     def undo_last_change(self):
-        if history_stack:
-            start, end, original_lines = history_stack.pop()
-            self.lines[start:end] = original_lines
-            with open(self.filename, 'w', encoding='utf-8') as f:
-                f.writelines(self.lines)
-            messagebox.showinfo("撤销成功", "已恢复至上一次保存前状态")
-        else:
+        applied = self.history.undo(self.buffer) if self.filename else None
+        if applied is None:
             messagebox.showwarning("无操作", "无可撤销内容")
+            return
+        for start, end, lines in applied:
+            self.index.apply_edit(start, end, lines, self.buffer)
+        self.save_buffer()
+        messagebox.showinfo("撤销成功", "已恢复至上一次保存前状态")
+
+    def redo_last_change(self):
+        applied = self.history.redo(self.buffer) if self.filename else None
+        if applied is None:
+            messagebox.showwarning("无操作", "无可重做内容")
+            return
+        for start, end, lines in applied:
+            self.index.apply_edit(start, end, lines, self.buffer)
+        self.save_buffer()
+        messagebox.showinfo("重做成功", "已重新应用撤销的修改")
+
+    def replace_lines(self, start, end, new_lines):
+        """替换 [start, end) 行，同步更新段落索引并记录撤销历史。"""
+        original_lines = self.buffer.replace(start, end, new_lines)
+        self.index.apply_edit(start, end, new_lines, self.buffer)
+        self.history.record(start, original_lines, new_lines, len(self.buffer))
+
+    def append_text(self, text):
+        """在文档末尾追加文本（与最后一行拼接），同步更新段落索引并记录撤销历史。"""
+        start, original_lines, new_lines = self.buffer.append_text(text)
+        self.index.apply_edit(start, start + len(original_lines), new_lines, self.buffer)
+        self.history.record(start, original_lines, new_lines, len(self.buffer))
 
     def append_edit_log(self, section_title):
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         log = f"\n### [{timestamp}] 修改段落：{section_title}\n"
-        for i, line in enumerate(self.lines):
-            if line.strip() == '## 编辑日志':
-                self.lines.insert(i + 1, log)
-                break
+        idx = self.index.find('编辑日志', level=2)
+        if idx != -1:
+            i = self.index.starts[idx]
+            self.replace_lines(i + 1, i + 1, split_lines(log))
+
+    def save_buffer(self):
+        self.buffer.save()
 
     def insert_template_section(self):
         tpl_name = self.template_dropdown.get()
@@ -138,9 +164,9 @@ class MarkdownEditor:
                 tpl_content = f.read()
             if self.force_timestamp.get():
                 tpl_content += f"\n<!-- inserted at {datetime.now()} -->\n"
-            self.lines.append('\n' + tpl_content)
-            with open(self.filename, 'w', encoding='utf-8') as f:
-                f.writelines(self.lines)
+            # 与最后一行拼接：原文末行没有换行符时，缓冲区、段落索引和撤销记录的行号与保存后的文件一致
+            self.append_text('\n' + tpl_content)
+            self.save_buffer()
             messagebox.showinfo("模板追加", f"已插入模板段落：{tpl_name}")
 
     def insert_anchor(self):
@@ -11,20 +11,21 @@ LAD Markdown Viewer Desktop Application
 版本: 1.2.0
 """
 
+import argparse
 import sys
+from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtWidgets import QMainWindow, QVBoxLayout, QWidget, QApplication
 from PyQt5.QtWebEngineWidgets import QWebEngineView
 import mistune
 from mistune.plugins.formatting import strikethrough
 from mistune.plugins.table import table
 from mistune.plugins.task_lists import task_lists
-import html as html_module
-import re
-import unicodedata
 
 # ----------------- 重构部分开始 -----------------
-# 从同在包内的核心模块导入渲染函数
-from .markdown_processor import render_markdown_to_html
+# 从同在包内的核心模块导入增量渲染、静态资源和文件监视
+from .incremental import IncrementalRenderer, PATCH_SCRIPT, patches_to_js
+from .assets import DEFAULT_PREFETCH_MARGIN, desktop_base_url, mermaid_runtime_tags, vendor_tags
+from .file_watcher import FileWatcher
 # ----------------- 重构部分结束 -----------------
 
 # ----------------- 新增/修改部分开始 -----------------
@@ -56,71 +57,30 @@ class TocRenderer(mistune.HTMLRenderer):
 
 # ----------------- 新增/修改部分结束 -----------------
 
-try:
-    from markdown_utils import extract_mermaid_blocks, restore_mermaid_blocks
-except ImportError:
-    def extract_mermaid_blocks(md_text):
-        return md_text, []
-    
-    def restore_mermaid_blocks(html, mermaid_blocks):
-        return html
-
-def process_yaml_front_matter(md_text):
-    """处理YAML front matter，将其转换为表格格式。"""
-    yaml_pattern = r'^---\s*\n(.*?)\n---\s*\n'
-    match = re.search(yaml_pattern, md_text, re.DOTALL)
-    if match:
-        yaml_content = match.group(1)
-        md_text = re.sub(yaml_pattern, '', md_text, count=1, flags=re.DOTALL)
-        table_rows = []
-        for line in yaml_content.strip().split('\n'):
-            if ':' in line:
-                key, value = line.split(':', 1)
-                key = key.strip()
-                value = value.strip()
-                table_rows.append(f"| {key} | {value} |")
-        if table_rows:
-            table_html = "## 文档元信息\n\n| 字段 | 值 |\n|------|----|\n"
-            table_html += '\n'.join(table_rows)
-            table_html += '\n\n'
-            md_text = table_html + md_text
-    return md_text
-
 class LadMark(QMainWindow):
-    def __init__(self, md_path):
+    # 监视线程发现文件变化时发出，经Qt的队列连接在界面线程中重新渲染
+    file_changed = pyqtSignal()
+
+    def __init__(self, md_path, mermaid_prefetch_margin=DEFAULT_PREFETCH_MARGIN, watch=False):
         super().__init__()
         self.setWindowTitle("LadMark Markdown 预览")
         self.resize(900, 700)
 
-        with open(md_path, 'r', encoding='utf-8') as f:
-            md_text = f.read()
-
         # ----------------- 重构部分 -----------------
-        # 只需一行代码即可完成所有Markdown处理
-        html_body = render_markdown_to_html(md_text)
+        # 使用增量渲染器，后续内容更新只重新渲染变化的块；文件经内存映射按需读取
+        self.md_path = md_path
+        self.renderer = IncrementalRenderer()
+        self.renderer.update_file(md_path)
+        html_body = self.renderer.html()
         # ----------------- 重构结束 -----------------
 
         html = f"""
         <html>
         <head>
             <meta charset="utf-8">
-            <script src="https://cdn.jsdelivr.net/npm/mermaid@9.4.3/dist/mermaid.min.js"></script>
-            <script>
-                document.addEventListener('DOMContentLoaded', function() {{
-                    try {{
-                        if (typeof mermaid !== 'undefined') {{
-                            mermaid.initialize({{
-                                startOnLoad: true,
-                                theme: 'default',
-                                securityLevel: 'loose',
-                                flowchart: {{ htmlLabels: true, useMaxWidth: true }},
-                            }});
-                        }}
-                    }} catch(e) {{
-                        console.error('Mermaid initialization error:', e);
-                    }}
-                }});
-            </script>
+            {vendor_tags()}
+            {mermaid_runtime_tags(prefetch_margin=mermaid_prefetch_margin)}
+            {PATCH_SCRIPT}
             <style>
                 body {{ font-family: '微软雅黑', Arial, sans-serif; margin: 30px; line-height: 1.6; }}
                 table {{ border-collapse: collapse; width: 100%; margin: 16px 0; }}
@@ -138,8 +98,65 @@ class LadMark(QMainWindow):
         """
 
         self.browser = QWebEngineView()
-        self.browser.setHtml(html)
+        # 以静态资源目录为基准地址，页面可以直接加载本地的Mermaid，无需等待CDN
+        self.browser.setHtml(html, desktop_base_url())
         central_widget = QWidget()
         layout = QVBoxLayout(central_widget)
         layout.addWidget(self.browser)
-        self.setCentralWidget(central_widget) 
\ No newline at end of file
+        self.setCentralWidget(central_widget)
+
+        # 监视模式：文件保存后只重新渲染变化的块并以补丁更新页面，滚动位置保持不变
+        self.watch = watch
+        self.watcher = None
+        if watch:
+            self.file_changed.connect(self.reload_file)
+            self._watch(md_path)
+
+    def set_markdown_content(self, content):
+        """更新显示的Markdown内容，只重新渲染并替换发生变化的块。"""
+        self._apply_patches(self.renderer.update(content))
+
+    def load_markdown_file(self, file_path):
+        """加载并显示Markdown文件，只重新渲染与当前内容相比发生变化的块。"""
+        self.md_path = file_path
+        if self.watch:
+            self._watch(file_path)
+        self._apply_patches(self.renderer.update_file(file_path))
+
+    def reload_file(self):
+        """重新读取当前文件并更新页面。"""
+        self._apply_patches(self.renderer.update_file(self.md_path))
+
+    def _watch(self, path):
+        # 打开其他文件时停止监视旧文件，改为监视新文件
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.watcher = FileWatcher(path, lambda changed: self.file_changed.emit()).start()
+
+    def _apply_patches(self, patches):
+        if patches:
+            self.browser.page().runJavaScript(patches_to_js(patches))
+
+    def closeEvent(self, event):
+        if self.watcher is not None:
+            self.watcher.stop()
+        super().closeEvent(event)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='lad-markdown-viewer', description='LAD Markdown 桌面查看器')
+    parser.add_argument('file', help='要打开的Markdown文件')
+    parser.add_argument('--watch', action='store_true',
+                        help='监视文件，保存后自动更新（安装watchdog时使用系统文件通知）')
+    parser.add_argument('--mermaid-prefetch', default=DEFAULT_PREFETCH_MARGIN,
+                        help=f'Mermaid图表距视口多远时开始渲染（默认 {DEFAULT_PREFETCH_MARGIN}）')
+    args = parser.parse_args(argv)
+
+    app = QApplication(sys.argv[:1])
+    viewer = LadMark(args.file, mermaid_prefetch_margin=args.mermaid_prefetch, watch=args.watch)
+    viewer.show()
+    return app.exec_()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,368 @@
+"""
+文档链接图模块
+
+LinkGraph 记录文档目录树中文档之间、文档到锚点的引用关系：
+- 每个文档只解析一次：锚点取自 TocRenderer 生成的标题ID（与页面中的 id 完全一致）
+  以及原始HTML中的 id/name 属性，链接取自渲染结果中的 <a href>，代码块中的链接不计入；
+- 链接在解析时就相对所在文档解析为目标路径，之后的检查和反向链接查询只是字典查找；
+- 按 mtime/size 和内容哈希增量更新，结果以zlib压缩的JSON原子保存，渲染器版本变化时自动重建；
+- 大量文件需要解析时使用进程池并行处理。
+
+    lad-markdown-check-links DOCS_DIR [-j N] [--cache 缓存文件] [--json]
+"""
+import argparse
+import hashlib
+import html as html_module
+import json
+import os
+import posixpath
+import re
+import sys
+import time
+import zlib
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote
+
+from .batch_render import iter_markdown_files
+from .file_utils import write_atomic
+
+GRAPH_FORMAT = 1
+CACHE_NAME = '.lad-link-graph'
+# 待解析的文件少于该数量时不启动进程池
+PARALLEL_THRESHOLD = 64
+
+HREF_RE = re.compile(r'<a\s[^>]*?\bhref="([^"]*)"', re.IGNORECASE)
+ID_ATTR_RE = re.compile(r'<[a-z][^>]*?\s(?:id|name)="([^"]*)"', re.IGNORECASE)
+SCHEME_RE = re.compile(r'^[a-z][a-z0-9+.-]*:', re.IGNORECASE)
+
+# 链接类型：文档内或文档间的 .md 链接、其他本地文件、指向文档目录之外的路径
+DOC = 'doc'
+FILE = 'file'
+OUTSIDE = 'outside'
+
+_processor = None
+
+
+def _get_processor():
+    # 不使用默认实例：链接检查不需要Mermaid预渲染等与链接无关的设置，
+    # 其渲染在统计中单独归类，不计入页面渲染
+    global _processor
+    if _processor is None:
+        from .markdown_processor import MarkdownProcessor
+        _processor = MarkdownProcessor(render_kind='link_graph')
+    return _processor
+
+
+def graph_signature():
+    """渲染器版本和配置，决定标题ID的生成方式，变化时缓存失效。"""
+    from . import __version__
+    return [__version__, GRAPH_FORMAT] + list(_get_processor().cache_signature)
+
+
+def resolve_link(rel_path, href):
+    """
+    把文档 rel_path 中的 href 解析为 (类型, 目标路径, 锚点)。
+
+    外部链接（http:、mailto: 等）和空链接返回 None；目标路径相对于文档根目录，
+    以 / 开头的链接从根目录开始解析。
+    """
+    href = html_module.unescape(href).strip()
+    if not href or href.startswith('//') or SCHEME_RE.match(href):
+        return None
+    path, _, anchor = href.partition('#')
+    path = unquote(path.partition('?')[0])
+    anchor = unquote(anchor)
+    if not path:
+        return DOC, rel_path, anchor
+    if path.startswith('/'):
+        target = posixpath.normpath(path.lstrip('/'))
+    else:
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(rel_path), path))
+    if target == '..' or target.startswith('../'):
+        return OUTSIDE, target, anchor
+    if target == '.':
+        target = ''
+    return (DOC if target.endswith('.md') else FILE), target, anchor
+
+
+def extract_links(rel_path, text):
+    """
+    解析一个文档，返回 (锚点列表, 链接列表)。
+
+    链接为 [行号, href, 类型, 目标路径, 锚点]；行号按 href 在源文本中（从上一个链接之后）
+    出现的位置估算，找不到时为 0。
+    """
+    result = _get_processor().render(text)
+    anchors = {slug for _, slug, _ in result.toc}
+    anchors.update(html_module.unescape(value) for value in ID_ATTR_RE.findall(result.html))
+    line_starts = None
+    links = []
+    position = 0
+    for href in HREF_RE.findall(result.html):
+        resolved = resolve_link(rel_path, href)
+        if resolved is None:
+            continue
+        # 渲染时空格等字符会被百分号编码，报告时还原为源文件中的写法
+        raw = unquote(html_module.unescape(href))
+        found = text.find(raw, position)
+        if found < 0:
+            found = text.find(raw)
+        line = 0
+        if found >= 0:
+            if line_starts is None:
+                line_starts = [0] + [match.end() for match in re.finditer('\n', text)]
+            line = bisect_right(line_starts, found)
+            position = found + len(raw)
+        links.append([line, raw, *resolved])
+    return sorted(anchors), links
+
+
+def parse_file(root_dir, rel_path, known_digest=None):
+    """
+    解析单个文件（可在工作进程中执行），返回 ((内容哈希, 锚点, 链接), 错误信息)。
+
+    内容哈希与 known_digest 相同时不再解析，锚点和链接为 None。
+    """
+    try:
+        with open(os.path.join(root_dir, rel_path), 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest == known_digest:
+            return (digest, None, None), None
+        anchors, links = extract_links(rel_path, data.decode('utf-8-sig', 'replace'))
+        return (digest, anchors, links), None
+    except Exception as e:
+        return None, str(e)
+
+
+class LinkGraph:
+    """
+    文档目录树的链接图。
+
+    参数:
+        root_dir: 文档根目录，图中的路径都相对于该目录（使用 / 分隔）
+        path: 缓存文件路径（可选），指定时 load/save 使用该文件
+
+    每个文档记录 [mtime_ns, size, 内容哈希, 锚点列表, 链接列表]；反向链接表
+    {目标文档: {来源文档, ...}} 在内存中随文档增删维护。
+    """
+
+    def __init__(self, root_dir, path=None):
+        self.root_dir = os.path.realpath(root_dir)
+        self.path = path
+        self.docs = {}
+        self._anchor_sets = {}
+        self._backlinks = {}
+
+    @classmethod
+    def open(cls, root_dir, path):
+        """读取已有的缓存文件；文件不存在、损坏或渲染器版本不同时返回空的链接图。"""
+        graph = cls(root_dir, path)
+        graph.load()
+        return graph
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __contains__(self, rel_path):
+        return rel_path in self.docs
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = json.loads(zlib.decompress(f.read()).decode('utf-8'))
+        except (OSError, ValueError, zlib.error):
+            return False
+        if data.get('signature') != graph_signature():
+            return False
+        for rel_path, doc in data['docs'].items():
+            self._add(rel_path, doc)
+        return True
+
+    def save(self, path=None):
+        path = path or self.path
+        if path is None:
+            raise ValueError("未指定缓存文件路径")
+        data = json.dumps({'signature': graph_signature(), 'docs': self.docs},
+                          ensure_ascii=False, separators=(',', ':'))
+        write_atomic(path, zlib.compress(data.encode('utf-8'), 6))
+
+    def _add(self, rel_path, doc):
+        self.docs[rel_path] = doc
+        for _, _, kind, target, _ in doc[4]:
+            if kind == DOC and target != rel_path:
+                self._backlinks.setdefault(target, set()).add(rel_path)
+
+    def _remove(self, rel_path):
+        doc = self.docs.pop(rel_path)
+        self._anchor_sets.pop(rel_path, None)
+        for _, _, kind, target, _ in doc[4]:
+            sources = self._backlinks.get(target)
+            if kind == DOC and sources is not None:
+                sources.discard(rel_path)
+                if not sources:
+                    del self._backlinks[target]
+
+    def update(self, jobs=None):
+        """
+        同步链接图与磁盘上的文档，返回统计信息字典。
+
+        mtime 和 size 都未变化的文件直接跳过；变化的文件先比较内容哈希，哈希相同时
+        只更新文件状态，不同时重新解析。已删除的文件从图中移除。
+        等价于 apply_update(prepare_update(jobs))。
+        """
+        return self.apply_update(self.prepare_update(jobs))
+
+    def prepare_update(self, jobs=None):
+        """
+        update 的第一步：检查文件状态并重新解析变化的文件，不修改链接图，返回值交给 apply_update。
+
+        耗时的渲染都在这一步；多线程共享链接图时可以不持有锁执行（同一时间只能有一个更新）。
+        """
+        stats = {'total': 0, 'parsed': 0, 'skipped': 0, 'removed': 0, 'failed': 0}
+        start = time.perf_counter()
+        seen = set()
+        pending = []
+        for rel_path in iter_markdown_files(self.root_dir):
+            rel_path = rel_path.replace(os.sep, '/')
+            seen.add(rel_path)
+            stats['total'] += 1
+            try:
+                st = os.stat(os.path.join(self.root_dir, rel_path))
+            except OSError:
+                continue
+            doc = self.docs.get(rel_path)
+            if doc and doc[0] == st.st_mtime_ns and doc[1] == st.st_size:
+                stats['skipped'] += 1
+                continue
+            pending.append((rel_path, st))
+
+        removed = [rel_path for rel_path in self.docs if rel_path not in seen]
+        rel_paths = [rel_path for rel_path, _ in pending]
+        known = [self.docs[rel_path][2] if rel_path in self.docs else None for rel_path in rel_paths]
+        if len(pending) >= PARALLEL_THRESHOLD and jobs != 1:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                chunksize = max(1, min(64, len(pending) // ((jobs or os.cpu_count() or 1) * 4)))
+                results = list(executor.map(parse_file, [self.root_dir] * len(pending), rel_paths,
+                                            known, chunksize=chunksize))
+        else:
+            results = [parse_file(self.root_dir, rel_path, digest)
+                       for rel_path, digest in zip(rel_paths, known)]
+        return {'stats': stats, 'start': start, 'removed': removed, 'pending': pending, 'results': results}
+
+    def apply_update(self, update):
+        """update 的第二步：把 prepare_update 的结果写入链接图，返回统计信息字典。"""
+        stats = update['stats']
+        for rel_path in update['removed']:
+            if rel_path in self.docs:
+                self._remove(rel_path)
+                stats['removed'] += 1
+        for (rel_path, st), (result, error) in zip(update['pending'], update['results']):
+            if error is not None:
+                stats['failed'] += 1
+                print(f"❌ 解析失败：{rel_path}：{error}", file=sys.stderr)
+                continue
+            digest, anchors, links = result
+            if anchors is None:
+                # 只是 touch 或保存了相同内容，更新文件状态即可
+                self.docs[rel_path][:2] = [st.st_mtime_ns, st.st_size]
+                stats['skipped'] += 1
+                continue
+            if rel_path in self.docs:
+                self._remove(rel_path)
+            self._add(rel_path, [st.st_mtime_ns, st.st_size, digest, anchors, links])
+            stats['parsed'] += 1
+        stats['changed'] = bool(update['pending'] or stats['removed'])
+        stats['seconds'] = time.perf_counter() - update['start']
+        return stats
+
+    def anchors(self, rel_path):
+        """文档中所有可以链接的锚点（集合）。"""
+        anchors = self._anchor_sets.get(rel_path)
+        if anchors is None:
+            anchors = self._anchor_sets[rel_path] = set(self.docs[rel_path][3])
+        return anchors
+
+    def links(self, rel_path):
+        """文档中的本地链接：[{'line', 'href', 'kind', 'target', 'anchor'}]。"""
+        return [dict(zip(('line', 'href', 'kind', 'target', 'anchor'), link))
+                for link in self.docs[rel_path][4]]
+
+    def backlinks(self, rel_path):
+        """
+        链接到 rel_path 的其他文档中的链接，按来源文档和行号排序：
+        [{'md', 'line', 'href', 'anchor'}]。
+        """
+        hits = []
+        for source in sorted(self._backlinks.get(rel_path, ())):
+            for line, href, kind, target, anchor in self.docs[source][4]:
+                if kind == DOC and target == rel_path:
+                    hits.append({'md': source, 'line': line, 'href': href, 'anchor': anchor})
+        return hits
+
+    def check(self):
+        """
+        检查所有链接，返回失效链接列表 [{'md', 'line', 'href', 'reason'}]。
+
+        .md 链接要求目标文档存在且锚点存在，其他本地链接只检查文件是否存在。
+        """
+        broken = []
+        exists = {}
+
+        def file_exists(target):
+            if target not in exists:
+                exists[target] = os.path.exists(os.path.join(self.root_dir, target))
+            return exists[target]
+
+        for rel_path in sorted(self.docs):
+            for line, href, kind, target, anchor in self.docs[rel_path][4]:
+                reason = None
+                if kind == OUTSIDE:
+                    reason = '指向文档目录之外'
+                elif kind == DOC and target in self.docs:
+                    if anchor and anchor not in self.anchors(target):
+                        reason = f'锚点不存在：#{anchor}'
+                elif not file_exists(target):
+                    reason = '文件不存在'
+                if reason:
+                    broken.append({'md': rel_path, 'line': line, 'href': href, 'reason': reason})
+        return broken
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='lad-markdown-check-links',
+                                     description='检查Markdown文档目录树中的链接和锚点')
+    parser.add_argument('root_dir', help='Markdown文档目录')
+    parser.add_argument('--cache', default=None,
+                        help=f'链接图缓存文件（默认为文档目录下的 {CACHE_NAME}）')
+    parser.add_argument('--no-cache', action='store_true', help='不读取也不保存缓存')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='并行工作进程数（默认为CPU核数）')
+    parser.add_argument('--json', action='store_true', help='以JSON输出失效链接')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root_dir):
+        print(f"❌ 目录不存在：{args.root_dir}")
+        return 1
+    path = None if args.no_cache else args.cache or os.path.join(args.root_dir, CACHE_NAME)
+    graph = LinkGraph.open(args.root_dir, path) if path else LinkGraph(args.root_dir)
+    stats = graph.update(jobs=args.jobs)
+    if path and stats['changed']:
+        graph.save()
+    broken = graph.check()
+
+    if args.json:
+        print(json.dumps(broken, ensure_ascii=False, indent=2))
+    else:
+        for item in broken:
+            print(f"❌ {item['md']}:{item['line']}: {item['href']}（{item['reason']}）")
+        link_count = sum(len(doc[4]) for doc in graph.docs.values())
+        print(f"✅ 共 {stats['total']} 个文档、{link_count} 个本地链接：解析 {stats['parsed']}，"
+              f"跳过 {stats['skipped']}，失效链接 {len(broken)}")
+        print(f"⏱️ 耗时 {stats['seconds']:.2f}s")
+    return 1 if broken or stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,209 +1,453 @@
 """
 核心Markdown处理模块
 """
+import io
+import os
 import mistune
 from mistune.plugins.formatting import strikethrough
 from mistune.plugins.table import table
 from mistune.plugins.task_lists import task_lists
-import re
+import threading
 import unicodedata
 import html as html_module
 
-from .markdown_utils import extract_mermaid_blocks, restore_mermaid_blocks, slugify
+from .assets import DEFAULT_STATIC_URL, zoom_asset_tags, zoom_inline_html
+from .front_matter import (
+    METADATA_SLUG, METADATA_TITLE, metadata_table_html, metadata_table_markdown, parse_front_matter,
+)
+from .instrumentation import start_render_timer
+from .markdown_utils import iter_blocks, iter_file_lines, slugify
+from .mermaid_prerender import MermaidSvgCache
+from .render_cache import DiskRenderCache, RenderCache
+from .render_result import RenderResult
 
 class TocRenderer(mistune.HTMLRenderer):
-    """自定义渲染器，为标题添加ID。"""
+    """自定义渲染器，为标题添加ID，并直接输出Mermaid图表。
+
+    TOC和Mermaid状态保存在线程本地存储中，同一个渲染器实例可以被多个线程共享。
+    """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.toc_items = []
+        self._local = threading.local()
+
+    def _state(self, name):
+        items = getattr(self._local, name, None)
+        if items is None:
+            items = []
+            setattr(self._local, name, items)
+        return items
+
+    @property
+    def toc_items(self):
+        """当前线程最近一次渲染收集到的 (level, slug, text) 列表。"""
+        return self._state('toc_items')
+
+    @property
+    def mermaid_blocks(self):
+        """当前线程最近一次渲染收集到的Mermaid图表源码列表。"""
+        return self._state('mermaid_blocks')
+
+    def reset_state(self):
+        """开始新的渲染前清空当前线程的TOC和Mermaid状态。"""
+        self._local.toc_items = []
+        self._local.mermaid_blocks = []
 
     def heading(self, text, level):
         slug = slugify(text)
         self.toc_items.append((level, slug, text))
         return f'<h{level} id="{slug}">{text}</h{level}>\n'
 
+    def block_code(self, code, info=None):
+        """```mermaid 代码块在解析过程中直接输出为图表div，其余交给默认实现。"""
+        if info and info.split(None, 1)[0] == 'mermaid':
+            code = code.strip()
+            self.mermaid_blocks.append(code)
+            return f'<div class="mermaid">{code}</div>\n'
+        return super().block_code(code, info)
+
+def split_yaml_front_matter(md_text):
+    """
+    处理YAML front matter，返回 (元信息字典, 处理后的Markdown)。
+
+    front matter 从正文中移除，并以“文档元信息”Markdown表格的形式放回文档开头。
+    仅为兼容保留；MarkdownProcessor 使用 front_matter.parse_front_matter 并直接生成表格HTML。
+    """
+    metadata, body = parse_front_matter(md_text)
+    return metadata, metadata_table_markdown(metadata) + body
+
 def process_yaml_front_matter(md_text):
     """处理YAML front matter，将其转换为表格格式。"""
-    yaml_pattern = r'^---\s*\n(.*?)\n---\s*\n'
-    match = re.search(yaml_pattern, md_text, re.DOTALL)
-    if match:
-        yaml_content = match.group(1)
-        md_text = re.sub(yaml_pattern, '', md_text, count=1, flags=re.DOTALL)
-        table_rows = []
-        for line in yaml_content.strip().split('\n'):
-            if ':' in line:
-                key, value = line.split(':', 1)
-                key = key.strip()
-                value = value.strip()
-                table_rows.append(f"| {key} | {value} |")
-        if table_rows:
-            table_html = "## 文档元信息\n\n| 字段 | 值 |\n|------|----|\n"
-            table_html += '\n'.join(table_rows)
-            table_html += '\n\n'
-            md_text = table_html + md_text
-    return md_text
-
-def render_markdown_to_html(md_text):
+    return split_yaml_front_matter(md_text)[1]
+
+# 流式渲染时每个分片的目标大小（字符数）
+DEFAULT_CHUNK_SIZE = 256 * 1024
+# 不超过该大小（字节）的文件整篇渲染，超过时才分片渲染
+WHOLE_DOCUMENT_LIMIT = 16 * 1024 * 1024
+
+class MarkdownProcessor:
+    """
+    可复用的Markdown渲染引擎。
+
+    mistune解析器和插件链只在构造时创建一次，之后每次渲染直接复用；
+    每次渲染拥有独立的TOC状态，因此同一实例可以安全地在多个线程间共享。
+
+    默认在单次解析中得到最终HTML：Mermaid源码原样写入图表div，文档中的原始HTML
+    （如注释、锚点）直接保留，代码块和正文沿用mistune的转义。
+    legacy_unescape=True 时恢复旧行为：先整体转义再对全文执行 html.unescape，
+    这会把代码块中已转义的 <script> 等还原成真实标签，仅为兼容保留。
+
+    mermaid_svg_cache 为 MermaidSvgCache 实例时，图表在服务端预渲染为SVG并内联，
+    详见 mermaid_prerender 模块。
+
+    YAML front matter 解析为 RenderResult.metadata；metadata_table=True 时在正文前
+    输出“文档元信息”表格（直接生成HTML，不经过Markdown解析）。
+
+    render_kind 是渲染统计中的类别（见 instrumentation 模块），页面渲染为 'page'，
+    链接检查、搜索索引等内部使用的实例设置为各自的类别。
+    """
+    DEFAULT_PLUGINS = (strikethrough, table, task_lists)
+
+    def __init__(self, plugins=None, legacy_unescape=False, mermaid_svg_cache=None, metadata_table=True,
+                 render_kind='page'):
+        self.plugins = tuple(plugins) if plugins is not None else self.DEFAULT_PLUGINS
+        self.legacy_unescape = legacy_unescape
+        self.mermaid_svg_cache = mermaid_svg_cache
+        self.metadata_table = metadata_table
+        self.render_kind = render_kind
+        self.renderer = TocRenderer(escape=legacy_unescape)
+        self._markdown = mistune.Markdown(renderer=self.renderer, plugins=list(self.plugins))
+
+    @property
+    def cache_signature(self):
+        """描述渲染配置的元组，参与缓存键计算，插件集合变化时缓存自动失效。"""
+        plugins = tuple(f"{p.__module__}.{p.__name__}" for p in self.plugins)
+        signature = plugins + ('yaml_front_matter',)
+        # safe_entity：文本节点由mistune按实体引用安全转义，旧版本缓存的双重转义结果随之失效
+        signature += ('legacy_unescape',) if self.legacy_unescape else ('safe_entity',)
+        signature += () if self.metadata_table else ('no_metadata_table',)
+        if self.mermaid_svg_cache is not None:
+            signature += ('mermaid_svg', self.mermaid_svg_cache.signature)
+        return signature
+
+    @property
+    def toc_items(self):
+        """当前线程最近一次渲染得到的目录项。"""
+        return list(self.renderer.toc_items)
+
+    @property
+    def mermaid_blocks(self):
+        """当前线程最近一次渲染得到的Mermaid图表源码。"""
+        return list(self.renderer.mermaid_blocks)
+
+    def render(self, md_text, front_matter=True, ref_links=None):
+        """
+        将完整的Markdown文本渲染为 RenderResult。
+        这是一个集中的处理流程，包括YAML、Mermaid和TOC，全部结果来自同一次解析。
+
+        front_matter=False 时不处理YAML元信息，用于渲染文档中间的片段。
+        ref_links 为链接引用定义字典（[id]: url），其中的定义对本次渲染生效，
+        本次渲染中新出现的定义也写入其中（同名时先出现的定义优先），分片渲染时用它在分片之间传递定义。
+        注册了观察者时各阶段的耗时见 instrumentation 模块。
+        """
+        timer = start_render_timer(md_text, self.render_kind)
+
+        # 1. 处理YAML元信息（文档不以 --- 开头时只做一次前缀比较）
+        if front_matter:
+            metadata, processed_md = parse_front_matter(md_text)
+            if timer:
+                timer.stage('front_matter')
+        else:
+            metadata, processed_md = {}, md_text
+
+        # 2. 复用已构建的解析器渲染Markdown，Mermaid图表在解析过程中直接输出
+        self.renderer.reset_state()
+        if ref_links is None:
+            html_body = self._markdown(processed_md)
+        else:
+            state = self._markdown.block.state_cls()
+            state.env['ref_links'] = ref_links
+            html_body = self._markdown.parse(processed_md, state)[0]
+        if timer:
+            timer.stage('parse')
+
+        # 3. 兼容模式：对全文解码HTML实体
+        if self.legacy_unescape:
+            html_body = html_module.unescape(html_body)
+            if timer:
+                timer.stage('unescape')
+
+        # 4. 可选：内联服务端预渲染的Mermaid SVG
+        if self.mermaid_svg_cache is not None:
+            html_body = self.mermaid_svg_cache.inline_svgs(html_body, self.renderer.mermaid_blocks)
+            if timer:
+                timer.stage('mermaid_svg')
+
+        # 5. 元信息表格直接以HTML放在正文前，并作为第一个目录项
+        toc = self.toc_items
+        if self.metadata_table and metadata:
+            html_body = metadata_table_html(metadata) + html_body
+            toc.insert(0, (2, METADATA_SLUG, METADATA_TITLE))
+            if timer:
+                timer.stage('metadata_table')
+
+        result = RenderResult(html_body, toc, metadata, self.mermaid_blocks)
+        if timer:
+            timer.finish(result)
+        return result
+
+    def process_markdown(self, md_text, front_matter=True):
+        """将完整的Markdown文本渲染为HTML，参数同 render。"""
+        return self.render(md_text, front_matter=front_matter).html
+
+    __call__ = process_markdown
+
+    def iter_render(self, fileobj, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        流式渲染：按块对齐的分片读取Markdown并逐片产出HTML。
+
+        fileobj 可以是文本或二进制（按UTF-8解码）文件对象，也可以是任意行迭代器。
+        分片边界总是落在顶层块之间，front matter、围栏代码块和Mermaid图表
+        不会被拆开；内存占用只与 chunk_size 和单个块的大小有关。
+        前面分片中的链接引用定义（[id]: url）对后面的分片生效；定义出现在使用之后的
+        其他分片时无法预知，需要完整结果时使用 render_file。
+        """
+        for result in self.iter_results(fileobj, chunk_size=chunk_size):
+            yield result.html
+
+    def iter_results(self, fileobj, chunk_size=DEFAULT_CHUNK_SIZE, ref_links=None):
+        """与 iter_render 相同，但逐片产出 RenderResult；ref_links 为预先收集的链接引用定义。"""
+        ref_links = {} if ref_links is None else ref_links
+        for text, first in self._iter_chunks(fileobj, chunk_size):
+            yield self.render(text, front_matter=first, ref_links=ref_links)
+
+    def _iter_chunks(self, fileobj, chunk_size):
+        """按块对齐切分为不小于 chunk_size 的分片，产出 (分片文本, 是否为第一个分片)。"""
+        if isinstance(fileobj, io.RawIOBase) or isinstance(fileobj, io.BufferedIOBase):
+            fileobj = io.TextIOWrapper(fileobj, encoding='utf-8')
+        pending = []
+        pending_size = 0
+        first = True
+        for block in iter_blocks(fileobj):
+            pending.append(block)
+            pending_size += len(block)
+            if pending_size >= chunk_size:
+                yield ''.join(pending), first
+                first = False
+                pending = []
+                pending_size = 0
+        if pending:
+            yield ''.join(pending), first
+
+    def collect_ref_links(self, lines, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        只做块级解析，按分片收集整篇文档的链接引用定义，返回 {标签: 定义}。
+
+        不解析行内内容也不生成HTML，用于分片渲染大文件前预先得到全部定义。
+        """
+        ref_links = {}
+        block = self._markdown.block
+        for text, first in self._iter_chunks(lines, chunk_size):
+            if first:
+                text = parse_front_matter(text)[1]
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+            state = block.state_cls()
+            state.env['ref_links'] = ref_links
+            state.process(text if text.endswith('\n') else text + '\n')
+            block.parse(state)
+        return ref_links
+
+    def _iter_file_results(self, path, chunk_size):
+        if os.path.getsize(path) <= WHOLE_DOCUMENT_LIMIT:
+            # 整篇渲染：链接引用定义、脚注等跨越整个文档的语法与一次性解析完全一致
+            yield self.render(''.join(iter_file_lines(path)))
+            return
+        # 大文件先收集全部链接引用定义，再分片渲染，定义与使用分在不同分片时链接仍然有效
+        ref_links = self.collect_ref_links(iter_file_lines(path), chunk_size)
+        yield from self.iter_results(iter_file_lines(path), chunk_size=chunk_size, ref_links=ref_links)
+
+    def render_file(self, path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        通过内存映射读取Markdown文件并渲染为HTML。
+
+        不超过 WHOLE_DOCUMENT_LIMIT 的文件整篇渲染；更大的文件逐行解码、按块分片渲染，
+        不会生成完整源文本及其预处理副本，峰值内存主要由输出的HTML决定。
+        分片前先做一遍块级解析收集链接引用定义，结果与整篇渲染一致。
+        """
+        return ''.join(result.html for result in self._iter_file_results(path, chunk_size))
+
+    def render_document(self, path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """与 render_file 相同的读取方式，返回包含目录和元信息的 RenderResult。"""
+        return RenderResult.concat(self._iter_file_results(path, chunk_size))
+
+
+_default_processor = None
+_default_processor_lock = threading.Lock()
+
+def get_default_processor():
+    """返回进程内共享的默认 MarkdownProcessor 实例（首次调用时创建）。"""
+    global _default_processor
+    if _default_processor is None:
+        with _default_processor_lock:
+            if _default_processor is None:
+                _default_processor = MarkdownProcessor()
+    return _default_processor
+
+_render_cache = None
+
+def set_render_cache(cache):
+    """
+    设置模块级默认渲染缓存。
+
+    传入 RenderCache 实例启用缓存，传入 None 关闭缓存。
+    """
+    global _render_cache
+    _render_cache = cache
+    return cache
+
+def enable_render_cache(max_entries=256, max_bytes=64 * 1024 * 1024, disk_dir=None):
+    """
+    创建并启用一个新的模块级渲染缓存，返回该缓存实例。
+
+    指定 disk_dir 时额外启用磁盘缓存层，多个进程（例如gunicorn的多个worker）
+    指向同一目录即可共享渲染结果，进程重启后也不会丢失。
+    """
+    disk_cache = DiskRenderCache(disk_dir) if disk_dir else None
+    return set_render_cache(RenderCache(max_entries=max_entries, max_bytes=max_bytes,
+                                        disk_cache=disk_cache))
+
+def enable_render_cache_from_env(env_var='LAD_MARKDOWN_CACHE_DIR'):
+    """
+    如果设置了环境变量 LAD_MARKDOWN_CACHE_DIR，则启用带磁盘层的模块级缓存。
+
+    preview_md.py 和 Web 查看器都通过它读取同一个缓存目录。未设置时不做任何改动，
+    返回当前的模块级缓存。
+    """
+    disk_dir = os.environ.get(env_var)
+    if disk_dir:
+        return enable_render_cache(disk_dir=disk_dir)
+    return _render_cache
+
+def get_render_cache():
+    """返回当前的模块级渲染缓存（未启用时为 None）。"""
+    return _render_cache
+
+def enable_mermaid_prerender(directory=None, renderer=None):
+    """
+    为默认处理器启用Mermaid服务端预渲染，返回创建的 MermaidSvgCache。
+
+    directory 为SVG磁盘缓存目录，renderer 默认为 MmdcRenderer()。
+    """
+    cache = MermaidSvgCache(renderer=renderer, directory=directory)
+    get_default_processor().mermaid_svg_cache = cache
+    return cache
+
+def enable_mermaid_prerender_from_env(env_var='LAD_MARKDOWN_MERMAID_SVG_DIR'):
+    """
+    如果设置了环境变量 LAD_MARKDOWN_MERMAID_SVG_DIR，则以该目录为SVG缓存启用预渲染。
+
+    批量渲染和ASGI查看器的工作进程通过它继承主进程的设置。未设置时不做任何改动，
+    返回默认处理器当前的SVG缓存。
+    """
+    directory = os.environ.get(env_var)
+    if directory:
+        return enable_mermaid_prerender(directory)
+    return get_default_processor().mermaid_svg_cache
+
+def _resolve_cache(cache):
+    # None 表示使用模块级设置，False 表示本次调用显式禁用缓存
+    if cache is None:
+        return _render_cache
+    if cache is False:
+        return None
+    return cache
+
+def render_markdown_to_html(md_text, cache=None):
     """
     将完整的Markdown文本渲染为HTML。
     这是一个集中的处理流程，包括YAML、Mermaid和TOC。
+
+    cache 为 None 时使用模块级缓存设置，为 False 时不使用缓存，
+    也可以直接传入一个 RenderCache 实例。
+    """
+    processor = get_default_processor()
+    cache = _resolve_cache(cache)
+    if cache is None:
+        return processor.process_markdown(md_text)
+    options = ('html',) + processor.cache_signature
+    return cache.get_or_render(md_text, processor.process_markdown, options)
+
+def render_markdown(md_text, cache=None):
+    """
+    将完整的Markdown文本渲染为 RenderResult（HTML、目录、元信息和Mermaid图表），
+    所有内容来自同一次解析。cache 参数的含义与 render_markdown_to_html 相同。
+    """
+    processor = get_default_processor()
+    cache = _resolve_cache(cache)
+    if cache is None:
+        return processor.render(md_text)
+    options = ('result',) + processor.cache_signature
+    return cache.get_or_render(md_text, processor.render, options)
+
+def iter_render(fileobj, chunk_size=DEFAULT_CHUNK_SIZE):
+    """使用共享的默认处理器流式渲染文件对象，逐片产出HTML，详见 MarkdownProcessor.iter_render。"""
+    return get_default_processor().iter_render(fileobj, chunk_size=chunk_size)
+
+# 图片和Mermaid图的放大缩小控件（样式+脚本），内联形式，追加在渲染结果之后。
+# 源文件位于 static/zoom.css 和 static/zoom.js，Web查看器以外部资源方式引用
+ZOOM_JS_CSS = zoom_inline_html()
+
+def render_file(path, cache=None):
+    """
+    渲染Markdown文件，供桌面查看器、预览工具和Web查看器共用。
+
+    文件经内存映射按需读取，详见 MarkdownProcessor.render_file。启用缓存时以
+    文件路径、修改时间和大小作为键，命中时无需再读取文件内容。
     """
-    # 1. 处理YAML元信息
-    processed_md = process_yaml_front_matter(md_text)
-    
-    # 2. 提取Mermaid图表块
-    processed_md, mermaid_blocks = extract_mermaid_blocks(processed_md)
-    
-    # 3. 使用自定义渲染器和插件来渲染Markdown
-    renderer = TocRenderer()
-    markdown = mistune.Markdown(renderer=renderer, plugins=[strikethrough, table, task_lists])
-    html_body = markdown(processed_md)
-    
-    # 4. 解码HTML实体并恢复Mermaid图表块
-    html_body = html_module.unescape(html_body)
-    html_body = restore_mermaid_blocks(html_body, mermaid_blocks)
-    
-    return html_body 
-
-def render_markdown_with_zoom(md_text):
+    processor = get_default_processor()
+    cache = _resolve_cache(cache)
+    if cache is None:
+        return processor.render_file(path)
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    options = ('file', stat.st_mtime_ns, stat.st_size) + processor.cache_signature
+    return cache.get_or_render(path, processor.render_file, options)
+
+def render_document(path, cache=None):
+    """
+    渲染Markdown文件并返回 RenderResult，读取方式和缓存键与 render_file 相同。
+
+    需要同时展示页面和目录导航的调用方使用它，目录无需再次解析文档得到。
+    """
+    processor = get_default_processor()
+    cache = _resolve_cache(cache)
+    if cache is None:
+        return processor.render_document(path)
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    options = ('document', stat.st_mtime_ns, stat.st_size) + processor.cache_signature
+    return cache.get_or_render(path, processor.render_document, options)
+
+def render_markdown_with_zoom(md_text, cache=None, assets='inline', static_url=DEFAULT_STATIC_URL):
     """
     渲染Markdown为HTML，并自动注入图片和Mermaid图的放大缩小控件、自动居中、留白等前端交互体验。
+
+    cache 参数的含义与 render_markdown_to_html 相同。
+    assets 为 'inline' 时控件的样式和脚本内联在结果中（适合独立的HTML文件）；
+    为 'external' 时只输出指向 static_url 下带内容哈希资源的 <link>/<script> 标签，
+    浏览器可以长期缓存这些资源，每个页面只需传输渲染结果本身。
     """
-    html_body = render_markdown_to_html(md_text)
-    zoom_js_css = '''
-    <style>
-    .markdown-body img, .markdown-body .mermaid { cursor: zoom-in; transition: box-shadow 0.2s; }
-    .markdown-body .mermaid, .markdown-body img { display: block; margin: 32px auto; background: #fff; border-radius: 8px; box-shadow: 0 2px 12px rgba(0,0,0,0.06); padding: 24px; }
-    .zoom-controls {
-        position: absolute;
-        right: 16px;
-        top: 16px;
-        z-index: 10001;
-        display: flex;
-        flex-direction: row;
-        gap: 8px;
-    }
-    .zoom-btn {
-        background: #fff;
-        border: 1px solid #ccc;
-        border-radius: 4px;
-        width: 32px;
-        height: 32px;
-        font-size: 18px;
-        cursor: pointer;
-        box-shadow: 0 1px 4px rgba(0,0,0,0.08);
-        transition: background 0.2s;
-    }
-    .zoom-btn:hover { background: #f6f8fa; }
-    .zoom-overlay {
-        position: fixed;
-        left: 0; top: 0; width: 100vw; height: 100vh;
-        background: rgba(0,0,0,0.7);
-        display: flex; align-items: center; justify-content: center;
-        z-index: 9999;
-        cursor: zoom-out;
-        overflow: hidden;
-    }
-    </style>
-    <script>
-    document.addEventListener('DOMContentLoaded', function() {
-        function createZoomOverlay(contentElem) {
-            let overlay = document.createElement('div');
-            overlay.className = 'zoom-overlay';
-            let container = document.createElement('div');
-            container.style.position = 'relative';
-            container.style.display = 'inline-block';
-            // 缩放控件
-            let controls = document.createElement('div');
-            controls.className = 'zoom-controls';
-            let btnPlus = document.createElement('button');
-            btnPlus.className = 'zoom-btn'; btnPlus.textContent = '+';
-            let btnMinus = document.createElement('button');
-            btnMinus.className = 'zoom-btn'; btnMinus.textContent = '-';
-            let btnReset = document.createElement('button');
-            btnReset.className = 'zoom-btn'; btnReset.textContent = '重置';
-            controls.appendChild(btnPlus);
-            controls.appendChild(btnMinus);
-            controls.appendChild(btnReset);
-            let scale = 1;
-            let panX = 0, panY = 0;
-            let isDragging = false, lastX = 0, lastY = 0;
-            function applyTransform() {
-                contentElem.style.transform = `scale(${scale}) translate(${panX}px, ${panY}px)`;
-                contentElem.style.transformOrigin = 'center center';
-            }
-            btnPlus.onclick = function(e) { e.stopPropagation(); scale *= 1.2; applyTransform(); };
-            btnMinus.onclick = function(e) { e.stopPropagation(); scale /= 1.2; applyTransform(); };
-            btnReset.onclick = function(e) { e.stopPropagation(); scale = 1; panX = 0; panY = 0; applyTransform(); };
-            // 拖拽平移（事件全部绑定在overlay内部，避免外部影响）
-            contentElem.addEventListener('mousedown', function(e) {
-                isDragging = true;
-                lastX = e.clientX;
-                lastY = e.clientY;
-                contentElem.style.cursor = 'grab';
-                e.stopPropagation();
-                e.preventDefault();
-            });
-            overlay.addEventListener('mousemove', function(e) {
-                if (isDragging) {
-                    panX += (e.clientX - lastX);
-                    panY += (e.clientY - lastY);
-                    lastX = e.clientX;
-                    lastY = e.clientY;
-                    applyTransform();
-                }
-            });
-            // 只允许点击overlay空白区域且非拖拽时关闭
-            overlay.addEventListener('mousedown', function(e) {
-                overlay._maybeClose = (e.target === overlay);
-            });
-            // mouseup全局监听，setTimeout确保isDragging已重置
-            document.addEventListener('mouseup', function(e) {
-                if (isDragging) {
-                    isDragging = false;
-                    contentElem.style.cursor = 'zoom-in';
-                }
-                setTimeout(function() {
-                    if (!isDragging && overlay._maybeClose && e.target === overlay) {
-                        document.body.removeChild(overlay);
-                    }
-                }, 0);
-            });
-            // 内容
-            contentElem.style.boxShadow = '0 4px 32px rgba(0,0,0,0.3)';
-            contentElem.style.borderRadius = '8px';
-            contentElem.style.background = '#fff';
-            contentElem.style.transition = 'transform 0.2s';
-            applyTransform();
-            container.appendChild(controls);
-            container.appendChild(contentElem);
-            overlay.appendChild(container);
-            return overlay;
-        }
-        document.body.addEventListener('click', function(e) {
-            // 图片放大
-            let img = e.target.closest('.markdown-body img');
-            if (img) {
-                if (img.classList.contains('zoomed')) return;
-                let bigImg = document.createElement('img');
-                bigImg.src = img.src;
-                bigImg.className = img.className + ' zoomed';
-                let overlay = createZoomOverlay(bigImg);
-                document.body.appendChild(overlay);
-                return;
-            }
-            // Mermaid图放大
-            let mermaidDiv = e.target.closest('.markdown-body .mermaid');
-            if (mermaidDiv) {
-                if (mermaidDiv.classList.contains('zoomed')) return;
-                let bigDiv = document.createElement('div');
-                bigDiv.innerHTML = mermaidDiv.innerHTML;
-                bigDiv.className = mermaidDiv.className + ' zoomed';
-                let overlay = createZoomOverlay(bigDiv);
-                document.body.appendChild(overlay);
-            }
-        }, false);
-    });
-    </script>
-    '''
-    return html_body + zoom_js_css 
\ No newline at end of file
+    if assets == 'inline':
+        tags = ZOOM_JS_CSS
+    elif assets == 'external':
+        tags = zoom_asset_tags(static_url)
+    else:
+        raise ValueError(f"未知的资源模式：{assets}")
+    cache = _resolve_cache(cache)
+    if cache is not None:
+        options = ('zoom', tags) + get_default_processor().cache_signature
+        return cache.get_or_render(md_text, lambda text: _render_markdown_with_zoom(text, tags), options)
+    return _render_markdown_with_zoom(md_text, tags)
+
+def _render_markdown_with_zoom(md_text, tags=ZOOM_JS_CSS):
+    html_body = render_markdown_to_html(md_text, cache=False)
+    return html_body + tags
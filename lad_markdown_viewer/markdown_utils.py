@@ -1,3 +1,5 @@
+import mmap
+import os
 import re
 
 def slugify(text):
@@ -11,6 +13,12 @@ def slugify(text):
         return text
 
 def extract_mermaid_blocks(md_text):
+    """
+    用占位符替换 ```mermaid 代码块，返回 (新文本, 图表源码列表)。
+
+    渲染流水线已由 TocRenderer.block_code 在解析时直接输出Mermaid图表，
+    此函数与 restore_mermaid_blocks 仅为兼容旧调用方而保留。
+    """
     mermaid_blocks = []
     def replacer(match):
         mermaid_blocks.append(match.group(1).strip())
@@ -18,7 +26,104 @@ def extract_mermaid_blocks(md_text):
     new_md = re.sub(r'```mermaid\s*([\s\S]*?)\s*```', replacer, md_text)
     return new_md, mermaid_blocks
 
+MERMAID_PLACEHOLDER_RE = re.compile(r'@@MERMAID(\d+)@@')
+
 def restore_mermaid_blocks(html, mermaid_blocks):
-    for i, code in enumerate(mermaid_blocks):
-        html = html.replace(f"@@MERMAID{i}@@", f'<div class="mermaid">{code}</div>')
-    return html 
\ No newline at end of file
+    """
+    一次扫描将所有 @@MERMAIDn@@ 占位符替换为Mermaid图表div。
+
+    整个文档只复制一次，耗时与文档长度成线性关系；占位符按完整编号匹配，
+    @@MERMAID1@@ 不会误伤 @@MERMAID10@@。编号越界的占位符保持原样。
+    """
+    if not mermaid_blocks:
+        return html
+    def replacer(match):
+        index = int(match.group(1))
+        if index < len(mermaid_blocks):
+            return f'<div class="mermaid">{mermaid_blocks[index]}</div>'
+        return match.group(0)
+    return MERMAID_PLACEHOLDER_RE.sub(replacer, html)
+
+FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+LIST_ITEM_RE = re.compile(r'^ {0,3}(?:[*+-]|\d{1,9}[.)])(?:[ \t]|$)')
+
+def iter_blocks(lines):
+    """
+    将Markdown按顶层块切分，逐块产出字符串。
+
+    lines 可以是任意带换行符的行迭代器（列表、文件对象等），因此既能处理整段文本
+    也能流式处理大文件。切分规则：
+    - 文档开头的YAML front matter单独成块；
+    - 围栏代码块（包括Mermaid）内部的空行不切分；
+    - 空行之后的缩进行、以及同一列表中的后续列表项与前文属于同一块。
+    所有块按顺序拼接后与原文完全一致。
+    """
+    block = []
+    has_content = False
+    fence = None
+    pending_break = False
+    list_block = False
+    first = True
+    in_front_matter = False
+    for line in lines:
+        if first:
+            first = False
+            if line.rstrip() == '---':
+                in_front_matter = True
+                block.append(line)
+                continue
+        if in_front_matter:
+            block.append(line)
+            if line.rstrip() == '---':
+                in_front_matter = False
+                yield ''.join(block)
+                block = []
+            continue
+        if fence is not None:
+            block.append(line)
+            stripped = line.strip()
+            if stripped.startswith(fence) and stripped.strip(fence[0]) == '':
+                fence = None
+            continue
+        if not line.strip():
+            block.append(line)
+            pending_break = has_content
+            continue
+        is_list_item = bool(LIST_ITEM_RE.match(line))
+        if pending_break:
+            pending_break = False
+            continuation = line[0] in ' \t' or (list_block and is_list_item)
+            if not continuation:
+                yield ''.join(block)
+                block = []
+                has_content = False
+        if not has_content:
+            has_content = True
+            list_block = is_list_item
+        block.append(line)
+        match = FENCE_RE.match(line)
+        if match:
+            fence = match.group(1)
+    if block:
+        yield ''.join(block)
+
+def split_blocks(md_text):
+    """将完整的Markdown文本切分为顶层块列表，详见 iter_blocks。"""
+    return list(iter_blocks(md_text.splitlines(keepends=True)))
+
+def iter_file_lines(path, encoding='utf-8'):
+    """
+    通过内存映射逐行读取文件并按需解码，不会把整个文件读入一个字符串。
+
+    文件开头的UTF-8 BOM会被去掉；空文件不产出任何行。
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            first = mm.readline()
+            if first.startswith(b'\xef\xbb\xbf'):
+                first = first[3:]
+            yield first.decode(encoding)
+            for line in iter(mm.readline, b''):
+                yield line.decode(encoding)
@@ -1,15 +1,15 @@
 import sys
 from PyQt5.QtWidgets import QMainWindow, QVBoxLayout, QWidget
 from PyQt5.QtWebEngineWidgets import QWebEngineView
-import markdown
-import pymdownx.superfences
-import re
-import html as html_module
+
+from .assets import DEFAULT_PREFETCH_MARGIN, desktop_base_url, mermaid_runtime_tags, vendor_tags
+from .markdown_processor import render_file
 
 class MarkdownViewerWidget(QWidget):
-    def __init__(self, markdown_path, parent=None):
+    def __init__(self, markdown_path, parent=None, mermaid_prefetch_margin=DEFAULT_PREFETCH_MARGIN):
         super().__init__(parent)
         self.markdown_path = markdown_path
+        self.mermaid_prefetch_margin = mermaid_prefetch_margin
         self.browser = QWebEngineView()
         self.init_ui()
         self.load_markdown()
@@ -20,37 +20,14 @@ class MarkdownViewerWidget(QWidget):
         self.setLayout(layout)
 
     def load_markdown(self):
-        with open(self.markdown_path, 'r', encoding='utf-8') as f:
-            md_text = f.read()
-        html_body = markdown.markdown(
-            md_text,
-            extensions=[
-                'extra', 'codehilite', 'toc',
-                'pymdownx.superfences'
-            ],
-            extension_configs={
-                'pymdownx.superfences': {
-                    'custom_fences': [
-                        {
-                            'name': 'mermaid',
-                            'class': 'mermaid',
-                            'format': pymdownx.superfences.fence_div_format
-                        }
-                    ]
-                }
-            }
-        )
-        # 兜底正则替换
-        def codeblock_to_mermaid_div(html):
-            pattern = re.compile(r'<pre><code class="language-mermaid">(.*?)</code></pre>', re.DOTALL)
-            return pattern.sub(lambda m: f'<div class="mermaid">{m.group(1)}</div>', html)
-        html_body = codeblock_to_mermaid_div(html_body)
-        html_body = html_module.unescape(html_body)
+        # 与其他入口共用的文件渲染接口：内存映射读取，Mermaid代码块直接输出为图表
+        html_body = render_file(self.markdown_path)
         html = f"""
         <html>
         <head>
             <meta charset=\"utf-8\">
-            <script src=\"https://unpkg.com/mermaid@8.13.10/dist/mermaid.min.js\" onload=\"mermaid.initialize({{startOnLoad:true}});\"></script>
+            {vendor_tags()}
+            {mermaid_runtime_tags(prefetch_margin=self.mermaid_prefetch_margin)}
             <style>
                 body {{ font-family: '微软雅黑', Arial, sans-serif; margin: 30px; }}
                 table {{ border-collapse: collapse; width: 100%; }}
@@ -65,4 +42,4 @@ class MarkdownViewerWidget(QWidget):
         </body>
         </html>
         """
-        self.browser.setHtml(html) 
\ No newline at end of file
+        self.browser.setHtml(html, desktop_base_url())
@@ -0,0 +1,249 @@
+"""
+Mermaid服务端预渲染模块
+
+在服务端把Mermaid图表渲染为SVG并按图表源码的哈希缓存，页面中直接内联SVG，
+浏览器无需再逐个布局图表。相同的图表（无论出现在哪个文档中）只渲染一次。
+
+渲染器是可替换的：任何具有 signature 属性和 render_many(sources) 方法的对象
+都可以使用，render_many 返回与 sources 一一对应的SVG字符串（失败时为 None）。
+默认的 MmdcRenderer 调用 mermaid-cli（mmdc）的无头浏览器进程并行渲染：
+
+    npm install -g @mermaid-js/mermaid-cli
+
+渲染失败或未安装渲染器的图表保持原样，仍由浏览器中的mermaid.js渲染。
+"""
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .file_utils import write_atomic
+
+_SVG_ROOT_ID_RE = re.compile(r'<svg\b[^>]*?\sid="([^"]+)"')
+
+
+def uniquify_svg_ids(svg, new_id):
+    """
+    替换SVG根元素的ID（mmdc默认输出 id="my-svg"）。
+
+    Mermaid生成的样式以根元素ID为选择器，多个SVG内联在同一页面时ID必须互不相同。
+    """
+    match = _SVG_ROOT_ID_RE.search(svg)
+    if not match:
+        return svg
+    old_id = re.escape(match.group(1))
+    return re.sub(r'(?<![\w-])' + old_id + r'(?![\w-])', new_id, svg)
+
+
+class MmdcRenderer:
+    """
+    基于 mermaid-cli（mmdc）的渲染器。
+
+    每个图表由一个 mmdc 子进程（无头浏览器）渲染，最多同时运行 max_workers 个。
+
+    参数:
+        executable: mmdc 可执行文件名或路径
+        max_workers: 并行渲染的进程数（默认为CPU核数）
+        theme: Mermaid主题
+        timeout: 单个图表的渲染超时（秒）
+    """
+
+    def __init__(self, executable='mmdc', max_workers=None, theme='default', timeout=60):
+        self.executable = shutil.which(executable)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.theme = theme
+        self.timeout = timeout
+        self._version = None
+
+    @property
+    def available(self):
+        return self.executable is not None
+
+    @property
+    def signature(self):
+        """渲染器标识，参与缓存键计算；mmdc版本或主题变化时缓存自动失效。"""
+        if self._version is None:
+            self._version = 'unavailable'
+            if self.available:
+                try:
+                    result = subprocess.run([self.executable, '--version'], capture_output=True,
+                                            text=True, timeout=self.timeout)
+                    self._version = result.stdout.strip() or 'unknown'
+                except (OSError, subprocess.SubprocessError):
+                    pass
+        return f"mmdc:{self._version}:{self.theme}"
+
+    def render(self, source):
+        """渲染单个图表，返回SVG字符串，失败时返回 None。"""
+        if not self.available:
+            return None
+        with tempfile.TemporaryDirectory(prefix='lad-mermaid-') as work_dir:
+            input_path = os.path.join(work_dir, 'diagram.mmd')
+            output_path = os.path.join(work_dir, 'diagram.svg')
+            with open(input_path, 'w', encoding='utf-8') as f:
+                f.write(source)
+            try:
+                subprocess.run([self.executable, '-i', input_path, '-o', output_path,
+                                '-t', self.theme, '-b', 'transparent', '-q'],
+                               capture_output=True, timeout=self.timeout, check=True)
+                with open(output_path, 'r', encoding='utf-8') as f:
+                    return f.read()
+            except (OSError, subprocess.SubprocessError):
+                return None
+
+    def render_many(self, sources):
+        """并行渲染多个图表，返回与 sources 一一对应的结果列表。"""
+        if not self.available or not sources:
+            return [None] * len(sources)
+        if len(sources) == 1:
+            return [self.render(sources[0])]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(sources))) as executor:
+            return list(executor.map(self.render, sources))
+
+
+class MermaidSvgCache:
+    """
+    以图表源码哈希为键的SVG缓存。
+
+    内存中按LRU保留最近使用的 max_entries 个SVG；指定 directory 时额外写入磁盘
+    （每个图表一个 .svg 文件，原子写入），多个进程和多次运行可以共享。
+    渲染失败的图表在内存中记录，同一进程内不再重复尝试。
+
+    参数:
+        renderer: 渲染器，默认为 MmdcRenderer()
+        directory: 磁盘缓存目录（可选）
+        max_entries: 内存中最多保留的SVG数量
+    """
+    SUFFIX = '.svg'
+
+    def __init__(self, renderer=None, directory=None, max_entries=1024):
+        self.renderer = renderer if renderer is not None else MmdcRenderer()
+        self.directory = directory
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._failed = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def signature(self):
+        return self.renderer.signature
+
+    def key(self, source):
+        """图表的缓存键：渲染器标识与源码的sha256。"""
+        payload = self.renderer.signature + '\0' + source
+        return hashlib.sha256(payload.encode('utf-8', 'surrogatepass')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + self.SUFFIX)
+
+    def _lookup(self, key):
+        with self._lock:
+            svg = self._memory.get(key)
+            if svg is not None:
+                self._memory.move_to_end(key)
+                return svg
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                svg = f.read()
+        except OSError:
+            return None
+        self._remember(key, svg)
+        return svg
+
+    def _remember(self, key, svg):
+        with self._lock:
+            self._memory[key] = svg
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _store(self, key, svg):
+        self._remember(key, svg)
+        if not self.directory:
+            return
+        try:
+            write_atomic(self._path(key), svg)
+        except OSError:
+            pass
+
+    def render_many(self, sources):
+        """
+        返回 {源码: SVG或None}。
+
+        命中缓存的图表直接返回；未命中的图表去重后一次性交给渲染器并行渲染。
+        """
+        results = {}
+        keys = {}
+        pending = []
+        for source in sources:
+            if source in results or source in keys:
+                continue
+            key = self.key(source)
+            svg = self._lookup(key)
+            if svg is not None:
+                self.hits += 1
+                results[source] = svg
+            elif key in self._failed:
+                results[source] = None
+            else:
+                self.misses += 1
+                keys[source] = key
+                pending.append(source)
+        if pending:
+            for source, svg in zip(pending, self.renderer.render_many(pending)):
+                key = keys[source]
+                if svg is None:
+                    self.failures += 1
+                    with self._lock:
+                        self._failed.add(key)
+                else:
+                    svg = uniquify_svg_ids(svg, 'mermaid-' + key[:16])
+                    self._store(key, svg)
+                results[source] = svg
+        return results
+
+    def inline_svgs(self, html_body, sources):
+        """
+        把 html_body 中的Mermaid图表div替换为预渲染的SVG。
+
+        sources 为按出现顺序排列的图表源码（即 TocRenderer.mermaid_blocks）。
+        替换后的div带有 data-processed 属性，mermaid.js 会跳过它们；
+        没有SVG的图表保持原样，仍由浏览器渲染。
+        """
+        if not sources:
+            return html_body
+        svgs = self.render_many(sources)
+        parts = []
+        position = 0
+        for source in sources:
+            svg = svgs.get(source)
+            if svg is None:
+                continue
+            marker = f'<div class="mermaid">{source}</div>'
+            index = html_body.find(marker, position)
+            if index < 0:
+                continue
+            parts.append(html_body[position:index])
+            parts.append(f'<div class="mermaid" data-processed="true">{svg}</div>')
+            position = index + len(marker)
+        if not parts:
+            return html_body
+        parts.append(html_body[position:])
+        return ''.join(parts)
+
+    @property
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'failures': self.failures,
+                'entries': len(self._memory)}
@@ -0,0 +1,214 @@
+"""
+渲染结果缓存模块
+
+以Markdown文本和渲染选项的哈希作为键缓存渲染后的HTML，
+支持条目数上限、总字节数上限以及LRU淘汰，并统计命中/未命中/淘汰次数。
+可选的磁盘缓存层（DiskRenderCache）让多个进程以及重启后的进程共享渲染结果。
+"""
+import hashlib
+import os
+import shutil
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+
+from .file_utils import write_atomic
+from .render_result import RenderResult
+
+
+def make_cache_key(md_text, options=()):
+    """根据Markdown文本和渲染选项生成内容寻址的缓存键。"""
+    digest = hashlib.sha256(repr(tuple(options)).encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(md_text.encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    线程安全的LRU渲染缓存。
+
+    参数:
+        max_entries: 最多缓存的条目数
+        max_bytes: 缓存值占用的最大总字节数（按对象实际内存大小计算）
+        disk_cache: 可选的 DiskRenderCache，内存未命中时回退到磁盘查找
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, disk_cache=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_cache = disk_cache
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    @property
+    def stats(self):
+        """返回命中、未命中、淘汰次数以及当前占用情况。"""
+        with self._lock:
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+            }
+        if self.disk_cache is not None:
+            disk_stats = self.disk_cache.stats
+            stats['disk_hits'] = disk_stats['hits']
+            stats['disk_misses'] = disk_stats['misses']
+        return stats
+
+    def get(self, key, default=None):
+        """查找缓存；命中时将条目移到最近使用的位置。
+
+        内存未命中且配置了磁盘缓存时，从磁盘读取并提升到内存中。
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if self.disk_cache is None:
+                self.misses += 1
+                return default
+        value = self.disk_cache.get(key)
+        if value is None:
+            with self._lock:
+                self.misses += 1
+            return default
+        self._store(key, value)
+        return value
+
+    def put(self, key, value):
+        """写入缓存，并按LRU顺序淘汰超出限制的条目；同时写入磁盘缓存。"""
+        self._store(key, value)
+        if self.disk_cache is not None:
+            self.disk_cache.put(key, value)
+
+    def _store(self, key, value):
+        size = sys.getsizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._total_bytes += size
+            while (len(self._entries) > self.max_entries
+                   or self._total_bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_render(self, md_text, render, options=()):
+        """命中时直接返回缓存，否则调用 render(md_text) 并写入缓存。"""
+        key = make_cache_key(md_text, options)
+        value = self.get(key)
+        if value is None:
+            value = render(md_text)
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """清空缓存条目（统计计数保持不变）。"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+
+class DiskRenderCache:
+    """
+    磁盘渲染缓存：每个缓存键对应一个zlib压缩的HTML文件。
+
+    除HTML字符串外也可以缓存 RenderResult，它以带前缀标记的JSON形式保存。
+
+    缓存目录按渲染器版本（默认为包的 __version__）划分命名空间，升级后旧结果
+    自动失效；插件集合等渲染选项已包含在缓存键中。写入采用“临时文件+重命名”，
+    多个进程可以安全地共享同一目录。
+
+    参数:
+        directory: 缓存根目录
+        namespace: 命名空间，默认使用包版本号
+        compress_level: zlib压缩级别
+    """
+
+    SUFFIX = '.html.z'
+    # HTML不会以NUL字符开头，以此区分序列化的 RenderResult
+    RESULT_PREFIX = '\0lad-result\0'
+
+    def __init__(self, directory, namespace=None, compress_level=6):
+        if namespace is None:
+            from . import __version__ as namespace
+        self.root = os.path.abspath(directory)
+        self.namespace = namespace
+        self.directory = os.path.join(self.root, namespace)
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self):
+        """返回磁盘缓存的命中和未命中次数。"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:] + self.SUFFIX)
+
+    def get(self, key, default=None):
+        """读取并解压缓存内容，文件缺失或损坏时返回 default。"""
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+            value = zlib.decompress(data).decode('utf-8', 'surrogatepass')
+        except (OSError, zlib.error, UnicodeDecodeError):
+            with self._lock:
+                self.misses += 1
+            return default
+        with self._lock:
+            self.hits += 1
+        if value.startswith(self.RESULT_PREFIX):
+            return RenderResult.from_json(value[len(self.RESULT_PREFIX):])
+        return value
+
+    def put(self, key, value):
+        """压缩后原子地写入缓存文件；磁盘错误只会让缓存失效，不影响渲染。"""
+        path = self._path(key)
+        if isinstance(value, RenderResult):
+            value = self.RESULT_PREFIX + value.to_json()
+        data = zlib.compress(value.encode('utf-8', 'surrogatepass'), self.compress_level)
+        try:
+            write_atomic(path, data)
+        except OSError:
+            pass
+
+    def clear(self):
+        """删除当前命名空间下的全部缓存文件。"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def purge_stale(self):
+        """删除其他命名空间（旧版本）留下的缓存目录。"""
+        if not os.path.isdir(self.root):
+            return
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name != self.namespace and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
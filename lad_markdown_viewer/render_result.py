@@ -0,0 +1,107 @@
+"""
+渲染结果模块
+
+RenderResult 汇总一次解析得到的全部信息：HTML、目录、front matter 元信息和
+Mermaid图表源码。需要大纲导航的调用方直接使用其中的目录，不必再次解析文档。
+"""
+import html as html_module
+import json
+import re
+import sys
+
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def html_to_text(fragment):
+    """去掉HTML标签并解码实体，得到标题等行内片段的纯文本。"""
+    return html_module.unescape(_TAG_RE.sub('', fragment)).strip()
+
+
+class RenderResult:
+    """
+    一次解析的渲染结果。
+
+    属性:
+        html: 渲染后的HTML
+        toc: 目录项列表 [(level, slug, text)]，text 为标题的行内HTML
+        metadata: YAML front matter 解析得到的字典（没有时为空字典）
+        mermaid_blocks: 按出现顺序排列的Mermaid图表源码
+    """
+    __slots__ = ('html', 'toc', 'metadata', 'mermaid_blocks')
+
+    def __init__(self, html, toc=None, metadata=None, mermaid_blocks=None):
+        self.html = html
+        self.toc = toc if toc is not None else []
+        self.metadata = metadata if metadata is not None else {}
+        self.mermaid_blocks = mermaid_blocks if mermaid_blocks is not None else []
+
+    def __str__(self):
+        return self.html
+
+    def __repr__(self):
+        return (f"RenderResult(html=<{len(self.html)} chars>, toc={len(self.toc)} items, "
+                f"metadata={list(self.metadata)}, mermaid_blocks={len(self.mermaid_blocks)})")
+
+    def __sizeof__(self):
+        # 供 RenderCache 按字节数限制容量：计入HTML以及目录、图表源码等字符串
+        size = object.__sizeof__(self) + sys.getsizeof(self.html)
+        size += sum(sys.getsizeof(slug) + sys.getsizeof(text) for _, slug, text in self.toc)
+        size += sum(sys.getsizeof(code) for code in self.mermaid_blocks)
+        return size + sys.getsizeof(json.dumps(self.metadata, ensure_ascii=False, default=str))
+
+    @classmethod
+    def concat(cls, results):
+        """按顺序合并分片渲染的结果（流式渲染时只有第一个分片带有元信息）。"""
+        parts = []
+        toc = []
+        metadata = {}
+        mermaid_blocks = []
+        for result in results:
+            parts.append(result.html)
+            toc.extend(result.toc)
+            mermaid_blocks.extend(result.mermaid_blocks)
+            if result.metadata and not metadata:
+                metadata = result.metadata
+        return cls(''.join(parts), toc, metadata, mermaid_blocks)
+
+    def outline(self):
+        """
+        以嵌套结构返回文档大纲，每个节点为：
+            {'level': 级别, 'slug': 锚点ID, 'title': 纯文本标题, 'children': [...]}
+        标题级别跳跃（如 h1 后直接是 h3）时，子节点挂在最近的更高级别标题下。
+        """
+        root = []
+        stack = []
+        for level, slug, text in self.toc:
+            node = {'level': level, 'slug': slug, 'title': html_to_text(text), 'children': []}
+            while stack and stack[-1]['level'] >= level:
+                stack.pop()
+            (stack[-1]['children'] if stack else root).append(node)
+            stack.append(node)
+        return root
+
+    def toc_html(self, max_level=6):
+        """生成嵌套 <ul> 目录导航，链接指向各标题的锚点。"""
+        def render(nodes):
+            items = []
+            for node in nodes:
+                if node['level'] > max_level:
+                    continue
+                children = render(node['children'])
+                # slug 与标题 id 属性的写法一致（已是转义后的文本），直接使用才能对应上
+                items.append(f'<li><a href="#{node["slug"]}">'
+                             f'{html_module.escape(node["title"])}</a>{children}</li>')
+            return f"<ul>{''.join(items)}</ul>" if items else ''
+        return render(self.outline())
+
+    def to_json(self):
+        """序列化为JSON字符串（用于磁盘缓存）。"""
+        return json.dumps({'html': self.html, 'toc': self.toc, 'metadata': self.metadata,
+                           'mermaid_blocks': self.mermaid_blocks},
+                          ensure_ascii=False, default=str)
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        return cls(data['html'], [tuple(item) for item in data['toc']], data['metadata'],
+                   data['mermaid_blocks'])
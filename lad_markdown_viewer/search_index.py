@@ -0,0 +1,482 @@
+"""
+全文搜索索引模块
+
+SearchIndex 为文档目录树中的Markdown文件建立按段落（标题）划分的倒排索引：
+- 英文、数字按单词切分（小写，snake_case 拆成多个词），中日韩文字按相邻两字切分（bigram），
+  单字查询按前缀匹配以该字开头的词；
+- 段落和锚点取自 MarkdownProcessor 渲染得到的目录（TocRenderer 生成的标题ID），
+  带行内标记的标题和 Setext 标题都与页面中的 id 完全一致，搜索结果可以直接跳转到 /?md=...#slug；
+  索引的是渲染后的纯文本，Markdown标记本身不会被当作词；
+- 按段落计算 BM25 得分，标题中出现的词额外加权；
+- 建立索引时为每个段落保存一段纯文本摘录，搜索结果的摘要直接由摘录生成，查询时不读取、不渲染文件；
+- update() 按 mtime/size 跳过未变化的文件，变化的文件再比较内容哈希，只重新切分真正修改过的文件；
+- 倒排表为扁平的整数列表，索引以zlib压缩的JSON原子写入磁盘，读取时无需重建；
+  格式或渲染器版本变化时自动重建。
+
+    lad-markdown-index DOCS_DIR --index DOCS_DIR/.lad-search-index [-q 关键词]
+"""
+import argparse
+import hashlib
+import heapq
+import html as html_module
+import json
+import math
+import os
+import re
+import sys
+import time
+import zlib
+from bisect import bisect_left
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from .batch_render import iter_markdown_files
+from .file_utils import write_atomic
+
+INDEX_FORMAT = 4
+INDEX_NAME = '.lad-search-index'
+# 标题中的词按出现在正文中的多少次计算
+HEADING_WEIGHT = 3
+BM25_K1 = 1.2
+BM25_B = 0.75
+SNIPPET_WIDTH = 120
+# 每个段落保存的正文摘录长度（字符数），摘要从中截取
+EXCERPT_WIDTH = 400
+# 待索引的文件少于该数量时不启动进程池
+PARALLEL_THRESHOLD = 64
+# 已删除的文档编号超过该比例时，更新后压缩倒排表
+COMPACT_RATIO = 0.25
+
+_CJK = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff'
+TOKEN_RE = re.compile(f'[{_CJK}]+|[0-9a-z\u00c0-\u024f]+')
+CJK_RE = re.compile(f'[{_CJK}]')
+TAG_RE = re.compile(r'<[^>]*>')
+SPACE_RE = re.compile(r'\s+')
+
+_processor = None
+
+
+def _get_processor():
+    # 与链接图相同：不使用默认实例，Mermaid预渲染等设置与索引的文本无关，
+    # 其渲染在统计中单独归类，不计入页面渲染
+    global _processor
+    if _processor is None:
+        from .markdown_processor import MarkdownProcessor
+        _processor = MarkdownProcessor(render_kind='search_index')
+    return _processor
+
+
+def index_signature():
+    """索引格式和渲染器版本，决定段落划分和标题ID的生成方式，变化时索引重建。"""
+    from . import __version__
+    return [__version__, INDEX_FORMAT] + list(_get_processor().cache_signature)
+
+
+def tokenize(text):
+    """把文本切分为词列表：英文单词小写，中日韩文字切分为相邻两字（单独一个字时保留单字）。"""
+    tokens = []
+    for run in TOKEN_RE.findall(text.lower()):
+        if CJK_RE.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(a + b for a, b in zip(run, run[1:]))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def html_text(fragment):
+    """去掉HTML标签并解码实体引用，连续空白合并为一个空格。"""
+    return SPACE_RE.sub(' ', html_module.unescape(TAG_RE.sub(' ', fragment))).strip()
+
+
+def split_sections(result):
+    """
+    按渲染结果的目录切分文档，返回 [(slug, 标题, 级别, 正文纯文本)]。
+
+    result 为 MarkdownProcessor.render 返回的 RenderResult。每个目录项在HTML中对应
+    <hN id="slug">，段落从该标题之后到下一个目录项的标题为止；第一个标题之前的内容
+    作为一个没有标题的段落。原始HTML中不在目录里的标题不切分段落。
+    """
+    html = result.html
+    boundaries = []
+    position = 0
+    for level, slug, text in result.toc:
+        tag = f'<h{level} id="{slug}">'
+        found = html.find(tag, position)
+        if found < 0:
+            continue
+        end = html.find(f'</h{level}>', found)
+        position = len(html) if end < 0 else end + 5
+        boundaries.append((found, position, slug, html_text(text), level))
+    sections = []
+    body = html[:boundaries[0][0]] if boundaries else html
+    if html_text(body):
+        sections.append(('', '', 0, html_text(body)))
+    for i, (_, body_start, slug, title, level) in enumerate(boundaries):
+        body_end = boundaries[i + 1][0] if i + 1 < len(boundaries) else len(html)
+        sections.append((slug, title, level, html_text(html[body_start:body_end])))
+    return sections
+
+
+def render_sections(text):
+    """渲染Markdown文本并按目录切分，见 split_sections。"""
+    return split_sections(_get_processor().render(text))
+
+
+def index_file(path, known_digest=None):
+    """
+    读取、渲染并切分单个文件（可在工作进程中执行），返回 (内容哈希, 段落列表, 倒排表)。
+
+    段落为 [slug, 标题, 级别, 词数, 正文摘录]，倒排表为 {词: [段落序号, 词频, ...]}；标题中的词
+    按出现 HEADING_WEIGHT 次计算。
+    内容哈希与 known_digest 相同时不再切分，段落列表和倒排表为 None。
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if digest == known_digest:
+        return digest, None, None
+    sections = render_sections(data.decode('utf-8-sig', 'replace'))
+    meta = []
+    postings = {}
+    for number, (slug, title, level, text) in enumerate(sections):
+        counts = Counter(tokenize(text))
+        for token in tokenize(title):
+            counts[token] += HEADING_WEIGHT
+        meta.append([slug, title, level, sum(counts.values()), text[:EXCERPT_WIDTH]])
+        for token, count in counts.items():
+            postings.setdefault(token, []).extend((number, count))
+    return digest, meta, postings
+
+
+def make_snippet(text, tokens):
+    """text 中第一处包含查询词的位置附近的文本（截取到 SNIPPET_WIDTH 个字符左右）。"""
+    lowered = text.lower()
+    positions = [lowered.find(token) for token in tokens if token in lowered]
+    if not positions:
+        return text[:SNIPPET_WIDTH] + ('…' if len(text) > SNIPPET_WIDTH else '')
+    begin = max(0, min(positions) - SNIPPET_WIDTH // 3)
+    return ('…' if begin else '') + text[begin:begin + SNIPPET_WIDTH] + \
+        ('…' if begin + SNIPPET_WIDTH < len(text) else '')
+
+
+def _index_file_safe(path, known_digest):
+    try:
+        return index_file(path, known_digest), None
+    except OSError as e:
+        return None, str(e)
+
+
+class SearchIndex:
+    """
+    文档目录树的全文索引。
+
+    参数:
+        root_dir: 文档根目录，索引中的路径都相对于该目录
+        path: 索引文件路径（可选），指定时 load/save 使用该文件
+
+    每个文档有一个编号，倒排表为 {词: [文档编号, 段落序号, 词频, ...]} 的扁平列表。
+    文档修改或删除时只把旧编号记为已删除（查询时跳过），新内容以新编号追加到倒排表末尾，
+    不需要在倒排表中查找旧记录；已删除的编号超过 COMPACT_RATIO 时 update() 结束前压缩，
+    索引不保存到磁盘时倒排表和文档频率也不会随编辑无限增长。
+    """
+
+    def __init__(self, root_dir, path=None):
+        self.root_dir = os.path.realpath(root_dir)
+        self.path = path
+        # 每个编号对应 [相对路径, mtime_ns, size, 内容哈希, 段落列表]，已删除的为 None
+        self.docs = []
+        self.postings = {}
+        self._by_path = {}
+        self._deleted = set()
+        self._vocabulary = None
+        self._section_count = 0
+        self._total_length = 0
+
+    @classmethod
+    def open(cls, root_dir, path):
+        """读取已有的索引文件；文件不存在、损坏或格式版本不同时返回空索引。"""
+        index = cls(root_dir, path)
+        index.load()
+        return index
+
+    def __len__(self):
+        return len(self._by_path)
+
+    def __contains__(self, rel_path):
+        return rel_path in self._by_path
+
+    @property
+    def section_count(self):
+        return self._section_count
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = json.loads(zlib.decompress(f.read()).decode('utf-8'))
+        except (OSError, ValueError, zlib.error):
+            return False
+        if data.get('signature') != index_signature():
+            return False
+        self.docs = data['docs']
+        self.postings = data['postings']
+        self._by_path = {}
+        self._deleted = set()
+        self._section_count = self._total_length = 0
+        for doc_no, doc in enumerate(self.docs):
+            if doc is None:
+                self._deleted.add(doc_no)
+                continue
+            self._by_path[doc[0]] = doc_no
+            self._section_count += len(doc[4])
+            self._total_length += sum(section[3] for section in doc[4])
+        self._vocabulary = None
+        return True
+
+    def save(self, path=None):
+        path = path or self.path
+        if path is None:
+            raise ValueError("未指定索引文件路径")
+        data = json.dumps({'signature': index_signature(), 'docs': self.docs, 'postings': self.postings},
+                          ensure_ascii=False, separators=(',', ':'))
+        write_atomic(path, zlib.compress(data.encode('utf-8'), 6))
+
+    def compact(self):
+        """去掉已删除文档的倒排记录并重新编号（耗时与索引大小成正比）。"""
+        if not self._deleted:
+            return
+        numbers = {}
+        docs = []
+        for doc_no, doc in enumerate(self.docs):
+            if doc is not None:
+                numbers[doc_no] = len(docs)
+                docs.append(doc)
+        postings = {}
+        for term, items in self.postings.items():
+            it = iter(items)
+            kept = []
+            for doc_no, number, tf in zip(it, it, it):
+                if doc_no in numbers:
+                    kept.extend((numbers[doc_no], number, tf))
+            if kept:
+                postings[term] = kept
+        self.docs = docs
+        self.postings = postings
+        self._by_path = {doc[0]: doc_no for doc_no, doc in enumerate(docs)}
+        self._deleted = set()
+        self._vocabulary = None
+
+    def _add(self, rel_path, stat, digest, sections, doc_postings):
+        doc_no = len(self.docs)
+        self.docs.append([rel_path, stat.st_mtime_ns, stat.st_size, digest, sections])
+        self._by_path[rel_path] = doc_no
+        for term, items in doc_postings.items():
+            target = self.postings.get(term)
+            if target is None:
+                target = self.postings[term] = []
+                self._vocabulary = None
+            for i in range(0, len(items), 2):
+                target.extend((doc_no, items[i], items[i + 1]))
+        self._section_count += len(sections)
+        self._total_length += sum(section[3] for section in sections)
+
+    def _remove(self, rel_path):
+        doc_no = self._by_path.pop(rel_path)
+        sections = self.docs[doc_no][4]
+        self.docs[doc_no] = None
+        self._deleted.add(doc_no)
+        self._section_count -= len(sections)
+        self._total_length -= sum(section[3] for section in sections)
+
+    def update(self, jobs=None):
+        """
+        同步索引与磁盘上的文档，返回统计信息字典。
+
+        mtime 和 size 都未变化的文件直接跳过；变化的文件先比较内容哈希，哈希相同时
+        只更新文件状态，不同时重新切分。已删除的文件从索引中移除。
+        等价于 apply_update(prepare_update(jobs))。
+        """
+        return self.apply_update(self.prepare_update(jobs))
+
+    def prepare_update(self, jobs=None):
+        """
+        update 的第一步：检查文件状态并重新切分变化的文件，不修改索引，返回值交给 apply_update。
+
+        耗时的渲染都在这一步；多线程共享索引时可以不持有锁执行（同一时间只能有一个更新）。
+        """
+        stats = {'total': 0, 'indexed': 0, 'skipped': 0, 'removed': 0, 'failed': 0}
+        start = time.perf_counter()
+        seen = set()
+        pending = []
+        for rel_path in iter_markdown_files(self.root_dir):
+            rel_path = rel_path.replace(os.sep, '/')
+            seen.add(rel_path)
+            stats['total'] += 1
+            try:
+                st = os.stat(os.path.join(self.root_dir, rel_path))
+            except OSError:
+                continue
+            doc_no = self._by_path.get(rel_path)
+            if doc_no is not None:
+                doc = self.docs[doc_no]
+                if doc[1] == st.st_mtime_ns and doc[2] == st.st_size:
+                    stats['skipped'] += 1
+                    continue
+            pending.append((rel_path, st))
+
+        removed = [rel_path for rel_path in self._by_path if rel_path not in seen]
+        paths = [os.path.join(self.root_dir, rel_path) for rel_path, _ in pending]
+        known = [self.docs[self._by_path[rel_path]][3] if rel_path in self._by_path else None
+                 for rel_path, _ in pending]
+        if len(pending) >= PARALLEL_THRESHOLD and jobs != 1:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                chunksize = max(1, min(64, len(pending) // ((jobs or os.cpu_count() or 1) * 4)))
+                results = list(executor.map(_index_file_safe, paths, known, chunksize=chunksize))
+        else:
+            results = list(map(_index_file_safe, paths, known))
+        return {'stats': stats, 'start': start, 'removed': removed, 'pending': pending, 'results': results}
+
+    def apply_update(self, update):
+        """update 的第二步：把 prepare_update 的结果写入索引，返回统计信息字典。"""
+        stats = update['stats']
+        for rel_path in update['removed']:
+            if rel_path in self._by_path:
+                self._remove(rel_path)
+                stats['removed'] += 1
+        for (rel_path, st), (result, error) in zip(update['pending'], update['results']):
+            if error is not None:
+                stats['failed'] += 1
+                print(f"❌ 索引失败：{rel_path}：{error}", file=sys.stderr)
+                continue
+            digest, sections, doc_postings = result
+            if sections is None:
+                # 只是 touch 或保存了相同内容，更新文件状态即可
+                doc = self.docs[self._by_path[rel_path]]
+                doc[1], doc[2] = st.st_mtime_ns, st.st_size
+                stats['skipped'] += 1
+                continue
+            if rel_path in self._by_path:
+                self._remove(rel_path)
+            self._add(rel_path, st, digest, sections, doc_postings)
+            stats['indexed'] += 1
+        if len(self._deleted) > COMPACT_RATIO * len(self.docs):
+            self.compact()
+        stats['changed'] = bool(update['pending'] or stats['removed'])
+        stats['seconds'] = time.perf_counter() - update['start']
+        return stats
+
+    def _expand(self, token):
+        """单个中日韩文字按前缀匹配所有以它开头的两字词。"""
+        if not (len(token) == 1 and CJK_RE.match(token)):
+            return [token] if token in self.postings else []
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        vocabulary = self._vocabulary
+        position = bisect_left(vocabulary, token)
+        matches = []
+        while position < len(vocabulary) and vocabulary[position].startswith(token):
+            matches.append(vocabulary[position])
+            position += 1
+        return matches
+
+    def search(self, query, limit=20, snippets=True):
+        """
+        搜索 query，按段落返回得分最高的 limit 条结果（按得分降序）。
+
+        每条结果为字典：md（相对路径）、slug、title、level、score，
+        snippets 为 True 时另有 snippet（由建立索引时保存的段落摘录生成）。
+        """
+        hits = []
+        for hit, excerpt, terms in self.search_sections(query, limit):
+            if snippets:
+                hit['snippet'] = make_snippet(excerpt, terms)
+            hits.append(hit)
+        return hits
+
+    def search_sections(self, query, limit=20):
+        """
+        与 search 相同，但返回 [(结果字典, 段落摘录, 命中的查询词)]，不生成摘要。
+
+        多线程共享索引时只需在持有锁时调用它，摘要可在锁外用 make_snippet 生成。
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or not self._section_count:
+            return []
+        section_count = self._section_count
+        k1 = BM25_K1
+        length_scale = k1 * BM25_B / (self._total_length / section_count or 1)
+        length_base = k1 * (1 - BM25_B)
+        docs = self.docs
+        deleted = self._deleted
+        scores = {}
+        matched = {}
+        for bit, token in enumerate(tokens):
+            mask = 1 << bit
+            for term in self._expand(token):
+                items = self.postings[term]
+                # 文档频率包含已删除的记录，压缩前略微偏大（超过 COMPACT_RATIO 前）
+                df = len(items) // 3
+                idf = math.log(1 + (section_count - df + 0.5) / (df + 0.5)) * (k1 + 1)
+                it = iter(items)
+                for doc_no, number, tf in zip(it, it, it):
+                    if doc_no in deleted:
+                        continue
+                    length = docs[doc_no][4][number][3]
+                    key = (doc_no, number)
+                    scores[key] = scores.get(key, 0.0) + idf * tf / (tf + length_base + length_scale * length)
+                    matched[key] = matched.get(key, 0) | mask
+        # 命中的查询词越多排名越靠前
+        total = len(tokens)
+        ranked = heapq.nlargest(limit, ((score * (bin(matched[key]).count('1') / total) ** 2, key)
+                                        for key, score in scores.items()))
+        results = []
+        for score, (doc_no, number) in ranked:
+            slug, title, level, _, excerpt = docs[doc_no][4][number]
+            hit = {'md': docs[doc_no][0], 'slug': slug, 'title': title, 'level': level,
+                   'score': round(score, 4)}
+            mask = matched[(doc_no, number)]
+            results.append((hit, excerpt, [token for bit, token in enumerate(tokens) if mask >> bit & 1]))
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='lad-markdown-index',
+                                     description='为Markdown文档目录树建立全文搜索索引')
+    parser.add_argument('root_dir', help='Markdown文档目录')
+    parser.add_argument('--index', default=None,
+                        help=f'索引文件路径（默认为文档目录下的 {INDEX_NAME}）')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='并行工作进程数（默认为CPU核数）')
+    parser.add_argument('--force', action='store_true', help='忽略已有索引，全部重新建立')
+    parser.add_argument('-q', '--query', default=None, help='建立索引后搜索该关键词')
+    parser.add_argument('-n', '--limit', type=int, default=10, help='显示的搜索结果数')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root_dir):
+        print(f"❌ 目录不存在：{args.root_dir}")
+        return 1
+    path = args.index or os.path.join(args.root_dir, INDEX_NAME)
+    index = SearchIndex(args.root_dir, path) if args.force else SearchIndex.open(args.root_dir, path)
+    stats = index.update(jobs=args.jobs)
+    if stats['changed'] or args.force:
+        index.save()
+    print(f"✅ 共 {stats['total']} 个文件：索引 {stats['indexed']}，跳过 {stats['skipped']}，"
+          f"移除 {stats['removed']}，失败 {stats['failed']}")
+    print(f"⏱️ 耗时 {stats['seconds']:.2f}s，{index.section_count} 个段落，索引文件：{path}")
+
+    if args.query:
+        start = time.perf_counter()
+        hits = index.search(args.query, limit=args.limit)
+        print(f"🔍 “{args.query}”：{len(hits)} 条结果（{(time.perf_counter() - start) * 1000:.1f} ms）")
+        for hit in hits:
+            anchor = f"#{hit['slug']}" if hit['slug'] else ''
+            print(f"  {hit['score']:7.3f}  {hit['md']}{anchor}  {hit['title']}")
+            if hit['snippet']:
+                print(f"           {hit['snippet']}")
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+文档段落索引模块
+
+记录文档中各级标题所在的行号（有序列表），按行号查找所在段落只需一次二分查找；
+编辑某个区间后只扫描新写入的行并平移其后的行号，无需重新扫描整个文档。
+供 tkinter 编辑器按标题拆分、保存段落使用。
+"""
+import re
+from bisect import bisect_left, bisect_right
+
+HEADING_RE = re.compile(r'^(#{1,6})[ \t]+(.+?)[ \t]*$')
+FENCE_MARKER_RE = re.compile(r'^[ \t]{0,3}(```|~~~)')
+
+
+def _scan(lines, first_line, max_level, in_fence=False):
+    """
+    扫描行序列，返回 (标题行号, 标题级别, 标题文本, 围栏标记行号) 四个列表。
+
+    围栏代码块中以 # 开头的行（如shell注释）不算标题。
+    """
+    starts, levels, titles, fences = [], [], [], []
+    for offset, line in enumerate(lines):
+        if FENCE_MARKER_RE.match(line):
+            fences.append(first_line + offset)
+            in_fence = not in_fence
+            continue
+        if in_fence or not line.startswith('#'):
+            continue
+        match = HEADING_RE.match(line.rstrip('\r\n'))
+        if match and len(match.group(1)) <= max_level:
+            starts.append(first_line + offset)
+            levels.append(len(match.group(1)))
+            titles.append(match.group(2))
+    return starts, levels, titles, fences
+
+
+class SectionIndex:
+    """
+    标题段落索引。
+
+    每个段落从一个标题行开始，到下一个（不超过 max_level 级的）标题行之前结束，
+    最后一个段落到文档末尾结束。
+
+    参数:
+        lines: 文档的行列表（是否带换行符均可）
+        max_level: 参与分段的最大标题级别（默认只按 #、##、### 分段）
+
+    属性:
+        starts: 各段落标题所在的行号（升序）
+        levels: 各段落的标题级别
+        titles: 各段落的标题文本（不含 # 前缀）
+        line_count: 文档总行数
+    """
+
+    def __init__(self, lines=(), max_level=3):
+        self.max_level = max_level
+        self.rebuild(lines)
+
+    @classmethod
+    def from_text(cls, text, max_level=3):
+        return cls(text.splitlines(True), max_level=max_level)
+
+    def rebuild(self, lines):
+        """完整扫描一次文档，重建索引；lines 需要支持 len()。"""
+        self.starts, self.levels, self.titles, self._fences = _scan(lines, 0, self.max_level)
+        self.line_count = len(lines)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def heading(self, index):
+        """段落的标题行文本，例如 '## 标题'。"""
+        return '#' * self.levels[index] + ' ' + self.titles[index]
+
+    def headings(self):
+        return [self.heading(i) for i in range(len(self.starts))]
+
+    def section_at(self, line):
+        """行号所在段落的序号；位于第一个标题之前时返回 -1。"""
+        return bisect_right(self.starts, line) - 1
+
+    def section_range(self, index):
+        """段落的行号范围 (start, end)，end 不包含在内。"""
+        start = self.starts[index]
+        end = self.starts[index + 1] if index + 1 < len(self.starts) else self.line_count
+        return start, end
+
+    def next_heading(self, line):
+        """line 之后（不含）第一个标题的行号，没有时返回文档总行数。"""
+        index = bisect_right(self.starts, line)
+        return self.starts[index] if index < len(self.starts) else self.line_count
+
+    def find(self, title, level=None):
+        """按标题文本查找第一个匹配的段落序号，找不到时返回 -1。"""
+        for index, candidate in enumerate(self.titles):
+            if candidate == title and (level is None or self.levels[index] == level):
+                return index
+        return -1
+
+    def apply_edit(self, start, end, new_lines, lines):
+        """
+        文档的 [start, end) 行被替换为 new_lines 后更新索引。
+
+        只扫描新写入的行，其后的标题行号整体平移。被替换的行或新行中含有围栏代码块
+        标记时，其后内容是否处于代码块中可能改变，此时用编辑后的完整行列表 lines
+        重建索引。
+        """
+        new_lines = list(new_lines)
+        fence_left = bisect_left(self._fences, start)
+        fence_right = bisect_left(self._fences, end)
+        # start 之前出现过奇数个围栏标记，说明新行位于代码块内
+        starts, levels, titles, fences = _scan(new_lines, start, self.max_level,
+                                               in_fence=fence_left % 2 == 1)
+        if fences or fence_left != fence_right:
+            self.rebuild(lines)
+            return
+        delta = len(new_lines) - (end - start)
+        left = bisect_left(self.starts, start)
+        right = bisect_left(self.starts, end)
+        self.starts[left:] = starts + [line + delta for line in self.starts[right:]]
+        self.levels[left:right] = levels
+        self.titles[left:right] = titles
+        self._fences[fence_right:] = [line + delta for line in self._fences[fence_right:]]
+        self.line_count += delta
@@ -73,6 +73,12 @@ setup(
             'flask>=2.0.0',
             'flask-cors>=3.0.0',
         ],
+        'asgi': [
+            'uvicorn>=0.20.0',
+        ],
+        'watch': [
+            'watchdog>=2.0.0',
+        ],
         'dev': [
             'pytest>=6.0.0',
             'pytest-cov>=2.10.0',
@@ -86,11 +92,16 @@ setup(
         'console_scripts': [
             'lad-markdown-viewer=lad_markdown_viewer.ladmark_viewer:main',
             'lad-markdown-web=lad_markdown_viewer.web_viewer:main',
+            'lad-markdown-asgi=lad_markdown_viewer.asgi_viewer:main',
+            'lad-markdown-render=lad_markdown_viewer.batch_render:main',
+            'lad-markdown-assets=lad_markdown_viewer.assets:main',
+            'lad-markdown-index=lad_markdown_viewer.search_index:main',
+            'lad-markdown-check-links=lad_markdown_viewer.link_graph:main',
         ],
     },
     include_package_data=True,
     package_data={
-        'lad_markdown_viewer': ['*.md', '*.txt', '*.html'],
+        'lad_markdown_viewer': ['*.md', '*.txt', '*.html', 'static/*', 'static/vendor/*'],
     },
     keywords=[
         'markdown', 'viewer', 'renderer', 'html', 'desktop', 'web', 
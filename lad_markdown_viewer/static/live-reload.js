@@ -0,0 +1,22 @@
+// LAD Markdown Viewer：监视模式下通过 Server-Sent Events 接收文档更新
+// 配置来自 window.ladLiveReload：
+//   url   事件流地址（含文档路径和页面对应的版本号）
+// 更新以DOM补丁的形式应用（window.ladApplyPatches），未变化的块不受影响，滚动位置保持不变；
+// 服务端无法提供补丁（版本过旧或服务已重启）时整页刷新。
+(function() {
+    var config = window.ladLiveReload;
+    if (!config || typeof EventSource === 'undefined') return;
+    var source = new EventSource(config.url);
+    source.addEventListener('patch', function(e) {
+        var data = JSON.parse(e.data);
+        if (window.ladApplyPatches) {
+            window.ladApplyPatches(data.patches);
+        } else {
+            window.location.reload();
+        }
+    });
+    source.addEventListener('reload', function() {
+        source.close();
+        window.location.reload();
+    });
+})();
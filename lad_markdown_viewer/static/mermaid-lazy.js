@@ -0,0 +1,73 @@
+// LAD Markdown Viewer：Mermaid图表按需渲染，图表接近视口时才进行布局
+// 配置来自 window.ladMermaidConfig：
+//   lazy        是否按需渲染（false 时页面加载后一次性渲染全部图表）
+//   rootMargin  IntersectionObserver 的预取边距，例如 "200px 0px"
+//   mermaid     传给 mermaid.initialize 的额外配置
+(function() {
+    var config = window.ladMermaidConfig || {};
+    var observer = null;
+
+    function renderNodes(nodes) {
+        if (!nodes.length || typeof mermaid === 'undefined') return;
+        try {
+            mermaid.init(undefined, nodes);
+        } catch (e) {
+            console.error('Mermaid render error:', e);
+        }
+    }
+
+    function pendingNodes(root) {
+        var nodes = (root || document).querySelectorAll('.mermaid');
+        var pending = [];
+        for (var i = 0; i < nodes.length; i++) {
+            // 已渲染（包括服务端预渲染的SVG）的图表带有 data-processed 属性
+            if (!nodes[i].getAttribute('data-processed')) pending.push(nodes[i]);
+        }
+        return pending;
+    }
+
+    function getObserver() {
+        if (observer === null) {
+            observer = new IntersectionObserver(function(entries) {
+                var visible = [];
+                entries.forEach(function(entry) {
+                    if (entry.isIntersecting) {
+                        observer.unobserve(entry.target);
+                        visible.push(entry.target);
+                    }
+                });
+                renderNodes(visible);
+            }, { rootMargin: config.rootMargin || '200px 0px' });
+        }
+        return observer;
+    }
+
+    // 渲染 root 内尚未渲染的图表；增量补丁插入新节点后也调用它
+    window.ladRenderMermaid = function(root) {
+        var nodes = pendingNodes(root);
+        if (config.lazy === false || !('IntersectionObserver' in window)) {
+            renderNodes(nodes);
+            return;
+        }
+        var io = getObserver();
+        nodes.forEach(function(node) { io.observe(node); });
+    };
+
+    document.addEventListener('DOMContentLoaded', function() {
+        if (typeof mermaid === 'undefined') return;
+        var options = {
+            startOnLoad: false,
+            theme: 'default',
+            securityLevel: 'loose',
+            flowchart: { htmlLabels: true, useMaxWidth: true },
+        };
+        var extra = config.mermaid || {};
+        for (var key in extra) options[key] = extra[key];
+        try {
+            mermaid.initialize(options);
+        } catch (e) {
+            console.error('Mermaid initialization error:', e);
+        }
+        window.ladRenderMermaid(document);
+    });
+})();
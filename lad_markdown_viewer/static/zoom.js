@@ -0,0 +1,99 @@
+// LAD Markdown Viewer：图片和Mermaid图的放大缩小、拖拽平移控件
+document.addEventListener('DOMContentLoaded', function() {
+    function createZoomOverlay(contentElem) {
+        let overlay = document.createElement('div');
+        overlay.className = 'zoom-overlay';
+        let container = document.createElement('div');
+        container.style.position = 'relative';
+        container.style.display = 'inline-block';
+        // 缩放控件
+        let controls = document.createElement('div');
+        controls.className = 'zoom-controls';
+        let btnPlus = document.createElement('button');
+        btnPlus.className = 'zoom-btn'; btnPlus.textContent = '+';
+        let btnMinus = document.createElement('button');
+        btnMinus.className = 'zoom-btn'; btnMinus.textContent = '-';
+        let btnReset = document.createElement('button');
+        btnReset.className = 'zoom-btn'; btnReset.textContent = '重置';
+        controls.appendChild(btnPlus);
+        controls.appendChild(btnMinus);
+        controls.appendChild(btnReset);
+        let scale = 1;
+        let panX = 0, panY = 0;
+        let isDragging = false, lastX = 0, lastY = 0;
+        function applyTransform() {
+            contentElem.style.transform = `scale(${scale}) translate(${panX}px, ${panY}px)`;
+            contentElem.style.transformOrigin = 'center center';
+        }
+        btnPlus.onclick = function(e) { e.stopPropagation(); scale *= 1.2; applyTransform(); };
+        btnMinus.onclick = function(e) { e.stopPropagation(); scale /= 1.2; applyTransform(); };
+        btnReset.onclick = function(e) { e.stopPropagation(); scale = 1; panX = 0; panY = 0; applyTransform(); };
+        // 拖拽平移（事件全部绑定在overlay内部，避免外部影响）
+        contentElem.addEventListener('mousedown', function(e) {
+            isDragging = true;
+            lastX = e.clientX;
+            lastY = e.clientY;
+            contentElem.style.cursor = 'grab';
+            e.stopPropagation();
+            e.preventDefault();
+        });
+        overlay.addEventListener('mousemove', function(e) {
+            if (isDragging) {
+                panX += (e.clientX - lastX);
+                panY += (e.clientY - lastY);
+                lastX = e.clientX;
+                lastY = e.clientY;
+                applyTransform();
+            }
+        });
+        // 只允许点击overlay空白区域且非拖拽时关闭
+        overlay.addEventListener('mousedown', function(e) {
+            overlay._maybeClose = (e.target === overlay);
+        });
+        // mouseup全局监听，setTimeout确保isDragging已重置
+        document.addEventListener('mouseup', function(e) {
+            if (isDragging) {
+                isDragging = false;
+                contentElem.style.cursor = 'zoom-in';
+            }
+            setTimeout(function() {
+                if (!isDragging && overlay._maybeClose && e.target === overlay) {
+                    document.body.removeChild(overlay);
+                }
+            }, 0);
+        });
+        // 内容
+        contentElem.style.boxShadow = '0 4px 32px rgba(0,0,0,0.3)';
+        contentElem.style.borderRadius = '8px';
+        contentElem.style.background = '#fff';
+        contentElem.style.transition = 'transform 0.2s';
+        applyTransform();
+        container.appendChild(controls);
+        container.appendChild(contentElem);
+        overlay.appendChild(container);
+        return overlay;
+    }
+    document.body.addEventListener('click', function(e) {
+        // 图片放大
+        let img = e.target.closest('.markdown-body img');
+        if (img) {
+            if (img.classList.contains('zoomed')) return;
+            let bigImg = document.createElement('img');
+            bigImg.src = img.src;
+            bigImg.className = img.className + ' zoomed';
+            let overlay = createZoomOverlay(bigImg);
+            document.body.appendChild(overlay);
+            return;
+        }
+        // Mermaid图放大
+        let mermaidDiv = e.target.closest('.markdown-body .mermaid');
+        if (mermaidDiv) {
+            if (mermaidDiv.classList.contains('zoomed')) return;
+            let bigDiv = document.createElement('div');
+            bigDiv.innerHTML = mermaidDiv.innerHTML;
+            bigDiv.className = mermaidDiv.className + ' zoomed';
+            let overlay = createZoomOverlay(bigDiv);
+            document.body.appendChild(overlay);
+        }
+    }, false);
+});
@@ -0,0 +1,232 @@
+"""
+撤销/重做历史模块
+
+UndoHistory 为单个文档记录编辑历史。每条记录只保存被修改的行（去掉新旧内容相同的首尾行），
+总大小超过 max_bytes 时从最早的记录开始淘汰。指定 journal_path 时每次操作追加一行JSON
+到日志文件，程序崩溃后可用 UndoHistory.open 恢复历史。
+
+记录的编辑可以直接作用于 DocumentBuffer（或任何具有 replace(start, end, lines) 方法、
+支持 len() 的对象）。
+"""
+import json
+import os
+from collections import deque
+from contextlib import contextmanager
+
+from .file_utils import write_atomic
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+JOURNAL_SUFFIX = '.undo.jsonl'
+
+
+def compact_edit(start, old_lines, new_lines):
+    """去掉新旧内容中相同的首尾行，返回 (起始行, 旧行, 新行)。"""
+    old_lines = list(old_lines)
+    new_lines = list(new_lines)
+    limit = min(len(old_lines), len(new_lines))
+    prefix = 0
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+    return (start + prefix, old_lines[prefix:len(old_lines) - suffix],
+            new_lines[prefix:len(new_lines) - suffix])
+
+
+def _edits_size(edits):
+    return sum(len(line.encode('utf-8', 'surrogatepass'))
+               for _, old_lines, new_lines in edits for line in old_lines + new_lines)
+
+
+class UndoHistory:
+    """
+    单个文档的撤销/重做历史。
+
+    一次用户操作可能包含多处编辑（例如修改段落并追加编辑日志），在 group() 中记录的编辑
+    作为一个整体撤销和重做。
+
+    参数:
+        max_bytes: 撤销历史的总大小上限（按UTF-8字节数计），超出时淘汰最早的记录；
+            最新的一条记录总会保留
+        journal_path: 日志文件路径（可选）
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, journal_path=None):
+        self.max_bytes = max_bytes
+        self.journal_path = journal_path
+        self._undo = deque()
+        self._redo = []
+        self._bytes = 0
+        self._group = None
+        self._group_lines = None
+        self._journal_bytes = 0
+        self.evicted = 0
+
+    @classmethod
+    def open(cls, journal_path, line_count, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        从日志文件恢复历史。
+
+        日志最后记录的文档行数与 line_count 不一致时（文件在此期间被其他程序修改过），
+        历史不再可用，返回空的历史并清空日志。
+        """
+        history = cls(max_bytes=max_bytes, journal_path=journal_path)
+        records = []
+        try:
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # 崩溃时最后一行可能只写了一半
+                        break
+        except FileNotFoundError:
+            return history
+        if records and records[-1].get('lines') == line_count:
+            for record in records:
+                op = record['op']
+                if op == 'do':
+                    history._push([tuple(edit) for edit in record['edits']])
+                    history._redo.clear()
+                elif op == 'undo' and history._undo:
+                    history._redo.append(history._pop_undo())
+                elif op == 'redo' and history._redo:
+                    history._push(history._redo.pop())
+        history._rewrite_journal(line_count)
+        return history
+
+    def __len__(self):
+        return len(self._undo)
+
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def _push(self, edits):
+        self._undo.append(edits)
+        self._bytes += _edits_size(edits)
+        while self._bytes > self.max_bytes and len(self._undo) > 1:
+            self._bytes -= _edits_size(self._undo.popleft())
+            self.evicted += 1
+
+    def _pop_undo(self):
+        edits = self._undo.pop()
+        self._bytes -= _edits_size(edits)
+        return edits
+
+    @contextmanager
+    def group(self):
+        """在 with 块中记录的编辑合并为一条历史记录。"""
+        if self._group is not None:
+            yield
+            return
+        self._group = []
+        self._group_lines = None
+        try:
+            yield
+        finally:
+            edits, self._group = self._group, None
+            self._commit(edits, self._group_lines)
+
+    def record(self, start, old_lines, new_lines, line_count=None):
+        """
+        记录一次编辑：[start, start+len(old_lines)) 行被替换为 new_lines。
+
+        line_count 为编辑后的文档行数，写入日志用于恢复时校验（使用日志时必须提供）。
+        """
+        edit = compact_edit(start, old_lines, new_lines)
+        if not edit[1] and not edit[2]:
+            return
+        if self._group is not None:
+            self._group.append(edit)
+            self._group_lines = line_count
+        else:
+            self._commit([edit], line_count)
+
+    def _commit(self, edits, line_count):
+        if not edits:
+            return
+        self._push(edits)
+        self._redo.clear()
+        self._log({'op': 'do', 'edits': edits, 'lines': line_count})
+
+    def undo(self, document):
+        """
+        撤销最近一条记录，返回实际执行的编辑 [(start, end, lines)]（按执行顺序），
+        调用方可据此更新段落索引；没有可撤销的记录时返回 None。
+        """
+        if not self._undo:
+            return None
+        edits = self._pop_undo()
+        applied = []
+        for start, old_lines, new_lines in reversed(edits):
+            end = start + len(new_lines)
+            document.replace(start, end, old_lines)
+            applied.append((start, end, old_lines))
+        self._redo.append(edits)
+        self._log({'op': 'undo', 'lines': len(document)})
+        return applied
+
+    def redo(self, document):
+        """重做最近撤销的一条记录，返回值与 undo 相同。"""
+        if not self._redo:
+            return None
+        edits = self._redo.pop()
+        applied = []
+        for start, old_lines, new_lines in edits:
+            end = start + len(old_lines)
+            document.replace(start, end, new_lines)
+            applied.append((start, end, new_lines))
+        self._push(edits)
+        self._log({'op': 'redo', 'lines': len(document)})
+        return applied
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._bytes = 0
+        if self.journal_path:
+            try:
+                os.unlink(self.journal_path)
+            except FileNotFoundError:
+                pass
+            self._journal_bytes = 0
+
+    def _log(self, record):
+        if not self.journal_path:
+            return
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(line)
+        self._journal_bytes += len(line.encode('utf-8', 'surrogatepass'))
+        if self._journal_bytes > 2 * self.max_bytes + 65536:
+            # 日志中包含已淘汰的记录，超过上限时按当前历史重写
+            self._rewrite_journal(record['lines'])
+
+    def _rewrite_journal(self, line_count):
+        """把当前的撤销/重做栈重写为最小的日志（原子替换）。"""
+        if not self.journal_path:
+            return
+        if not self._undo and not self._redo:
+            self.clear()
+            return
+        records = [{'op': 'do', 'edits': edits} for edits in self._undo]
+        records += [{'op': 'do', 'edits': edits} for edits in reversed(self._redo)]
+        records += [{'op': 'undo'} for _ in self._redo]
+        records[-1]['lines'] = line_count
+        text = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+        data = text.encode('utf-8')
+        try:
+            write_atomic(self.journal_path, data)
+        except OSError:
+            return
+        self._journal_bytes = len(data)
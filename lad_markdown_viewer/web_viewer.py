@@ -0,0 +1,647 @@
+"""
+LAD Markdown Viewer Web应用
+
+基于Flask的生产级Markdown查看服务：
+- 渲染结果按文件路径、修改时间和大小缓存，并预先压缩（gzip，安装brotli时另有br）
+- 基于内容哈希的强ETag，If-None-Match 命中时返回304
+- 放大缩小控件的样式和脚本作为外部静态资源引用，URL带内容哈希，
+  使用长期缓存（Cache-Control: immutable），每个页面不再重复内联
+- 设置SVG缓存目录（--mermaid-svg-dir 或 LAD_MARKDOWN_MERMAID_SVG_DIR）且安装了
+  mermaid-cli 时，Mermaid图表在服务端预渲染为SVG，相同图表只渲染一次
+- /outline?md=... 返回文档大纲（JSON），与页面来自同一次解析并一起缓存
+- 已下载本地第三方库（lad-markdown-assets fetch）时，Mermaid和github-markdown-css
+  也由本服务提供，离线环境无需等待CDN超时
+- 监视模式（--watch）下文档保存后自动更新页面：/events?md=... 以 Server-Sent Events
+  推送只包含变化块的DOM补丁，页面不刷新、滚动位置保持不变
+- /search?q=... 在文档目录树中全文搜索（JSON），结果按段落排序并带 #slug 锚点；
+  索引在应用创建时由后台线程建立（建立完成前返回空结果和 "indexing": true），之后按文件修改时间
+  在后台增量更新，查询不等待渲染；--search-index 指定时保存到磁盘
+- /backlinks?md=... 返回链接到该文档的其他文档（JSON），链接图的维护方式与搜索索引相同，
+  --link-graph 指定时保存到磁盘
+- /metrics 以Prometheus文本格式导出各渲染阶段耗时的 p50/p90/p99、字节数和页面缓存命中情况
+
+启动方式：
+    lad-markdown-web --root 文档目录 [--host 127.0.0.1] [--port 5000] [--watch]
+                     [--search-index 索引文件] [--link-graph 链接图缓存文件]
+或者交给WSGI服务器：
+    gunicorn "lad_markdown_viewer.web_viewer:create_app()"
+
+许可证: MIT License
+"""
+import argparse
+import gzip
+import hashlib
+import html as html_module
+import json
+import mimetypes
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import quote
+
+from flask import Flask, Response, abort, request
+
+from .assets import (
+    DEFAULT_PREFETCH_MARGIN, STATIC_DIR, live_reload_tags, mermaid_runtime_tags, resolve_asset,
+    vendor_tags, zoom_asset_tags,
+)
+from .file_watcher import LiveDocument
+from .incremental import PATCH_SCRIPT
+from .instrumentation import RenderMetrics, add_render_collector, remove_render_collector
+from .link_graph import LinkGraph
+from .markdown_processor import (
+    enable_mermaid_prerender, enable_mermaid_prerender_from_env, render_document,
+)
+from .render_cache import RenderCache
+from .render_result import RenderResult
+from .search_index import SearchIndex, make_snippet
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# 不带内容哈希的静态资源URL内容可能变化，每次使用前需要协商
+UNVERSIONED_STATIC_CACHE_CONTROL = 'no-cache'
+PAGE_CACHE_CONTROL = 'no-cache'
+# 小于该大小的响应不值得压缩
+MIN_COMPRESS_SIZE = 1024
+# 事件流在没有更新时发送注释行的间隔（秒），防止代理断开空闲连接
+SSE_KEEPALIVE_INTERVAL = 15
+# 监视模式下同时监视的文档数上限，以及没有客户端订阅的文档闲置多久（秒）后停止监视
+LIVE_DOCUMENT_LIMIT = 64
+LIVE_DOCUMENT_IDLE_TIMEOUT = 300
+# 搜索索引和链接图两次使用之间至少间隔该秒数才重新检查文档目录，避免每次请求都遍历整个目录树
+INDEX_REFRESH_INTERVAL = 5
+SEARCH_MAX_LIMIT = 100
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{title}</title>
+    {vendor_tags}
+    {mermaid_runtime}
+    {live_reload}
+    <script>
+        document.addEventListener('DOMContentLoaded', function() {{
+            // .md 链接相对当前文档解析后在查看器内跳转
+            var current = document.body.getAttribute('data-md') || '';
+            document.body.addEventListener('click', function(e) {{
+                var a = e.target.closest('a');
+                if (!a || !a.getAttribute('href')) return;
+                var href = a.getAttribute('href');
+                var hash = '';
+                var hashIndex = href.indexOf('#');
+                if (hashIndex >= 0) {{ hash = href.slice(hashIndex); href = href.slice(0, hashIndex); }}
+                if (href.endsWith('.md') && !/^[a-z]+:/i.test(href)) {{
+                    e.preventDefault();
+                    var target = new URL(href, 'http://lad/' + current).pathname.slice(1);
+                    window.location.href = '/?md=' + encodeURIComponent(decodeURIComponent(target)) + hash;
+                }} else if (/^(https?|ftp):/i.test(href)) {{
+                    e.preventDefault();
+                    if (window.onMarkdownLinkClick) {{
+                        window.onMarkdownLinkClick(href);
+                    }} else {{
+                        window.open(href, '_blank');
+                    }}
+                }}
+            }}, false);
+        }});
+    </script>
+    <style>
+        body {{ font-family: '微软雅黑', Arial, sans-serif; margin: 0; background: #f6f8fa; }}
+        .markdown-body {{
+            box-sizing: border-box;
+            min-width: 200px;
+            max-width: 980px;
+            margin: 32px auto;
+            padding: 32px;
+            background: #fff;
+            border-radius: 8px;
+            box-shadow: 0 2px 12px rgba(0,0,0,0.06);
+        }}
+        .mermaid {{ background: white; padding: 10px; border-radius: 4px; text-align: center; }}
+        .markdown-body img {{ cursor: zoom-in; }}
+    </style>
+</head>
+<body data-md="{md_attr}">
+<div class="markdown-body">{body}</div>
+</body>
+</html>
+"""
+
+
+def make_etag(data):
+    """根据内容哈希生成强ETag。"""
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """判断 If-None-Match 请求头是否包含给定的ETag。"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    # If-None-Match 使用弱比较，W/ 前缀不影响匹配
+    return any(tag == etag or tag == 'W/' + etag for tag in candidates)
+
+
+def choose_encoding(accept_encoding, available):
+    """按 br > gzip 的优先级从客户端接受的编码中选择一个，都不支持时返回 None。"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    for encoding in ('br', 'gzip'):
+        if encoding in available and accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+class CompressedResponse:
+    """
+    一份可缓存的响应内容：原始字节、强ETag以及预先压缩好的各编码版本。
+
+    强ETag要求字节完全相同，因此每种编码使用各自的ETag（见 etag_for）。
+    """
+
+    def __init__(self, data, mimetype):
+        self.data = data
+        self.mimetype = mimetype
+        self.etag = make_etag(data)
+        self.encoded = {}
+        if len(data) >= MIN_COMPRESS_SIZE:
+            self.encoded['gzip'] = gzip.compress(data, compresslevel=6)
+            if brotli is not None:
+                self.encoded['br'] = brotli.compress(data)
+
+    def etag_for(self, encoding):
+        """encoding 编码版本的ETag：未压缩时为 etag，否则为 "<哈希>-gzip"、"<哈希>-br"。"""
+        if encoding is None:
+            return self.etag
+        return self.etag[:-1] + '-' + encoding + '"'
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + len(self.data) + sum(
+            len(body) for body in self.encoded.values())
+
+
+def build_response(content, cache_control):
+    """按请求头协商压缩/304，生成Flask响应；ETag对应实际选择的编码。"""
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'), content.encoded)
+    etag = content.etag_for(encoding)
+    headers = {
+        'ETag': etag,
+        'Cache-Control': cache_control,
+        'Vary': 'Accept-Encoding',
+    }
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return Response(status=304, headers=headers)
+    if encoding is None:
+        body = content.data
+    else:
+        body = content.encoded[encoding]
+        headers['Content-Encoding'] = encoding
+    return Response(body, mimetype=content.mimetype, headers=headers)
+
+
+def cache_metrics_text(stats, prefix='lad_page_cache'):
+    """把 RenderCache.stats 转换为Prometheus文本格式。"""
+    lines = []
+    for name, kind in (('hits', 'counter'), ('misses', 'counter'), ('evictions', 'counter'),
+                       ('entries', 'gauge'), ('bytes', 'gauge')):
+        metric = f'{prefix}_{name}_total' if kind == 'counter' else f'{prefix}_{name}'
+        lines.append(f'# TYPE {metric} {kind}')
+        lines.append(f'{metric} {stats[name]}')
+    return '\n'.join(lines) + '\n'
+
+
+def viewer_url(md_path, anchor=''):
+    """查看器中打开文档（并跳转到锚点）的URL。"""
+    return '/?md=' + quote(md_path) + ('#' + quote(anchor) if anchor else '')
+
+
+def resolve_document(root_dir, md_path):
+    """将请求中的文档路径解析为 root_dir 内的绝对路径，越界时返回 None。"""
+    full_path = os.path.realpath(os.path.join(root_dir, md_path))
+    if os.path.commonpath([full_path, root_dir]) != root_dir:
+        return None
+    return full_path
+
+
+def render_page(full_path, md_path, static_url='/static/', asset_mode=None,
+                mermaid_prefetch_margin=DEFAULT_PREFETCH_MARGIN):
+    """
+    渲染一个完整的HTML页面，放大缩小控件和第三方库以外部资源方式引用。
+
+    Mermaid图表在接近视口 mermaid_prefetch_margin 时才由浏览器渲染。
+    """
+    return build_page(render_document(full_path, cache=False), md_path, static_url=static_url,
+                      asset_mode=asset_mode, mermaid_prefetch_margin=mermaid_prefetch_margin)
+
+
+def build_page(result, md_path, static_url='/static/', asset_mode=None,
+               mermaid_prefetch_margin=DEFAULT_PREFETCH_MARGIN, events_url=None):
+    """
+    用已有的 RenderResult 生成完整的HTML页面，参数同 render_page。
+
+    指定 events_url 时（监视模式）页面连接该事件流并应用收到的补丁，
+    result.html 应为 IncrementalRenderer.html() 生成的带块ID的HTML。
+    """
+    html_body = result.html + zoom_asset_tags(static_url)
+    live_reload = ''
+    if events_url is not None:
+        live_reload = PATCH_SCRIPT + live_reload_tags(events_url, static_url)
+    return PAGE_TEMPLATE.format(
+        vendor_tags=vendor_tags(asset_mode, static_url, css=True),
+        mermaid_runtime=mermaid_runtime_tags(prefetch_margin=mermaid_prefetch_margin,
+                                             static_url=static_url),
+        live_reload=live_reload,
+        title=html_module.escape(os.path.basename(md_path)),
+        md_attr=html_module.escape(md_path.replace(os.sep, '/')),
+        body=html_body,
+    )
+
+
+def create_app(root_dir=None, default_doc='README.md', max_cache_entries=512,
+               max_cache_bytes=256 * 1024 * 1024, asset_mode=None, mermaid_svg_dir=None,
+               mermaid_prefetch_margin=DEFAULT_PREFETCH_MARGIN, watch=False, watch_debounce=0.2,
+               max_live_documents=LIVE_DOCUMENT_LIMIT, live_idle_timeout=LIVE_DOCUMENT_IDLE_TIMEOUT,
+               search_index_path=None, link_graph_path=None,
+               index_refresh_interval=INDEX_REFRESH_INTERVAL, index_at_startup=True, metrics=True):
+    """
+    创建Web查看器应用。
+
+    参数:
+        root_dir: 文档根目录，只允许访问该目录内的文件（默认为当前目录，
+                  也可通过环境变量 LAD_MARKDOWN_ROOT 指定）
+        default_doc: 未指定 md 参数时显示的文档
+        max_cache_entries / max_cache_bytes: 页面缓存的容量上限
+        asset_mode: 第三方库的资源模式（auto/local/cdn），详见 assets 模块
+        mermaid_svg_dir: Mermaid预渲染SVG的缓存目录（也可通过环境变量
+                         LAD_MARKDOWN_MERMAID_SVG_DIR 指定），未指定时由浏览器渲染
+        mermaid_prefetch_margin: 浏览器渲染的图表距视口多远时开始渲染（CSS长度）
+        watch: 监视模式，文档被打开后监视其变化，通过 /events 向页面推送补丁
+        watch_debounce: 监视模式下合并连续写入的等待时间（秒）
+        max_live_documents: 监视模式下同时监视的文档数上限，超出时停止最久未使用的文档
+        live_idle_timeout: 没有 /events 客户端的文档闲置该秒数后停止监视
+        search_index_path: 全文搜索索引文件（可选），未指定时索引只保存在内存中
+        link_graph_path: 链接图缓存文件（可选），未指定时链接图只保存在内存中
+        index_refresh_interval: 搜索索引和链接图重新检查文档变化的最小间隔（秒）
+        index_at_startup: 创建应用时即在后台建立搜索索引和链接图，为 False 时在第一次使用时开始建立
+        metrics: 统计本应用处理请求时各页面渲染阶段的耗时并通过 /metrics 导出；只统计请求线程中的
+                 页面渲染，链接图、搜索索引的内部渲染以及监视线程中的增量渲染不计入
+    """
+    root_dir = os.path.realpath(root_dir or os.environ.get('LAD_MARKDOWN_ROOT') or os.getcwd())
+    if mermaid_svg_dir:
+        enable_mermaid_prerender(mermaid_svg_dir)
+    else:
+        enable_mermaid_prerender_from_env()
+    app = Flask(__name__, static_folder=None)
+    page_cache = RenderCache(max_entries=max_cache_entries, max_bytes=max_cache_bytes)
+    app.config['LAD_ROOT_DIR'] = root_dir
+    app.extensions['lad_page_cache'] = page_cache
+    render_metrics = None
+    if metrics:
+        render_metrics = RenderMetrics(kinds=('page',))
+        app.extensions['lad_render_metrics'] = render_metrics
+
+        # 只在处理本应用请求的线程上统计，不注册全局观察者，应用实例之间互不干扰，也无需注销
+        @app.before_request
+        def start_render_metrics():
+            add_render_collector(render_metrics)
+
+        @app.teardown_request
+        def stop_render_metrics(exc):
+            remove_render_collector(render_metrics)
+    live_documents = OrderedDict()
+    live_lock = threading.Lock()
+    app.extensions['lad_live_documents'] = live_documents
+    # 目录级索引：名称 -> 状态。lock 在查询和写入更新结果时持有，refreshing 保证同一时间只有一个后台更新，
+    # ready 在第一次建立完成后设置
+    directory_indexes = {
+        name: {'cls': cls, 'path': path, 'lock': threading.Lock(), 'instance': None, 'checked': None,
+               'refreshing': threading.Lock(), 'ready': threading.Event()}
+        for name, cls, path in (('search_index', SearchIndex, search_index_path),
+                                ('link_graph', LinkGraph, link_graph_path))
+    }
+    app.extensions['lad_directory_indexes'] = directory_indexes
+
+    def request_document():
+        md_path = request.args.get('md', default_doc)
+        full_path = resolve_document(root_dir, md_path)
+        if full_path is None or not os.path.isfile(full_path):
+            abort(404)
+        return md_path, full_path
+
+    def get_live(full_path):
+        """
+        返回文档的 LiveDocument。每个文档只有一个监视器和增量渲染器，在第一次被打开时创建；
+        创建时的首次渲染和停止被淘汰的文档都在 live_lock 之外进行，不阻塞其他文档的请求。
+        """
+        with live_lock:
+            live = live_documents.get(full_path)
+        created = None
+        if live is None:
+            created = LiveDocument(full_path, debounce=watch_debounce).start()
+        with live_lock:
+            live = live_documents.get(full_path)
+            if live is None:
+                live = live_documents[full_path] = created
+                created = None
+            else:
+                live_documents.move_to_end(full_path)
+            live.last_used = time.monotonic()
+            evicted = evict_live_documents(full_path)
+        if created is not None:
+            # 其他请求同时创建了同一文档并先登记，丢弃这一份
+            evicted.append(created)
+        for document in evicted:
+            document.stop()
+        return live
+
+    def evict_live_documents(current):
+        """
+        移除没有订阅者且闲置超过 live_idle_timeout 的文档；数量仍超过 max_live_documents 时，
+        按最久未使用的顺序先移除没有订阅者的文档，再移除有订阅者的（其客户端会整页刷新）。
+        调用方持有 live_lock，并在释放锁后对返回的文档调用 stop()。
+        """
+        now = time.monotonic()
+        candidates = [path for path in live_documents if path != current]
+        expired = [path for path in candidates if not live_documents[path].subscribers
+                   and now - live_documents[path].last_used >= live_idle_timeout]
+        overflow = len(live_documents) - len(expired) - max_live_documents
+        if overflow > 0:
+            remaining = [path for path in candidates if path not in expired]
+            remaining.sort(key=lambda path: live_documents[path].subscribers > 0)
+            expired += remaining[:overflow]
+        return [live_documents.pop(path) for path in expired]
+
+    def get_live_page(md_path, full_path):
+        live = get_live(full_path)
+        version, html_body, toc = live.snapshot()
+        key = ('live-page', full_path, live.epoch, version)
+        content = page_cache.get(key)
+        if content is None:
+            events_url = f"/events?md={quote(md_path)}&version={live.epoch}:{version}"
+            page = build_page(RenderResult(html_body, toc), md_path, asset_mode=asset_mode,
+                              mermaid_prefetch_margin=mermaid_prefetch_margin,
+                              events_url=events_url)
+            content = CompressedResponse(page.encode('utf-8'), 'text/html')
+            page_cache.put(key, content)
+        return content
+
+    def refresh_directory_index(name):
+        """
+        在后台线程中建立或增量更新目录级索引；已有更新在进行时直接返回。
+
+        第一次建立在新实例上完成后才发布；之后的更新先在锁外检查文件并渲染变化的文档
+        （prepare_update），只有写入结果（apply_update）时持有锁，查询不会等待渲染。
+        """
+        entry = directory_indexes[name]
+        if not entry['refreshing'].acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                cls, path = entry['cls'], entry['path']
+                instance = entry['instance']
+                if instance is None:
+                    instance = cls.open(root_dir, path) if path else cls(root_dir)
+                    changed = instance.update()['changed']
+                    with entry['lock']:
+                        entry['instance'] = instance
+                    app.extensions[f'lad_{name}'] = instance
+                else:
+                    update = instance.prepare_update()
+                    with entry['lock']:
+                        changed = instance.apply_update(update)['changed']
+                # 保存只读取索引，持有 refreshing 时没有其他线程修改它
+                if changed and path:
+                    instance.save()
+            except Exception as e:
+                print(f"❌ 更新{name}失败：{e}", file=sys.stderr)
+            finally:
+                entry['checked'] = time.monotonic()
+                entry['ready'].set()
+                entry['refreshing'].release()
+
+        threading.Thread(target=run, name=f'lad-{name}', daemon=True).start()
+
+    def directory_index(name):
+        """
+        返回 (锁, 实例)，调用方在持有锁时查询；第一次建立尚未完成时实例为 None。
+        距上次检查超过 index_refresh_interval 秒时在后台增量更新，请求本身不等待。
+        """
+        entry = directory_indexes[name]
+        checked = entry['checked']
+        if checked is None or time.monotonic() - checked >= index_refresh_interval:
+            refresh_directory_index(name)
+        return entry['lock'], entry['instance']
+
+    def json_response(data):
+        return Response(json.dumps(data, ensure_ascii=False), mimetype='application/json',
+                        headers={'Cache-Control': PAGE_CACHE_CONTROL})
+
+    def get_cached(key, build):
+        content = page_cache.get(key)
+        if content is None:
+            content = build()
+            page_cache.put(key, content)
+        return content
+
+    def get_document(kind):
+        # 页面和大纲来自同一次解析：任一未命中时两者一起生成并写入缓存
+        md_path, full_path = request_document()
+        if watch and kind == 'page':
+            return get_live_page(md_path, full_path)
+        stat = os.stat(full_path)
+        keys = {name: (name, full_path, stat.st_mtime_ns, stat.st_size)
+                for name in ('page', 'outline')}
+        content = page_cache.get(keys[kind])
+        if content is None:
+            result = render_document(full_path, cache=False)
+            page = build_page(result, md_path, asset_mode=asset_mode,
+                              mermaid_prefetch_margin=mermaid_prefetch_margin)
+            outline = json.dumps({'metadata': result.metadata, 'outline': result.outline()},
+                                 ensure_ascii=False, default=str)
+            built = {
+                'page': CompressedResponse(page.encode('utf-8'), 'text/html'),
+                'outline': CompressedResponse(outline.encode('utf-8'), 'application/json'),
+            }
+            for name, value in built.items():
+                page_cache.put(keys[name], value)
+            content = built[kind]
+        return content
+
+    @app.route('/', methods=['GET'])
+    def index():
+        return build_response(get_document('page'), PAGE_CACHE_CONTROL)
+
+    @app.route('/outline', methods=['GET'])
+    def outline():
+        return build_response(get_document('outline'), PAGE_CACHE_CONTROL)
+
+    @app.route('/search', methods=['GET'])
+    def search():
+        query = request.args.get('q', '').strip()
+        try:
+            limit = max(1, min(int(request.args.get('limit', 20)), SEARCH_MAX_LIMIT))
+        except ValueError:
+            limit = 20
+        hits = []
+        indexing = False
+        if query:
+            lock, index = directory_index('search_index')
+            if index is None:
+                indexing = True
+            else:
+                with lock:
+                    results = index.search_sections(query, limit=limit)
+                # 摘要由建立索引时保存的段落摘录生成，不需要持有锁，也不读取文件
+                hits = [dict(hit, snippet=make_snippet(excerpt, terms)) for hit, excerpt, terms in results]
+        for hit in hits:
+            hit['url'] = viewer_url(hit['md'], hit['slug'])
+        return json_response({'query': query, 'hits': hits, 'indexing': indexing})
+
+    @app.route('/backlinks', methods=['GET'])
+    def backlinks():
+        _, full_path = request_document()
+        rel_path = os.path.relpath(full_path, root_dir).replace(os.sep, '/')
+        lock, graph = directory_index('link_graph')
+        hits = []
+        if graph is not None:
+            with lock:
+                hits = graph.backlinks(rel_path)
+        for hit in hits:
+            hit['url'] = viewer_url(hit['md'])
+        return json_response({'md': rel_path, 'backlinks': hits, 'indexing': graph is None})
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics_endpoint():
+        if render_metrics is None:
+            abort(404)
+        body = render_metrics.prometheus_text() + cache_metrics_text(page_cache.stats)
+        return Response(body, content_type=PROMETHEUS_CONTENT_TYPE,
+                        headers={'Cache-Control': 'no-store'})
+
+    @app.route('/events', methods=['GET'])
+    def events():
+        if not watch:
+            abort(404)
+        _, full_path = request_document()
+        live = get_live(full_path)
+        # 断线重连时浏览器通过 Last-Event-ID 带回最后收到的版本
+        epoch, _, version = (request.headers.get('Last-Event-ID')
+                             or request.args.get('version', '')).partition(':')
+        try:
+            version = int(version) if epoch == live.epoch else None
+        except ValueError:
+            version = None
+
+        def stream():
+            current = version
+            yield 'retry: 2000\n\n'
+            if current is None:
+                # 页面来自另一个服务实例或版本号无效，只能整页刷新
+                yield f'id: {live.epoch}:{live.version}\nevent: reload\ndata: {{}}\n\n'
+                return
+            live.subscribe()
+            try:
+                while True:
+                    latest = live.wait(current, timeout=SSE_KEEPALIVE_INTERVAL)
+                    if live.stopped:
+                        # 文档已停止监视（闲置或超出数量上限），重新打开页面会重新开始监视
+                        yield f'id: {live.epoch}:{latest}\nevent: reload\ndata: {{}}\n\n'
+                        return
+                    if latest == current:
+                        yield ': keepalive\n\n'
+                        continue
+                    latest, patches = live.patches_since(current)
+                    event_id = f'{live.epoch}:{latest}'
+                    if patches is None:
+                        yield f'id: {event_id}\nevent: reload\ndata: {{}}\n\n'
+                        return
+                    data = json.dumps({'version': latest, 'patches': patches}, ensure_ascii=False)
+                    yield f'id: {event_id}\nevent: patch\ndata: {data}\n\n'
+                    current = latest
+            finally:
+                live.unsubscribe()
+
+        return Response(stream(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    @app.route('/static/<path:filename>', methods=['GET'])
+    def static_asset(filename):
+        full_path, versioned = resolve_asset(filename)
+        if full_path is None:
+            abort(404)
+        stat = os.stat(full_path)
+        key = ('static', full_path, stat.st_mtime_ns, stat.st_size)
+
+        def load():
+            with open(full_path, 'rb') as f:
+                data = f.read()
+            mimetype = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+            return CompressedResponse(data, mimetype)
+
+        cache_control = STATIC_CACHE_CONTROL if versioned else UNVERSIONED_STATIC_CACHE_CONTROL
+        return build_response(get_cached(key, load), cache_control)
+
+    if index_at_startup:
+        for name in directory_indexes:
+            refresh_directory_index(name)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='lad-markdown-web', description='LAD Markdown Web查看器')
+    parser.add_argument('--root', default=None, help='文档根目录（默认为当前目录）')
+    parser.add_argument('--default', default='README.md', help='默认显示的文档')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--assets', choices=('auto', 'local', 'cdn'), default=None,
+                        help='第三方库的资源模式（默认 auto：有本地副本时使用本地文件）')
+    parser.add_argument('--mermaid-svg-dir', default=None,
+                        help='Mermaid预渲染SVG的缓存目录（需要安装mermaid-cli）')
+    parser.add_argument('--mermaid-prefetch', default=DEFAULT_PREFETCH_MARGIN,
+                        help=f'Mermaid图表距视口多远时开始渲染（默认 {DEFAULT_PREFETCH_MARGIN}）')
+    parser.add_argument('--watch', action='store_true',
+                        help='监视打开的文档，保存后自动更新页面（安装watchdog时使用系统文件通知）')
+    parser.add_argument('--search-index', default=None,
+                        help='全文搜索索引文件（可先用 lad-markdown-index 建立，默认只保存在内存中）')
+    parser.add_argument('--link-graph', default=None,
+                        help='反向链接使用的链接图缓存文件（可与 lad-markdown-check-links 共用，默认只保存在内存中）')
+    parser.add_argument('--no-metrics', action='store_true',
+                        help='不统计渲染耗时，关闭 /metrics')
+    parser.add_argument('--debug', action='store_true')
+    args = parser.parse_args(argv)
+
+    app = create_app(args.root, default_doc=args.default, asset_mode=args.assets,
+                     mermaid_svg_dir=args.mermaid_svg_dir,
+                     mermaid_prefetch_margin=args.mermaid_prefetch, watch=args.watch,
+                     search_index_path=args.search_index, link_graph_path=args.link_graph,
+                     metrics=not args.no_metrics)
+    print(f"✅ 文档目录：{app.config['LAD_ROOT_DIR']}")
+    if args.watch:
+        print("👀 监视模式：文档保存后页面自动更新")
+    app.run(host=args.host, port=args.port, debug=args.debug, threaded=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
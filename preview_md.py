@@ -13,17 +13,23 @@ import tempfile
 from pathlib import Path
 
 # 导入我们的Markdown处理包
-from lad_markdown_viewer.markdown_processor import render_markdown_to_html
+from lad_markdown_viewer.assets import mermaid_runtime_tags, vendor_tags
+from lad_markdown_viewer.markdown_processor import (
+    render_document, enable_render_cache_from_env, enable_mermaid_prerender_from_env,
+)
+
+# 设置 LAD_MARKDOWN_CACHE_DIR 后启用磁盘渲染缓存，与Web查看器共享渲染结果
+enable_render_cache_from_env()
+# 设置 LAD_MARKDOWN_MERMAID_SVG_DIR 后Mermaid图表预渲染为SVG（需要安装mermaid-cli）
+enable_mermaid_prerender_from_env()
 
 def preview_in_browser(md_file_path):
     """在浏览器中预览MD文档"""
     try:
-        # 读取MD文件
-        with open(md_file_path, 'r', encoding='utf-8') as f:
-            md_text = f.read()
-        
-        # 使用包中的渲染函数
-        html_body = render_markdown_to_html(md_text)
+        # 使用包中的文件渲染函数（内存映射读取，不整体载入文件）；
+        # 目录导航与正文来自同一次解析
+        result = render_document(md_file_path)
+        toc_nav = f'<nav class="toc">{result.toc_html(max_level=3)}</nav>' if result.toc else ''
         
         # 创建完整的HTML页面
         html = f"""
@@ -32,23 +38,8 @@ def preview_in_browser(md_file_path):
         <head>
             <meta charset="utf-8">
             <title>MD预览 - {os.path.basename(md_file_path)}</title>
-            <script src="https://cdn.jsdelivr.net/npm/mermaid@9.4.3/dist/mermaid.min.js"></script>
-            <script>
-                document.addEventListener('DOMContentLoaded', function() {{
-                    try {{
-                        if (typeof mermaid !== 'undefined') {{
-                            mermaid.initialize({{
-                                startOnLoad: true,
-                                theme: 'default',
-                                securityLevel: 'loose',
-                                flowchart: {{ htmlLabels: true, useMaxWidth: true }},
-                            }});
-                        }}
-                    }} catch(e) {{
-                        console.error('Mermaid initialization error:', e);
-                    }}
-                }});
-            </script>
+            {vendor_tags()}
+            {mermaid_runtime_tags()}
             <style>
                 body {{ 
                     font-family: '微软雅黑', 'Microsoft YaHei', Arial, sans-serif; 
@@ -78,7 +69,8 @@ def preview_in_browser(md_file_path):
             </style>
         </head>
         <body>
-        {html_body}
+        {toc_nav}
+        {result.html}
         </body>
         </html>
         """
@@ -141,6 +133,11 @@ def main():
         print("  <md文件路径>  要预览的Markdown文件路径")
         print("  --console     在控制台输出原始内容（可选）")
         print("")
+        print("环境变量：")
+        print("  LAD_MARKDOWN_CACHE_DIR  渲染缓存目录，设置后跨进程复用渲染结果（可选）")
+        print("  LAD_MARKDOWN_ASSETS     Mermaid资源模式：auto（默认）/local/cdn（可选）")
+        print("  LAD_MARKDOWN_MERMAID_SVG_DIR  Mermaid预渲染SVG缓存目录，需要mermaid-cli（可选）")
+        print("")
         print("示例：")
         print("  python preview_md.py 发布检查清单.md")
         print("  python preview_md.py 发布检查清单.md --console")
@@ -11,6 +11,7 @@ import os
 import sys
 import subprocess
 import shutil
+import zipfile
 from pathlib import Path
 
 def run_command(cmd, cwd=None):
@@ -88,6 +89,19 @@ def build_package():
             shutil.rmtree(dir_name)
             print(f"🧹 清理 {dir_name}")
     
+    # 下载并校验固定版本的第三方前端库（static/vendor/），随包发布；
+    # 尚未固定摘要时构建不含本地副本的发布包（auto 模式使用CDN），并明确提示
+    from lad_markdown_viewer.assets import VENDOR_LOCK_NAME, vendor_pinned
+    if vendor_pinned():
+        success, output = run_command('python -m lad_markdown_viewer.assets fetch')
+        print(output)
+        if not success:
+            print("❌ 第三方前端库下载或摘要校验失败")
+            return False
+    else:
+        print(f"⚠️  未固定第三方前端库（static/{VENDOR_LOCK_NAME} 不完整），发布包不含本地副本，"
+              "auto 模式将使用CDN；需要离线发布时先执行 lad-markdown-assets lock 并提交摘要")
+
     # 构建源码包和wheel包
     success, output = run_command('python lad_markdown_viewer/setup.py sdist bdist_wheel')
     if not success:
@@ -119,6 +133,18 @@ def check_package():
     wheel_files = [f for f in dist_files if f.endswith('.whl')]
     if wheel_files:
         wheel_path = os.path.join('dist', wheel_files[0])
+        # 已固定摘要的第三方前端库必须随包发布，否则离线环境只能回退到CDN
+        from lad_markdown_viewer.assets import VENDOR_ASSETS, VENDOR_LOCK_NAME, vendor_pinned
+        if vendor_pinned():
+            with zipfile.ZipFile(wheel_path) as wheel:
+                packaged = set(wheel.namelist())
+            for name in [VENDOR_LOCK_NAME] + [name for name, _ in VENDOR_ASSETS.values()]:
+                if f'lad_markdown_viewer/static/{name}' not in packaged:
+                    print(f"❌ wheel中缺少第三方前端库：static/{name}")
+                    return False
+            print("✅ 第三方前端库已随包发布")
+        else:
+            print("⚠️  第三方前端库未固定，发布包使用CDN")
         success, _ = run_command(f'pip install --dry-run "{wheel_path}"')
         if not success:
             print("❌ 包安装测试失败")
@@ -0,0 +1,148 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from lad_markdown_viewer import asgi_viewer
+from lad_markdown_viewer.asgi_viewer import AsgiViewer, OverloadedError
+from lad_markdown_viewer.web_viewer import CompressedResponse
+
+
+@pytest.fixture
+def blocked_render(monkeypatch):
+    """渲染任务阻塞到 release 被设置为止（用线程池代替进程池，便于控制）"""
+    release = threading.Event()
+
+    def render(full_path, md_path, asset_mode=None, mermaid_prefetch_margin=None):
+        release.wait(5)
+        return CompressedResponse(b'<p>ok</p>', 'text/html')
+
+    monkeypatch.setattr(asgi_viewer, 'render_compressed', render)
+    return release
+
+
+class TestBackpressure:
+    def test_cancelled_request_keeps_slot_until_render_finishes(self, tmp_path, blocked_render):
+        """测试客户端断开后，仍在执行的渲染继续占用队列名额"""
+        viewer = AsgiViewer(str(tmp_path), max_queue=1)
+        viewer._pool = ThreadPoolExecutor(max_workers=1)
+        key = ('page', 'a.md', 1, 1)
+
+        async def scenario():
+            task = asyncio.ensure_future(viewer._render(key, 'a.md', 'a.md'))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert viewer.metrics.queue_depth == 1
+            assert key in viewer._inflight
+            with pytest.raises(OverloadedError):
+                await viewer._render(('page', 'b.md', 1, 1), 'b.md', 'b.md')
+            # 同一文档的新请求合并到仍在执行的任务
+            waiter = asyncio.ensure_future(viewer._render(key, 'a.md', 'a.md'))
+            blocked_render.set()
+            content = await waiter
+            await asyncio.sleep(0)
+            return content
+
+        content = asyncio.run(scenario())
+        viewer._pool.shutdown()
+        assert content.data == b'<p>ok</p>'
+        assert viewer.metrics.queue_depth == 0
+        assert viewer.metrics.coalesced == 1
+        assert viewer.metrics.renders == 1
+        assert not viewer._inflight
+        assert viewer.cache.get(key) is content
+
+
+def crash_render(full_path, md_path, asset_mode=None, mermaid_prefetch_margin=None):
+    """模拟工作进程崩溃"""
+    os._exit(1)
+
+
+def failing_render(full_path, md_path, asset_mode=None, mermaid_prefetch_margin=None):
+    raise ValueError("渲染出错")
+
+
+def request(viewer, path, query=b''):
+    """发送一个GET请求，返回 (状态码, 响应体)"""
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request'}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query, 'headers': []}
+    asyncio.run(viewer(scope, receive, send))
+    return messages[0]['status'], messages[1]['body']
+
+
+class TestRenderFailures:
+    @pytest.fixture
+    def viewer(self, tmp_path):
+        (tmp_path / "README.md").write_text("# 标题\n", encoding="utf-8")
+        viewer = AsgiViewer(str(tmp_path), max_workers=1)
+        yield viewer
+        viewer.shutdown()
+
+    def test_worker_crash_returns_503_and_recovers(self, viewer, monkeypatch):
+        """测试工作进程崩溃时返回503、释放队列名额并在下一个请求时重建进程池"""
+        monkeypatch.setattr(asgi_viewer, 'render_compressed', crash_render)
+        status, _ = request(viewer, '/')
+        assert status == 503
+        assert viewer.metrics.render_errors == 1
+        assert viewer.metrics.queue_depth == 0 and not viewer._inflight
+        assert viewer.metrics.pool_restarts == 1 and viewer._pool is None
+
+        monkeypatch.undo()
+        status, body = request(viewer, '/')
+        assert status == 200 and '标题'.encode('utf-8') in body
+        assert viewer.metrics.renders == 1
+
+    def test_render_error_returns_500(self, viewer, monkeypatch, capsys):
+        """测试渲染抛出异常时返回500，进程池继续使用"""
+        monkeypatch.setattr(asgi_viewer, 'render_compressed', failing_render)
+        status, _ = request(viewer, '/')
+        assert status == 500
+        assert viewer.metrics.render_errors == 1 and viewer.metrics.pool_restarts == 0
+        assert viewer.metrics.queue_depth == 0 and not viewer._inflight
+        assert "渲染出错" in capsys.readouterr().err
+
+    def test_broken_pool_on_submit(self, viewer):
+        """测试提交时进程池已损坏，直接返回503且不占用队列名额"""
+        viewer._pool = pool = ThreadPoolExecutor(max_workers=1)
+
+        def submit(*args, **kwargs):
+            raise asgi_viewer.BrokenProcessPool("进程池已损坏")
+
+        pool.submit = submit
+        status, _ = request(viewer, '/')
+        assert status == 503
+        assert viewer.metrics.render_errors == 1 and viewer.metrics.pool_restarts == 1
+        assert viewer.metrics.queue_depth == 0 and viewer._pool is None
+
+
+class TestMetrics:
+    def test_metrics_are_prometheus_text(self, tmp_path):
+        """测试 /metrics 以Prometheus文本格式输出"""
+        viewer = AsgiViewer(str(tmp_path))
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request'}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/metrics', 'headers': []}
+        asyncio.run(viewer(scope, receive, send))
+        start, body = messages[0], messages[1]['body'].decode('utf-8')
+        assert start['status'] == 200
+        assert (b'content-type', b'text/plain; version=0.0.4; charset=utf-8') in start['headers']
+        assert '# TYPE lad_asgi_queue_depth gauge' in body
+        assert 'lad_asgi_renders_total 0' in body
+        assert 'lad_page_cache_hits_total 0' in body
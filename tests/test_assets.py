@@ -0,0 +1,84 @@
+import hashlib
+
+import pytest
+
+from lad_markdown_viewer import assets
+
+
+@pytest.fixture
+def static_dir(tmp_path, monkeypatch):
+    """把静态资源目录换成临时目录，下载内容由 contents 提供"""
+    monkeypatch.setattr(assets, 'STATIC_DIR', str(tmp_path))
+    contents = {url: f"/* {key} */".encode() for key, (_, url) in assets.VENDOR_ASSETS.items()}
+    monkeypatch.setattr(assets, '_download', lambda url, timeout: contents[url])
+    return tmp_path, contents
+
+
+def write_lock(tmp_path, digests):
+    (tmp_path / "vendor").mkdir(exist_ok=True)
+    lines = [f"{digest}  {name.split('/')[-1]}\n" for name, digest in digests.items()]
+    (tmp_path / "vendor" / "SHA256SUMS").write_text(''.join(lines), encoding="utf-8")
+
+
+class TestFetchVendorAssets:
+    def test_unpinned_assets_are_refused(self, static_dir):
+        """测试没有固定摘要时不写入任何文件"""
+        tmp_path, _ = static_dir
+        assert assets.fetch_vendor_assets() == len(assets.VENDOR_ASSETS)
+        assert not any(assets.vendor_available(key) for key in assets.VENDOR_ASSETS)
+
+    def test_verified_download_is_written(self, static_dir):
+        """测试摘要一致的文件写入，不一致的丢弃"""
+        tmp_path, contents = static_dir
+        digests = {name: hashlib.sha256(contents[url]).hexdigest()
+                   for name, url in assets.VENDOR_ASSETS.values()}
+        css_name = assets.VENDOR_ASSETS['github-markdown-css'][0]
+        digests[css_name] = '0' * 64
+        write_lock(tmp_path, digests)
+        assert assets.vendor_digests() == digests
+        assert assets.fetch_vendor_assets() == 1
+        assert assets.vendor_available('mermaid')
+        assert not assets.vendor_available('github-markdown-css')
+
+    def test_tampered_local_copy_is_replaced(self, static_dir):
+        """测试本地副本与固定摘要不一致时重新下载"""
+        tmp_path, contents = static_dir
+        assets.lock_vendor_assets()
+        name, url = assets.VENDOR_ASSETS['mermaid']
+        (tmp_path / name).write_bytes(b"tampered")
+        assert assets.fetch_vendor_assets() == 0
+        assert (tmp_path / name).read_bytes() == contents[url]
+
+
+class TestCdnFallback:
+    @pytest.fixture(autouse=True)
+    def reset_reports(self, monkeypatch):
+        monkeypatch.setattr(assets, '_cdn_fallback_reported', set())
+
+    def test_unpinned_state_is_reported_once(self, static_dir, capsys):
+        """测试未固定摘要时 auto 模式使用CDN，并在标准错误输出中提示一次"""
+        url = assets.VENDOR_ASSETS['mermaid'][1]
+        assert not assets.vendor_pinned()
+        assert assets.vendor_url('mermaid', 'auto') == url
+        assert assets.vendor_url('mermaid', 'auto') == url
+        err = capsys.readouterr().err
+        assert err.count('未固定摘要') == 1
+        with pytest.raises(FileNotFoundError):
+            assets.vendor_url('mermaid', 'local')
+
+    def test_pinned_but_missing_is_reported(self, static_dir, capsys):
+        """测试已固定摘要但本地副本缺失时提示执行 fetch"""
+        tmp_path, _ = static_dir
+        assets.lock_vendor_assets()
+        assert assets.vendor_pinned()
+        name = assets.VENDOR_ASSETS['mermaid'][0]
+        (tmp_path / name).unlink()
+        capsys.readouterr()
+        assert assets.vendor_url('mermaid', 'auto') == assets.VENDOR_ASSETS['mermaid'][1]
+        assert 'lad-markdown-assets fetch' in capsys.readouterr().err
+        assert assets.vendor_url('github-markdown-css', 'auto').startswith('file:')
+
+    def test_status_reports_unpinned(self, static_dir, capsys):
+        """测试 status 命令说明未固定状态"""
+        assert assets.main(['status']) == 0
+        assert '未固定第三方库' in capsys.readouterr().out
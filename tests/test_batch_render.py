@@ -0,0 +1,92 @@
+import pytest
+
+from lad_markdown_viewer.assets import VENDOR_ASSETS
+from lad_markdown_viewer.batch_render import batch_render, page_vendor_tags, rewrite_md_links
+
+
+@pytest.fixture
+def src_dir(tmp_path):
+    src = tmp_path / "src"
+    (src / "guide").mkdir(parents=True)
+    (src / "index.md").write_text("# 首页\n\n正文\n", encoding="utf-8")
+    (src / "guide" / "intro.md").write_text("# 入门\n\n[首页](../index.md#首页)\n", encoding="utf-8")
+    return src
+
+
+class TestVendorAssets:
+    def test_pages_reference_markdown_css(self, tmp_path):
+        """测试静态页面同时引用 github-markdown-css 和 Mermaid"""
+        tags = page_vendor_tags("guide/intro.md", str(tmp_path))
+        assert VENDOR_ASSETS['github-markdown-css'][1] in tags
+        assert VENDOR_ASSETS['mermaid'][1] in tags
+
+    def test_local_copies_use_relative_urls(self, tmp_path):
+        """测试输出目录中有副本时以相对路径引用"""
+        assets_dir = tmp_path / "_lad_assets"
+        assets_dir.mkdir()
+        for name, _ in VENDOR_ASSETS.values():
+            (assets_dir / name.split('/')[-1]).write_text("", encoding="utf-8")
+        tags = page_vendor_tags("guide/intro.md", str(tmp_path))
+        assert 'href="../_lad_assets/github-markdown-' in tags
+        assert 'src="../_lad_assets/mermaid-' in tags
+
+    def test_rendered_page_is_styled(self, src_dir, tmp_path, monkeypatch):
+        """测试渲染结果包在 markdown-body 中，样式表可以生效"""
+        monkeypatch.setenv("LAD_MARKDOWN_ASSETS", "cdn")
+        out = tmp_path / "out"
+        stats = batch_render(str(src_dir), str(out), jobs=1)
+        assert stats['rendered'] == 2
+        page = (out / "index.html").read_text(encoding="utf-8")
+        assert 'class="markdown-body"' in page
+        assert 'github-markdown' in page
+
+
+class TestLinks:
+    @pytest.mark.parametrize("href, expected", [
+        ("a.md", "a.html"),
+        ("../guide/intro.md#1-入门", "../guide/intro.html#1-入门"),
+        ("a.md?raw=1", "a.html?raw=1"),
+        ("https://example.com/a.md", "https://example.com/a.md"),
+        ("//example.com/a.md", "//example.com/a.md"),
+        ("a.bak.md", "a.bak.md"),
+        ("#readme.md", "#readme.md"),
+        ("a.mdx", "a.mdx"),
+    ])
+    def test_rewrite_md_links(self, href, expected):
+        """测试只改写指向本地 .md 文件的链接"""
+        assert rewrite_md_links(f'<a href="{href}">x</a>') == f'<a href="{expected}">x</a>'
+
+    def test_rendered_links_point_to_html(self, src_dir, tmp_path, monkeypatch):
+        """测试生成的页面之间的链接指向 .html"""
+        monkeypatch.setenv("LAD_MARKDOWN_ASSETS", "cdn")
+        out = tmp_path / "out"
+        batch_render(str(src_dir), str(out), jobs=1)
+        page = (out / "guide" / "intro.html").read_text(encoding="utf-8")
+        assert 'href="../index.html#' in page
+        assert '.md#' not in page
+
+
+class TestPrune:
+    def test_removed_sources_are_pruned(self, src_dir, tmp_path, monkeypatch):
+        """测试源文件删除后，增量渲染删除对应的页面和变空的目录"""
+        monkeypatch.setenv("LAD_MARKDOWN_ASSETS", "cdn")
+        out = tmp_path / "out"
+        batch_render(str(src_dir), str(out), jobs=1)
+        assert (out / "guide" / "intro.html").exists()
+
+        (src_dir / "guide" / "intro.md").unlink()
+        (src_dir / "guide").rmdir()
+        stats = batch_render(str(src_dir), str(out), jobs=1)
+        assert stats['removed'] == 1 and stats['skipped'] == 1
+        assert not (out / "guide").exists()
+        assert (out / "index.html").exists()
+
+    def test_prune_after_signature_change(self, src_dir, tmp_path, monkeypatch):
+        """测试清单因资源模式变化失效时也会清理已删除源文件的页面"""
+        monkeypatch.setenv("LAD_MARKDOWN_ASSETS", "cdn")
+        out = tmp_path / "out"
+        batch_render(str(src_dir), str(out), jobs=1)
+        (src_dir / "index.md").unlink()
+        stats = batch_render(str(src_dir), str(out), jobs=1, force=True)
+        assert stats['removed'] == 1
+        assert not (out / "index.html").exists()
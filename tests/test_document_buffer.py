@@ -0,0 +1,117 @@
+import random
+
+import pytest
+
+from lad_markdown_viewer.document_buffer import (
+    BACKUP_SUFFIX, DocumentBuffer, read_backup_records, restore_backup, split_lines)
+from lad_markdown_viewer.section_index import SectionIndex
+
+TEXT = "# 标题\n第一行\r\n第二行\f\n\n## 小节\n最后一行没有换行"
+
+
+@pytest.fixture
+def md_file(tmp_path):
+    path = tmp_path / "doc.md"
+    path.write_bytes(TEXT.encode("utf-8"))
+    return path
+
+
+def assert_same(buffer, expected):
+    assert len(buffer) == len(expected)
+    assert list(buffer) == expected
+    assert buffer[:] == expected
+    assert buffer.text() == ''.join(expected)
+
+
+class TestPieceTable:
+    def test_open_maps_lines(self, md_file):
+        """测试打开文件后按 '\\n' 切分行，\\r 和 \\f 保留在行内"""
+        with DocumentBuffer.open(str(md_file)) as buffer:
+            assert_same(buffer, split_lines(TEXT))
+            assert buffer[1] == "第一行\r\n"
+            assert buffer[-1] == "最后一行没有换行"
+            assert buffer.piece_count == 1
+            with pytest.raises(IndexError):
+                buffer[len(buffer)]
+            with pytest.raises(ValueError):
+                buffer[::2]
+
+    def test_replace_returns_old_lines(self):
+        """测试替换返回被替换的行，越界区间被截断"""
+        buffer = DocumentBuffer(["a\n", "b\n", "c\n"])
+        assert buffer.replace(1, 2, ["x\n", "y\n"]) == ["b\n"]
+        assert_same(buffer, ["a\n", "x\n", "y\n", "c\n"])
+        assert buffer.replace(3, 100, []) == ["c\n"]
+        buffer.insert(0, ["0\n"])
+        assert_same(buffer, ["0\n", "a\n", "x\n", "y\n"])
+        assert buffer.dirty
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_random_edits_match_list(self, md_file, seed):
+        """测试随机替换序列后的长度、切片和迭代与普通列表一致"""
+        rng = random.Random(seed)
+        expected = split_lines(TEXT)
+        with DocumentBuffer.open(str(md_file)) as buffer:
+            for step in range(300):
+                start = rng.randint(0, len(expected))
+                end = rng.randint(start, min(len(expected), start + 4))
+                new_lines = [f"行{step}-{i}\n" for i in range(rng.randint(0, 3))]
+                assert buffer.replace(start, end, new_lines) == expected[start:end]
+                expected[start:end] = new_lines
+                assert len(buffer) == len(expected)
+                a = rng.randint(0, len(expected))
+                b = rng.randint(a, len(expected))
+                assert buffer[a:b] == expected[a:b]
+                if expected:
+                    line = rng.randrange(len(expected))
+                    assert buffer[line] == expected[line]
+            assert_same(buffer, expected)
+
+    def test_section_index_accepts_buffer(self, md_file):
+        """测试缓冲区可以直接传给 SectionIndex"""
+        with DocumentBuffer.open(str(md_file)) as buffer:
+            index = SectionIndex(buffer)
+            assert index.starts == [0, 4]
+            buffer.replace(1, 1, ["## 插入\n"])
+            index.apply_edit(1, 1, ["## 插入\n"], buffer)
+            assert index.starts == [0, 1, 5]
+
+
+class TestSave:
+    def test_save_and_restore_backup(self, md_file):
+        """测试保存后字节与文本一致，增量备份可以逐次回退"""
+        path = str(md_file)
+        with DocumentBuffer.open(path) as buffer:
+            buffer.replace(1, 2, ["新的第一行\n"])
+            buffer.save()
+            first = buffer.text()
+            assert md_file.read_bytes() == first.encode("utf-8")
+            assert buffer.piece_count == 1 and not buffer.dirty
+
+            buffer.replace(0, 1, [])
+            buffer.replace(len(buffer) - 1, len(buffer), ["最后一行\n", "追加\n"])
+            buffer.save()
+            assert md_file.read_bytes() == buffer.text().encode("utf-8")
+
+        assert len(read_backup_records(path)) == 2
+        assert restore_backup(path, steps=1) == first
+        assert restore_backup(path, steps=2) == TEXT
+        with pytest.raises(ValueError):
+            restore_backup(path, steps=3)
+
+    def test_save_without_changes_skips_backup(self, md_file):
+        """测试没有修改时保存不写入备份记录"""
+        with DocumentBuffer.open(str(md_file)) as buffer:
+            buffer.save()
+        assert not (md_file.parent / ("doc.md" + BACKUP_SUFFIX)).exists()
+        assert md_file.read_bytes() == TEXT.encode("utf-8")
+
+    def test_new_document_requires_path(self, tmp_path):
+        """测试内存中创建的文档需要指定保存路径"""
+        buffer = DocumentBuffer(["# 新文档\n"])
+        with pytest.raises(ValueError):
+            buffer.save()
+        target = tmp_path / "new.md"
+        buffer.save(str(target))
+        assert target.read_text(encoding="utf-8") == "# 新文档\n"
+        buffer.close()
@@ -0,0 +1,160 @@
+import pytest
+
+from lad_markdown_viewer.document_buffer import DocumentBuffer, split_lines
+from lad_markdown_viewer.section_index import SectionIndex
+from lad_markdown_viewer.undo_history import JOURNAL_SUFFIX, UndoHistory
+
+DOCUMENT = """# LAD 平台
+
+前言
+
+## 平台概述
+旧的概述
+
+## 合作机制
+```bash
+# 注释不是标题
+```
+合作内容
+"""
+
+
+def assert_matches_rebuild(index, buffer):
+    fresh = SectionIndex(buffer[:])
+    assert index.starts == fresh.starts
+    assert index.titles == fresh.titles
+    assert index.line_count == fresh.line_count == len(buffer)
+
+
+@pytest.fixture
+def md_path(tmp_path):
+    path = tmp_path / "doc.md"
+    path.write_text(DOCUMENT, encoding="utf-8")
+    return path
+
+
+class TestEditorV10:
+    """与 lad_markdown_editor_v1_0.MarkdownEditorApp 的段落操作相同（编辑器本身需要 tkhtmlview 和图形界面）"""
+
+    def setup_method(self):
+        self.buffer = None
+
+    def teardown_method(self):
+        if self.buffer is not None:
+            self.buffer.close()
+
+    def open(self, path):
+        self.buffer = DocumentBuffer.open(str(path))
+        self.index = SectionIndex(self.buffer)
+
+    def section_text(self, idx):
+        start, end = self.index.section_range(idx)
+        return "".join(self.buffer[start:end]).strip()
+
+    def append_text(self, text):
+        start, old_lines, new_lines = self.buffer.append_text(text)
+        self.index.apply_edit(start, start + len(old_lines), new_lines, self.buffer)
+
+    def save_changes(self, idx, edited):
+        selected = self.index.titles[idx]
+        start, end = self.index.section_range(idx)
+        edited_lines = split_lines(edited + "\n")
+        self.buffer.replace(start, end, edited_lines)
+        self.index.apply_edit(start, end, edited_lines, self.buffer)
+        if self.index.find("编辑日志", level=2) == -1:
+            self.append_text("\n\n## 编辑日志\n")
+        self.append_text(f"\n- 修改段落：{selected}")
+        self.buffer.save()
+
+    def test_section_text(self, md_path):
+        """测试段落列表和选中段落的内容，代码块中的 # 行不作为标题"""
+        self.open(md_path)
+        assert self.index.titles == ["LAD 平台", "平台概述", "合作机制"]
+        assert self.section_text(1) == "## 平台概述\n旧的概述"
+        assert self.section_text(2).endswith("合作内容")
+
+    def test_save_changes_and_edit_log(self, md_path):
+        """测试保存段落修改并追加编辑日志后，索引与重新扫描一致，文件内容正确"""
+        self.open(md_path)
+        self.save_changes(1, "## 平台概述\n新的概述\n\n### 细节\n说明")
+        assert self.index.titles == ["LAD 平台", "平台概述", "细节", "合作机制", "编辑日志"]
+        assert_matches_rebuild(self.index, self.buffer)
+        self.save_changes(3, "## 合作机制\n新的合作内容")
+        assert self.index.titles.count("编辑日志") == 1
+        assert_matches_rebuild(self.index, self.buffer)
+        text = md_path.read_text(encoding="utf-8")
+        assert "旧的概述" not in text and "# 注释不是标题" not in text
+        assert text.endswith("## 编辑日志\n\n- 修改段落：平台概述\n- 修改段落：合作机制")
+
+    def test_edit_removes_heading(self, md_path):
+        """测试修改后的段落内容不含标题时，该段落从列表中消失"""
+        self.open(md_path)
+        self.save_changes(1, "不再是标题的概述")
+        assert "平台概述" not in self.index.titles
+        assert_matches_rebuild(self.index, self.buffer)
+
+
+class TestEditorV11:
+    """与 lad_markdown_editor_v1_1.MarkdownEditor 的段落操作相同"""
+
+    def open(self, path):
+        self.buffer = DocumentBuffer.open(str(path))
+        self.index = SectionIndex(self.buffer)
+        self.history = UndoHistory.open(str(path) + JOURNAL_SUFFIX, len(self.buffer))
+
+    def replace_lines(self, start, end, new_lines):
+        original_lines = self.buffer.replace(start, end, new_lines)
+        self.index.apply_edit(start, end, new_lines, self.buffer)
+        self.history.record(start, original_lines, new_lines, len(self.buffer))
+
+    def append_edit_log(self, section_title):
+        idx = self.index.find('编辑日志', level=2)
+        if idx != -1:
+            i = self.index.starts[idx]
+            self.replace_lines(i + 1, i + 1, split_lines(f"\n### 修改段落：{section_title}\n"))
+
+    def save_changes(self, idx, new_content):
+        sections = self.index.headings()
+        start, end = self.index.section_range(idx)
+        with self.history.group():
+            self.replace_lines(start, end, split_lines(new_content.strip() + "\n"))
+            self.append_edit_log(sections[idx])
+        self.buffer.save()
+
+    def apply(self, applied):
+        for start, end, lines in applied:
+            self.index.apply_edit(start, end, lines, self.buffer)
+        self.buffer.save()
+
+    def test_save_undo_redo(self, md_path):
+        """测试段落修改与编辑日志作为一条记录撤销和重做，每一步索引都与重新扫描一致"""
+        md_path.write_text(DOCUMENT + "\n## 编辑日志\n", encoding="utf-8")
+        self.open(md_path)
+        original = md_path.read_text(encoding="utf-8")
+        self.save_changes(1, "## 平台概述\n新的概述\n## 新增小节\n内容\n")
+        assert self.index.headings()[:4] == ["# LAD 平台", "## 平台概述", "## 新增小节", "## 合作机制"]
+        assert "### 修改段落：## 平台概述" in self.index.headings()
+        assert_matches_rebuild(self.index, self.buffer)
+        edited = md_path.read_text(encoding="utf-8")
+
+        self.apply(self.history.undo(self.buffer))
+        assert md_path.read_text(encoding="utf-8") == original
+        assert_matches_rebuild(self.index, self.buffer)
+
+        self.apply(self.history.redo(self.buffer))
+        assert md_path.read_text(encoding="utf-8") == edited
+        assert_matches_rebuild(self.index, self.buffer)
+        self.buffer.close()
+
+    def test_reopen_keeps_history(self, md_path):
+        """测试重新打开文件后可以撤销上次会话的修改"""
+        self.open(md_path)
+        self.save_changes(2, "## 合作机制\n新的合作内容")
+        self.buffer.close()
+
+        self.open(md_path)
+        assert self.history.can_undo
+        self.apply(self.history.undo(self.buffer))
+        assert md_path.read_text(encoding="utf-8") == DOCUMENT
+        assert self.index.headings() == ["# LAD 平台", "## 平台概述", "## 合作机制"]
+        self.buffer.close()
@@ -0,0 +1,27 @@
+import os
+
+import pytest
+
+from lad_markdown_viewer.file_utils import write_atomic
+
+
+class TestWriteAtomic:
+    def test_write_bytes_and_text(self, tmp_path):
+        """测试写入字节和文本，自动创建上级目录，文本不做换行符转换"""
+        path = tmp_path / "a" / "b" / "data.bin"
+        write_atomic(str(path), b"\x00\x01")
+        assert path.read_bytes() == b"\x00\x01"
+        write_atomic(str(path), "中文\n")
+        assert path.read_bytes() == "中文\n".encode("utf-8")
+        assert os.listdir(path.parent) == ["data.bin"]
+
+    def test_failed_write_keeps_original(self, tmp_path):
+        """测试写入失败时原文件不变，临时文件被删除"""
+        path = tmp_path / "data.txt"
+        path.write_text("原内容", encoding="utf-8")
+        with pytest.raises(UnicodeEncodeError):
+            write_atomic(str(path), "\udc80")
+        with pytest.raises(TypeError):
+            write_atomic(str(path), 123)
+        assert path.read_text(encoding="utf-8") == "原内容"
+        assert os.listdir(tmp_path) == ["data.txt"]
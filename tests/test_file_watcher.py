@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+
+from lad_markdown_viewer import file_watcher
+from lad_markdown_viewer.file_watcher import FileWatcher, LiveDocument
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def touch_later(path, text, seconds):
+    """写入内容并把修改时间推后，避免文件系统时间精度导致轮询看不到变化"""
+    path.write_text(text, encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + int(seconds * 1e9)))
+
+
+class TestFileWatcher:
+    def test_debounce_merges_events(self, tmp_path):
+        """测试连续的变化事件合并为一次检查，只回调一次"""
+        path = tmp_path / "doc.md"
+        path.write_text("# 标题\n", encoding="utf-8")
+        changes = []
+        watcher = FileWatcher(str(path), changes.append, debounce=0.5, use_native=False)
+        for i in range(5):
+            path.write_text(f"# 第{i}次保存\n", encoding="utf-8")
+            watcher.notify()
+            time.sleep(0.02)
+        assert changes == []
+        assert wait_until(lambda: changes)
+        time.sleep(0.6)
+        assert changes == [str(path)]
+        watcher.stop()
+
+    def test_unchanged_content_is_ignored(self, tmp_path):
+        """测试内容不变（touch 或保存相同内容）时不回调"""
+        path = tmp_path / "doc.md"
+        path.write_text("# 标题\n", encoding="utf-8")
+        changes = []
+        watcher = FileWatcher(str(path), changes.append, debounce=0.01, use_native=False)
+        path.write_text("# 标题\n", encoding="utf-8")
+        watcher.notify()
+        time.sleep(0.2)
+        assert changes == []
+        watcher.stop()
+
+    def test_polling_fallback(self, tmp_path, monkeypatch):
+        """测试未安装 watchdog 时使用轮询，修改时间或大小变化后回调"""
+        monkeypatch.setattr(file_watcher, "Observer", None)
+        path = tmp_path / "doc.md"
+        path.write_text("# 标题\n", encoding="utf-8")
+        changed = threading.Event()
+        with FileWatcher(str(path), lambda _: changed.set(), debounce=0.01, poll_interval=0.02) as watcher:
+            assert watcher.mode == "polling"
+            touch_later(path, "# 新标题\n", 1)
+            assert changed.wait(5)
+        assert watcher._thread is None
+
+    def test_stop_cancels_pending_check(self, tmp_path):
+        """测试停止后已安排的检查不再回调"""
+        path = tmp_path / "doc.md"
+        path.write_text("# 标题\n", encoding="utf-8")
+        changes = []
+        watcher = FileWatcher(str(path), changes.append, debounce=0.1, use_native=False)
+        path.write_text("# 修改\n", encoding="utf-8")
+        watcher.notify()
+        watcher.stop()
+        watcher.notify()
+        time.sleep(0.2)
+        assert changes == []
+
+
+class TestLiveDocument:
+    def test_change_produces_patches(self, tmp_path):
+        """测试文件变化后版本号递增，补丁可以从旧版本取得，过新的版本要求整页刷新"""
+        path = tmp_path / "doc.md"
+        path.write_text("# 标题\n\n第一段\n", encoding="utf-8")
+        live = LiveDocument(str(path), debounce=0.01, poll_interval=0.02, use_native=False).start()
+        try:
+            version, html, toc = live.snapshot()
+            assert version == 0 and "第一段" in html
+            touch_later(path, "# 标题\n\n第二段\n", 1)
+            assert live.wait(0, timeout=5) == 1
+            latest, patches = live.patches_since(0)
+            assert latest == 1
+            assert [patch['op'] for patch in patches] == ['replace']
+            assert "第二段" in patches[0]['html']
+            assert live.patches_since(1) == (1, [])
+            assert live.patches_since(5) == (1, None)
+        finally:
+            live.stop()
+
+    def test_stop_wakes_waiters(self, tmp_path):
+        """测试 stop() 之后等待中的客户端立即返回"""
+        path = tmp_path / "doc.md"
+        path.write_text("# 标题\n", encoding="utf-8")
+        live = LiveDocument(str(path), use_native=False).start()
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(live.wait(0, timeout=10)))
+        waiter.start()
+        time.sleep(0.05)
+        live.stop()
+        waiter.join(2)
+        assert result == [0] and live.stopped
@@ -0,0 +1,91 @@
+import pytest
+
+from lad_markdown_viewer.front_matter import (
+    METADATA_SLUG, metadata_table_html, parse_front_matter, split_front_matter)
+from lad_markdown_viewer.markdown_processor import MarkdownProcessor, split_yaml_front_matter
+
+DOCUMENT = """---
+title: 示例 <文档>
+tags: [markdown, yaml]
+draft: false
+author:
+  name: 张三
+  email: zs@example.com
+summary: |
+  第一行
+  第二行
+---
+# 正文标题
+
+内容
+"""
+
+
+class TestParseFrontMatter:
+    def test_nested_values(self):
+        """测试嵌套映射、列表、布尔值和多行字符串按YAML语义解析"""
+        metadata, body = parse_front_matter(DOCUMENT)
+        assert metadata['tags'] == ['markdown', 'yaml']
+        assert metadata['draft'] is False
+        assert metadata['author'] == {'name': '张三', 'email': 'zs@example.com'}
+        assert metadata['summary'] == "第一行\n第二行\n"
+        assert body.startswith("# 正文标题\n")
+
+    @pytest.mark.parametrize("text", [
+        "# 没有 front matter\n",
+        "---\n\n段落上方的分隔线\n",
+        "---\n- 列表\n- 不是映射\n---\n正文\n",
+        "---\ntitle: [未闭合\n---\n正文\n",
+        "---\ntitle: 没有结束分隔符\n",
+    ])
+    def test_not_front_matter(self, text):
+        """测试没有 front matter、YAML无法解析或顶层不是映射时原文保持不变"""
+        assert parse_front_matter(text) == ({}, text)
+
+    def test_split_only_scans_front_matter(self):
+        """测试结束分隔符之后的 '---' 行属于正文"""
+        yaml_text, body = split_front_matter("---\na: 1\n---\n正文\n---\nb: 2\n---\n")
+        assert yaml_text == "a: 1\n"
+        assert body == "正文\n---\nb: 2\n---\n"
+
+    def test_empty_front_matter(self):
+        """测试空的 front matter 被移除，元信息为空"""
+        assert parse_front_matter("---\n---\n正文\n") == ({}, "正文\n")
+
+
+class TestMetadataTable:
+    def test_table_html_escapes_values(self):
+        """测试表格HTML中的值被转义，嵌套值生成子表格，多行字符串保留换行"""
+        metadata, _ = parse_front_matter(DOCUMENT)
+        html = metadata_table_html(metadata)
+        assert html.startswith(f'<h2 id="{METADATA_SLUG}">')
+        assert '<td>示例 &lt;文档&gt;</td>' in html
+        assert '<td>markdown, yaml</td>' in html
+        assert '<td>false</td>' in html
+        assert '<td>第一行<br>第二行</td>' in html
+        assert html.count('<table>') == 2
+        assert metadata_table_html({}) == ''
+
+    def test_render_result(self):
+        """测试渲染结果带有元信息、表格和对应的目录项"""
+        result = MarkdownProcessor().render(DOCUMENT)
+        assert result.metadata['author']['name'] == '张三'
+        assert result.toc[0] == (2, METADATA_SLUG, '文档元信息')
+        assert result.html.index('文档元信息') < result.html.index('正文标题')
+
+    def test_metadata_table_disabled(self):
+        """测试 metadata_table=False 时只解析元信息，不生成表格"""
+        processor = MarkdownProcessor(metadata_table=False)
+        result = processor.render(DOCUMENT)
+        assert result.metadata['title'] == '示例 <文档>'
+        assert '文档元信息' not in result.html
+        assert all(slug != METADATA_SLUG for _, slug, _ in result.toc)
+        assert processor.cache_signature != MarkdownProcessor().cache_signature
+
+    def test_legacy_markdown_table(self):
+        """测试兼容接口把元信息放回为Markdown表格，嵌套值写在一个单元格内"""
+        metadata, text = split_yaml_front_matter(DOCUMENT)
+        assert metadata['draft'] is False
+        assert text.startswith("## 文档元信息\n\n| 字段 | 值 |\n")
+        assert "| author | {email: zs@example.com, name: 张三} |" in text
+        assert text.endswith("# 正文标题\n\n内容\n")
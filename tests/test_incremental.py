@@ -0,0 +1,105 @@
+import random
+
+import pytest
+
+from lad_markdown_viewer.incremental import IncrementalRenderer
+from lad_markdown_viewer.markdown_processor import MarkdownProcessor
+
+BLOCKS = [
+    "# 标题",
+    "## 小节",
+    "普通段落，含 **粗体** 和 `代码`",
+    "- 列表项\n- 第二项",
+    "> 引用内容",
+    "```python\nx = 1\n\n\ny = 2\n```",
+    "| 列 | 值 |\n|---|---|\n| a | 1 |",
+    "```mermaid\ngraph TD; A-->B\n```",
+    "另一个段落 &amp; 实体",
+]
+
+
+def apply_patches(dom, patches):
+    """按 ladApplyPatches 的语义把补丁应用到 [(块ID, HTML)] 列表上"""
+    dom = list(dom)
+
+    def index_of(block_id):
+        return next(i for i, (candidate, _) in enumerate(dom) if candidate == block_id)
+
+    for patch in patches:
+        if patch['op'] == 'remove':
+            del dom[index_of(patch['id'])]
+        elif patch['op'] == 'replace':
+            dom[index_of(patch['id'])] = (patch['id'], patch['html'])
+        else:
+            position = index_of(patch['before']) if patch['before'] else len(dom)
+            dom.insert(position, (patch['id'], patch['html']))
+    return dom
+
+
+def full_render(text):
+    return MarkdownProcessor().render(text)
+
+
+class TestIncrementalRenderer:
+    def setup_method(self):
+        self.renderer = IncrementalRenderer(MarkdownProcessor())
+
+    def update(self, dom, blocks):
+        text = "\n\n".join(blocks) + "\n"
+        dom = apply_patches(dom, self.renderer.update(text))
+        expected = full_render(text)
+        assert ''.join(html for _, html in dom) == expected.html
+        assert self.renderer.toc_items == expected.toc
+        assert [block_id for block_id, _ in dom] == [block_id for block_id, _ in self.renderer._blocks]
+        return dom
+
+    def test_initial_render_matches_full(self):
+        """测试首次渲染的各块拼接后与整篇渲染一致（含YAML元信息）"""
+        dom = self.update([], ["---\ntitle: 测试\n---"] + BLOCKS)
+        html = self.renderer.html()
+        assert html.startswith('<div id="lad-md-root">')
+        assert html.count('class="md-block"') == len(dom)
+
+    def test_unchanged_blocks_are_untouched(self):
+        """测试只修改一个块时只生成一个替换补丁，其余块的ID不变"""
+        blocks = list(BLOCKS)
+        self.update([], blocks)
+        ids = [block_id for block_id, _ in self.renderer._blocks]
+        blocks[3] = "- 修改后的列表"
+        patches = self.renderer.update("\n\n".join(blocks) + "\n")
+        assert [patch['op'] for patch in patches] == ['replace']
+        assert patches[0]['id'] == ids[3]
+        assert self.renderer.update("\n\n".join(blocks) + "\n") == []
+
+    def test_insert_and_remove(self):
+        """测试在开头、中间和末尾插入以及删除块"""
+        blocks = list(BLOCKS[:4])
+        dom = self.update([], blocks)
+        for new_blocks in (["# 开头"] + blocks,
+                           blocks[:2] + ["新段落一", "新段落二"] + blocks[2:],
+                           blocks + ["末尾"],
+                           blocks[1:3],
+                           []):
+            dom = self.update(dom, new_blocks)
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_random_edits_match_full_render(self, seed):
+        """测试随机编辑序列中，补丁应用后的页面始终与整篇重新渲染一致"""
+        rng = random.Random(seed)
+        blocks = [rng.choice(BLOCKS) for _ in range(8)]
+        dom = self.update([], blocks)
+        for step in range(60):
+            start = rng.randint(0, len(blocks))
+            end = rng.randint(start, min(len(blocks), start + 3))
+            count = rng.randint(0, 3)
+            blocks[start:end] = [rng.choice(BLOCKS + [f"第{step}步的段落"]) for _ in range(count)]
+            dom = self.update(dom, blocks)
+
+    def test_update_file(self, tmp_path):
+        """测试从文件更新与从文本更新得到相同的结果"""
+        text = "\n\n".join(BLOCKS) + "\n"
+        path = tmp_path / "doc.md"
+        path.write_text(text, encoding="utf-8")
+        dom = apply_patches([], self.renderer.update_file(str(path)))
+        assert ''.join(html for _, html in dom) == full_render(text).html
+        assert self.renderer.update(text) == []
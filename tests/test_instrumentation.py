@@ -0,0 +1,67 @@
+import threading
+
+from lad_markdown_viewer import instrumentation
+from lad_markdown_viewer.instrumentation import (
+    RenderMetrics, add_render_collector, collect_render_stats, remove_render_collector,
+)
+from lad_markdown_viewer.link_graph import extract_links
+from lad_markdown_viewer.markdown_processor import MarkdownProcessor
+from lad_markdown_viewer.web_viewer import create_app
+
+
+class TestCollectors:
+    def test_stats_per_thread(self):
+        """测试 collect_render_stats 只统计当前线程的渲染"""
+        processor = MarkdownProcessor()
+        with collect_render_stats() as stats:
+            processor.render("# 标题\n\n正文\n")
+            thread = threading.Thread(target=processor.render, args=("其他线程\n",))
+            thread.start()
+            thread.join()
+        assert stats.renders == 1
+        assert set(stats.last.stages) >= {'front_matter', 'parse'}
+        assert stats.last.kind == 'page'
+
+    def test_kinds_filter(self):
+        """测试 RenderMetrics 只统计指定类别，链接检查的渲染不计入页面渲染"""
+        metrics = RenderMetrics(kinds=('page',))
+        add_render_collector(metrics)
+        try:
+            MarkdownProcessor().render("# 页面\n")
+            extract_links('a.md', "# 链接\n\n[x](b.md)\n")
+        finally:
+            remove_render_collector(metrics)
+        assert metrics.renders == 1
+        assert metrics.quantiles('total')
+        assert 'lad_render_stage_seconds_count{stage="total"} 1' in metrics.prometheus_text()
+
+
+class TestAppMetrics:
+    def test_apps_do_not_share_or_leak_observers(self, tmp_path):
+        """测试每个应用只统计自己的请求，不注册全局观察者"""
+        (tmp_path / "README.md").write_text("# 标题\n\n正文\n", encoding="utf-8")
+        observers = list(instrumentation._observers)
+        first = create_app(str(tmp_path))
+        second = create_app(str(tmp_path))
+        assert instrumentation._observers == observers
+
+        assert first.test_client().get("/").status_code == 200
+        assert first.extensions['lad_render_metrics'].renders == 1
+        assert second.extensions['lad_render_metrics'].renders == 0
+        # 请求结束后不再统计该线程中的渲染
+        MarkdownProcessor().render("# 请求之外\n")
+        assert first.extensions['lad_render_metrics'].renders == 1
+
+        body = first.test_client().get("/metrics").get_data(as_text=True)
+        assert 'lad_render_renders_total 1' in body
+        assert 'lad_page_cache_hits_total' in body
+
+    def test_backlinks_are_not_page_renders(self, tmp_path):
+        """测试反向链接查询引起的渲染不计入页面渲染的统计"""
+        (tmp_path / "README.md").write_text("# 首页\n\n[a](a.md)\n", encoding="utf-8")
+        (tmp_path / "a.md").write_text("# A\n", encoding="utf-8")
+        app = create_app(str(tmp_path))
+        response = app.test_client().get("/backlinks?md=a.md")
+        assert response.status_code == 200
+        assert response.get_json()
+        assert app.extensions['lad_render_metrics'].renders == 0
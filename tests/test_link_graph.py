@@ -0,0 +1,104 @@
+import os
+
+import pytest
+
+from lad_markdown_viewer.link_graph import DOC, FILE, OUTSIDE, LinkGraph, main, resolve_link
+from lad_markdown_viewer.markdown_processor import MarkdownProcessor
+
+GUIDE = """# 使用指南
+
+## 安装 **步骤**
+
+见 [API](api.md#接口列表) 和 [图片](img/logo.png)。
+
+[失效锚点](api.md#不存在)
+[失效文件](missing.md)
+[目录外](../outside.md)
+[外部](https://example.com/a.md)
+[本页](#安装-<strong>步骤</strong>)
+
+```
+[代码块中的链接](nothing.md)
+```
+"""
+
+API = """# API
+
+## 接口列表
+
+<a id="raw-anchor"></a>
+返回 [指南](guide.md)
+"""
+
+
+@pytest.fixture
+def docs_dir(tmp_path):
+    (tmp_path / "guide.md").write_text(GUIDE, encoding="utf-8")
+    (tmp_path / "api.md").write_text(API, encoding="utf-8")
+    (tmp_path / "img").mkdir()
+    (tmp_path / "img" / "logo.png").write_bytes(b"png")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "child.md").write_text("[上级](/api.md#raw-anchor)\n", encoding="utf-8")
+    return tmp_path
+
+
+class TestResolveLink:
+    def test_resolve(self):
+        """测试相对路径、根路径、目录外路径和外部链接的解析"""
+        assert resolve_link("a/b.md", "../c.md#x") == (DOC, "c.md", "x")
+        assert resolve_link("a/b.md", "/img/p%20q.png") == (FILE, "img/p q.png", "")
+        assert resolve_link("a/b.md", "#top") == (DOC, "a/b.md", "top")
+        assert resolve_link("b.md", "../c.md") == (OUTSIDE, "../c.md", "")
+        assert resolve_link("b.md", "mailto:x@example.com") is None
+        assert resolve_link("b.md", "//cdn.example.com/x.js") is None
+
+
+class TestLinkGraph:
+    def test_anchors_match_toc(self, docs_dir):
+        """测试锚点与TocRenderer生成的标题ID一致，并包含原始HTML中的id"""
+        graph = LinkGraph(docs_dir)
+        graph.update(jobs=1)
+        toc = MarkdownProcessor().render(GUIDE).toc
+        assert {slug for _, slug, _ in toc} <= graph.anchors("guide.md")
+        assert "raw-anchor" in graph.anchors("api.md")
+
+    def test_check_reports_broken_links(self, docs_dir):
+        """测试失效的锚点、文件和目录外链接，代码块中的链接不计入"""
+        graph = LinkGraph(docs_dir)
+        graph.update(jobs=1)
+        broken = {(item['md'], item['href']): item for item in graph.check()}
+        assert set(broken) == {("guide.md", "api.md#不存在"), ("guide.md", "missing.md"),
+                               ("guide.md", "../outside.md")}
+        assert broken[("guide.md", "missing.md")]['reason'] == '文件不存在'
+        assert broken[("guide.md", "missing.md")]['line'] == 8
+        assert all(link['target'] != 'nothing.md' for link in graph.links("guide.md"))
+
+    def test_backlinks(self, docs_dir):
+        """测试反向链接随文档修改和删除更新"""
+        graph = LinkGraph(docs_dir)
+        graph.update(jobs=1)
+        assert [hit['md'] for hit in graph.backlinks("api.md")] == ["guide.md", "guide.md", "sub/child.md"]
+        os.unlink(docs_dir / "sub" / "child.md")
+        (docs_dir / "guide.md").write_text("# 使用指南\n", encoding="utf-8")
+        stats = graph.update(jobs=1)
+        assert stats['removed'] == 1 and stats['parsed'] == 1
+        assert graph.backlinks("api.md") == []
+        assert graph.backlinks("guide.md")[0]['md'] == "api.md"
+
+    def test_cache_roundtrip(self, docs_dir):
+        """测试保存后重新打开，未修改的文档不再解析"""
+        path = str(docs_dir / ".cache")
+        graph = LinkGraph(docs_dir, path)
+        graph.update(jobs=1)
+        graph.save()
+        reopened = LinkGraph.open(docs_dir, path)
+        stats = reopened.update(jobs=1)
+        assert stats['skipped'] == 3 and not stats['changed']
+        assert reopened.check() == graph.check()
+
+    def test_main_exit_code(self, docs_dir, capsys):
+        """测试有失效链接时命令行返回1"""
+        assert main([str(docs_dir), "--no-cache"]) == 1
+        (docs_dir / "guide.md").write_text("[API](api.md#接口列表)\n", encoding="utf-8")
+        assert main([str(docs_dir), "--no-cache"]) == 0
+        assert "失效链接 0" in capsys.readouterr().out
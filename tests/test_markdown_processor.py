@@ -0,0 +1,165 @@
+import io
+import re
+
+import mistune
+import pytest
+
+from lad_markdown_viewer import markdown_processor
+from lad_markdown_viewer.markdown_processor import MarkdownProcessor
+
+ENTITY_TEXT = "a &amp; b &copy; &lt;x&gt; &#65; &#x42; &unknown; 5 < 6 & 7"
+
+HEADING_RE = re.compile(r'<h(\d) id="([^"]*)">(.*?)</h\1>')
+
+
+class TestEntityEscaping:
+    def setup_method(self):
+        self.processor = MarkdownProcessor(metadata_table=False)
+
+    def render(self, markdown):
+        return self.processor.render(markdown).html
+
+    def test_paragraph_matches_mistune(self):
+        """测试正文中的实体引用与mistune.html输出一致，不会被二次转义"""
+        markdown = ENTITY_TEXT + "\n"
+        assert self.render(markdown) == mistune.html(markdown)
+        assert "&amp;amp;" not in self.render(markdown)
+
+    def test_table_cells_match_mistune(self):
+        """测试表格单元格中的实体引用"""
+        markdown = f"| 列 | 值 |\n|---|---|\n| {ENTITY_TEXT} | &copy; |\n"
+        assert self.render(markdown) == mistune.html(markdown)
+
+    def test_heading_text_and_toc(self):
+        """测试标题、目录文本和锚点中的实体引用"""
+        markdown = f"## {ENTITY_TEXT}\n"
+        expected = re.sub(r'<h2>(.*)</h2>', r'\1', mistune.html(markdown)).strip()
+        result = self.processor.render(markdown)
+        level, slug, text = HEADING_RE.search(result.html).groups()
+        assert text == expected
+        assert result.toc[0][1] == slug
+        assert result.toc[0][2] == expected
+        assert "&amp;amp;" not in slug
+
+    @pytest.mark.parametrize("markdown", [
+        "`&amp; <b>`\n",
+        "```\n&amp; <script>\n```\n",
+        "[&copy; link](http://example.com/?a=1&amp;b=2 \"&lt;t&gt;\")\n",
+        "<span title=\"&amp;\">raw &amp;</span>\n",
+    ])
+    def test_other_nodes_match_mistune(self, markdown):
+        """测试代码、链接和原始HTML的转义与mistune.html一致"""
+        assert self.render(markdown) == mistune.html(markdown)
+
+    def test_cache_signature_changed(self):
+        """测试缓存签名区分新旧转义方式，旧的磁盘缓存不会被复用"""
+        assert 'safe_entity' in self.processor.cache_signature
+        assert 'safe_entity' not in MarkdownProcessor(legacy_unescape=True).cache_signature
+
+
+REF_DOCUMENT = """---
+title: 引用
+---
+
+# 开头
+
+先使用 [后面定义的链接][later] 和 [Later]。
+
+""" + "填充段落\n\n" * 50 + """[early]: http://example.com/early "早"
+
+中间使用 [early]
+
+""" + "填充段落\n\n" * 50 + """[later]: http://example.com/later
+[early]: http://example.com/ignored
+"""
+
+
+class TestChunkedRendering:
+    def setup_method(self):
+        self.processor = MarkdownProcessor()
+
+    @pytest.fixture
+    def md_path(self, tmp_path):
+        path = tmp_path / "refs.md"
+        path.write_text(REF_DOCUMENT, encoding="utf-8")
+        return str(path)
+
+    def test_small_file_renders_whole(self, md_path):
+        """测试不超过阈值的文件整篇渲染，结果与 render 一致"""
+        expected = self.processor.render(REF_DOCUMENT)
+        assert self.processor.render_file(md_path, chunk_size=64) == expected.html
+        assert self.processor.render_document(md_path, chunk_size=64).toc == expected.toc
+
+    def test_definitions_across_chunks(self, md_path, monkeypatch):
+        """测试大文件分片渲染时，定义与使用位于不同分片的引用链接仍然有效"""
+        monkeypatch.setattr(markdown_processor, 'WHOLE_DOCUMENT_LIMIT', 0)
+        expected = self.processor.render(REF_DOCUMENT).html
+        html = self.processor.render_file(md_path, chunk_size=64)
+        assert html == expected
+        assert html.count('href="http://example.com/later"') == 2
+        assert 'href="http://example.com/early" title="早"' in html
+        assert 'ignored' not in html
+        assert len(list(self.processor.iter_results(open(md_path, encoding="utf-8"), chunk_size=64))) > 2
+
+    def test_stream_carries_earlier_definitions(self, md_path):
+        """测试流式渲染时前面分片中的定义对后面的分片生效"""
+        with open(md_path, encoding="utf-8") as f:
+            html = ''.join(self.processor.iter_render(f, chunk_size=64))
+        assert '<a href="http://example.com/early" title="早">early</a>' in html
+
+
+STREAM_DOCUMENT = "---\ntitle: 流式\ntags: [a, b]\n---\n\n# 标题\n\n" + "".join(
+    f"## 第{i}节\n\n段落 **{i}** 文本\n\n```python\nx = {i}\n\n\ny = 2\n```\n\n"
+    f"```mermaid\ngraph TD; A{i}-->B\n```\n\n- 列表\n\n- 第二项\n\n| 列 | 值 |\n|---|---|\n| a | {i} |\n\n"
+    for i in range(20))
+
+
+class TestIterRender:
+    def setup_method(self):
+        self.processor = MarkdownProcessor()
+
+    def test_chunks_match_full_render(self):
+        """测试各分片的HTML依次拼接后与整篇渲染一致，代码块、Mermaid和列表不被拆开"""
+        chunks = list(self.processor.iter_render(io.StringIO(STREAM_DOCUMENT), chunk_size=128))
+        assert len(chunks) > 5
+        assert ''.join(chunks) == self.processor.render(STREAM_DOCUMENT).html
+        for chunk in chunks:
+            assert chunk.count('<pre>') == chunk.count('</pre>')
+            assert chunk.count('<ul>') == chunk.count('</ul>')
+
+    def test_binary_file_object(self):
+        """测试二进制文件对象按UTF-8解码，结果与文本文件对象一致"""
+        text = ''.join(self.processor.iter_render(io.StringIO(STREAM_DOCUMENT), chunk_size=128))
+        data = ''.join(self.processor.iter_render(io.BytesIO(STREAM_DOCUMENT.encode("utf-8")), chunk_size=128))
+        assert data == text
+
+    def test_front_matter_only_in_first_chunk(self):
+        """测试只有第一个分片识别 front matter，后面分片中的 '---' 行按普通Markdown处理"""
+        text = "---\ntitle: 首页\n---\n\n正文\n\n" + "填充段落\n\n" * 20 + "---\ntitle: 不是元信息\n---\n"
+        html = ''.join(self.processor.iter_render(io.StringIO(text), chunk_size=32))
+        assert html.count('<h2 id="文档元信息">') == 1
+        assert '<td>首页</td>' in html
+        assert 'title: 不是元信息' in html
+
+    def test_reads_lazily(self):
+        """测试产出第一个分片时只读取了开头的一部分行"""
+        consumed = []
+
+        def lines():
+            for line in io.StringIO(STREAM_DOCUMENT):
+                consumed.append(line)
+                yield line
+
+        chunks = self.processor.iter_render(lines(), chunk_size=128)
+        first = next(chunks)
+        assert '<h1 id="标题">标题</h1>' in first
+        assert len(consumed) < len(STREAM_DOCUMENT.splitlines()) // 4
+        assert first + ''.join(chunks) == self.processor.render(STREAM_DOCUMENT).html
+
+    def test_module_level_function(self, tmp_path):
+        """测试模块级 iter_render 使用默认处理器"""
+        path = tmp_path / "doc.md"
+        path.write_text(STREAM_DOCUMENT, encoding="utf-8")
+        with open(path, "rb") as f:
+            html = ''.join(markdown_processor.iter_render(f, chunk_size=256))
+        assert html == markdown_processor.get_default_processor().render(STREAM_DOCUMENT).html
@@ -0,0 +1,101 @@
+from lad_markdown_viewer.markdown_processor import MarkdownProcessor
+from lad_markdown_viewer.mermaid_prerender import MermaidSvgCache, MmdcRenderer, uniquify_svg_ids
+
+DOCUMENT = """# 图表
+
+```mermaid
+graph TD; A-->B
+```
+
+```mermaid
+graph TD; A-->B
+```
+
+```mermaid
+graph TD; FAIL-->X
+```
+"""
+
+
+class FakeRenderer:
+    """记录每次渲染的图表；源码中含 FAIL 的图表渲染失败"""
+
+    def __init__(self, signature="fake:1"):
+        self.signature = signature
+        self.calls = []
+
+    def render_many(self, sources):
+        self.calls.append(list(sources))
+        return [None if "FAIL" in source else f'<svg id="my-svg"><style>#my-svg{{}}</style>{len(source)}</svg>'
+                for source in sources]
+
+
+class TestMermaidSvgCache:
+    def test_key_depends_on_renderer_signature(self):
+        """测试缓存键由渲染器标识和源码共同决定"""
+        source = "graph TD; A-->B"
+        assert MermaidSvgCache(FakeRenderer()).key(source) == MermaidSvgCache(FakeRenderer()).key(source)
+        assert MermaidSvgCache(FakeRenderer()).key(source) != MermaidSvgCache(FakeRenderer("fake:2")).key(source)
+        assert MermaidSvgCache(FakeRenderer()).key(source) != MermaidSvgCache(FakeRenderer()).key(source + " ")
+
+    def test_duplicates_render_once(self):
+        """测试同一批中重复的图表只渲染一次，再次请求时命中缓存，失败的图表不重复尝试"""
+        renderer = FakeRenderer()
+        cache = MermaidSvgCache(renderer)
+        sources = ["graph TD; A-->B", "graph TD; A-->B", "graph TD; FAIL-->X"]
+        first = cache.render_many(sources)
+        assert renderer.calls == [["graph TD; A-->B", "graph TD; FAIL-->X"]]
+        assert first["graph TD; FAIL-->X"] is None
+        second = cache.render_many(sources)
+        assert second == first and len(renderer.calls) == 1
+        assert cache.stats == {'hits': 1, 'misses': 2, 'failures': 1, 'entries': 1}
+
+    def test_svg_ids_are_unique(self):
+        """测试内联的SVG根元素ID按缓存键改写，样式选择器随之改写"""
+        cache = MermaidSvgCache(FakeRenderer())
+        svg = cache.render_many(["graph TD; A-->B"])["graph TD; A-->B"]
+        new_id = 'mermaid-' + cache.key("graph TD; A-->B")[:16]
+        assert f'id="{new_id}"' in svg and f'#{new_id}{{' in svg and 'my-svg' not in svg
+        assert uniquify_svg_ids('<svg id="a"><g id="a-b"/></svg>', 'z') == '<svg id="z"><g id="a-b"/></svg>'
+
+    def test_disk_cache_shared(self, tmp_path):
+        """测试磁盘缓存可被另一个实例读取，无需再次渲染"""
+        MermaidSvgCache(FakeRenderer(), directory=str(tmp_path)).render_many(["graph TD; A-->B"])
+        renderer = FakeRenderer()
+        cache = MermaidSvgCache(renderer, directory=str(tmp_path))
+        assert cache.render_many(["graph TD; A-->B"])["graph TD; A-->B"].startswith("<svg")
+        assert renderer.calls == [] and cache.hits == 1
+
+    def test_lru_limit(self):
+        """测试内存中的SVG数量不超过 max_entries"""
+        cache = MermaidSvgCache(FakeRenderer(), max_entries=2)
+        cache.render_many([f"graph TD; A-->{i}" for i in range(5)])
+        assert cache.stats['entries'] == 2
+
+    def test_inline_into_rendered_page(self):
+        """测试渲染结果中成功的图表替换为SVG，失败的图表保持原样交给浏览器"""
+        cache = MermaidSvgCache(FakeRenderer())
+        html = MarkdownProcessor(mermaid_svg_cache=cache).render(DOCUMENT).html
+        assert html.count('data-processed="true"><svg') == 2
+        assert '<div class="mermaid">graph TD; FAIL-->X</div>' in html
+
+
+class TestMmdcMissing:
+    def test_renderer_unavailable(self):
+        """测试找不到 mmdc 时渲染器不可用，所有图表返回 None"""
+        renderer = MmdcRenderer(executable="lad-no-such-mmdc")
+        assert not renderer.available
+        assert renderer.signature == "mmdc:unavailable:default"
+        assert renderer.render("graph TD; A-->B") is None
+        assert renderer.render_many(["a", "b"]) == [None, None]
+
+    def test_page_falls_back_to_browser(self):
+        """测试没有 mmdc 时页面与未启用预渲染时一致，图表由浏览器渲染"""
+        cache = MermaidSvgCache(MmdcRenderer(executable="lad-no-such-mmdc"))
+        html = MarkdownProcessor(mermaid_svg_cache=cache).render(DOCUMENT).html
+        assert html == MarkdownProcessor().render(DOCUMENT).html
+        assert 'data-processed' not in html
+        assert cache.failures == 2
+        # 失败记录在内存中，同一进程内不再重复尝试
+        MarkdownProcessor(mermaid_svg_cache=cache).render(DOCUMENT)
+        assert cache.failures == 2
@@ -0,0 +1,118 @@
+import os
+import sys
+import threading
+
+from lad_markdown_viewer.render_cache import DiskRenderCache, RenderCache, make_cache_key
+from lad_markdown_viewer.render_result import RenderResult
+
+
+class TestRenderCache:
+    def test_key_depends_on_options(self):
+        """测试缓存键同时取决于文本和渲染选项"""
+        assert make_cache_key("# 标题") == make_cache_key("# 标题")
+        assert make_cache_key("# 标题") != make_cache_key("# 标题", ("mermaid",))
+        assert make_cache_key("# 标题") != make_cache_key("# 标题 ")
+
+    def test_eviction_by_entries(self):
+        """测试超过条目数上限时按LRU顺序淘汰，最近读取过的条目保留"""
+        cache = RenderCache(max_entries=2)
+        cache.put("a", "<p>a</p>")
+        cache.put("b", "<p>b</p>")
+        assert cache.get("a") == "<p>a</p>"
+        cache.put("c", "<p>c</p>")
+        assert "a" in cache and "c" in cache and "b" not in cache
+        assert cache.stats['evictions'] == 1
+
+    def test_eviction_by_size(self):
+        """测试总字节数超过上限时淘汰最早的条目，超过上限的单个值不缓存"""
+        value = "x" * 1000
+        size = sys.getsizeof(value)
+        cache = RenderCache(max_entries=100, max_bytes=size * 2)
+        for key in ("a", "b", "c"):
+            cache.put(key, value)
+        assert len(cache) == 2 and "a" not in cache
+        assert cache.total_bytes == size * 2
+        assert cache.stats['evictions'] == 1
+
+        cache.put("big", "x" * 5000)
+        assert "big" not in cache and len(cache) == 2
+
+    def test_get_or_render(self):
+        """测试相同文本只渲染一次，命中和未命中次数正确"""
+        cache = RenderCache()
+        calls = []
+
+        def render(text):
+            calls.append(text)
+            return f"<p>{text}</p>"
+
+        assert cache.get_or_render("正文", render) == "<p>正文</p>"
+        assert cache.get_or_render("正文", render) == "<p>正文</p>"
+        assert calls == ["正文"]
+        stats = cache.stats
+        assert stats['hits'] == 1 and stats['misses'] == 1
+
+    def test_counters_under_concurrency(self):
+        """测试多线程同时读取时命中和未命中次数不丢失"""
+        cache = RenderCache()
+        cache.put("a", "<p>a</p>")
+
+        def worker():
+            for _ in range(2000):
+                cache.get("a")
+                cache.get("missing")
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = cache.stats
+        assert stats['hits'] == 8000 and stats['misses'] == 8000
+
+
+class TestDiskRenderCache:
+    def test_roundtrip(self, tmp_path):
+        """测试HTML字符串和 RenderResult 写入后可以原样读回"""
+        disk = DiskRenderCache(str(tmp_path), namespace="1.0")
+        result = RenderResult("<h1 id=\"t\">标题</h1>", toc=[(1, "t", "标题")], metadata={"title": "文档"})
+        disk.put("aa11", "<p>正文</p>")
+        disk.put("bb22", result)
+        assert disk.get("aa11") == "<p>正文</p>"
+        loaded = disk.get("bb22")
+        assert isinstance(loaded, RenderResult)
+        assert loaded.html == result.html and loaded.metadata == result.metadata
+        assert disk.stats == {'hits': 2, 'misses': 0}
+
+    def test_corrupt_entry_is_a_miss(self, tmp_path):
+        """测试损坏的zlib数据按未命中处理，重新写入后恢复正常"""
+        disk = DiskRenderCache(str(tmp_path), namespace="1.0")
+        disk.put("cc33", "<p>正文</p>")
+        with open(disk._path("cc33"), 'wb') as f:
+            f.write(b"not zlib data")
+        assert disk.get("cc33", "默认") == "默认"
+        assert disk.stats['misses'] == 1
+        disk.put("cc33", "<p>新内容</p>")
+        assert disk.get("cc33") == "<p>新内容</p>"
+
+    def test_version_namespace(self, tmp_path):
+        """测试不同版本的命名空间互不可见，purge_stale 删除旧版本目录"""
+        old = DiskRenderCache(str(tmp_path), namespace="1.0")
+        old.put("dd44", "<p>旧版本</p>")
+        new = DiskRenderCache(str(tmp_path), namespace="2.0")
+        assert new.get("dd44") is None
+        new.put("dd44", "<p>新版本</p>")
+        new.purge_stale()
+        assert not os.path.exists(old.directory)
+        assert new.get("dd44") == "<p>新版本</p>"
+
+    def test_memory_falls_back_to_disk(self, tmp_path):
+        """测试内存未命中时从磁盘读取并提升到内存，统计中包含磁盘命中次数"""
+        disk = DiskRenderCache(str(tmp_path), namespace="1.0")
+        RenderCache(disk_cache=disk).put("ee55", "<p>共享</p>")
+        cache = RenderCache(disk_cache=disk)
+        assert cache.get("ee55") == "<p>共享</p>"
+        assert "ee55" in cache
+        assert cache.get("ff66") is None
+        stats = cache.stats
+        assert stats['disk_hits'] == 1 and stats['disk_misses'] == 1 and stats['misses'] == 1
@@ -0,0 +1,140 @@
+import pytest
+
+from lad_markdown_viewer import search_index
+from lad_markdown_viewer.markdown_processor import MarkdownProcessor
+from lad_markdown_viewer.search_index import SearchIndex, render_sections, tokenize
+
+DOCUMENT = """---
+title: 测试文档
+---
+
+开头的介绍 widgets
+
+## Use **bold** text
+
+strong words &amp; more
+
+## The `foo` API
+
+api described here
+
+Setext Heading
+==============
+
+setext body mentions zebra
+
+Second Setext
+-------------
+
+```
+# not a heading
+```
+"""
+
+
+@pytest.fixture
+def docs_dir(tmp_path):
+    (tmp_path / "a.md").write_text(DOCUMENT, encoding="utf-8")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.md").write_text("# 增量渲染\n\n只重新渲染修改过的块\n", encoding="utf-8")
+    return tmp_path
+
+
+class TestSections:
+    def test_slugs_match_toc(self):
+        """测试段落锚点与TocRenderer生成的标题ID一致（含行内标记和Setext标题）"""
+        toc = MarkdownProcessor().render(DOCUMENT).toc
+        sections = render_sections(DOCUMENT)
+        assert [section[0] for section in sections] == [slug for _, slug, _ in toc]
+        # 元信息表格是第一个段落，没有标题的开头内容并入其中
+        assert sections[0][0] == '文档元信息'
+        assert render_sections("前言\n\n# 标题\n")[0] == ('', '', 0, '前言')
+
+    def test_titles_and_text_are_plain(self):
+        """测试标题和正文是渲染后的纯文本"""
+        sections = {slug: (title, level, text) for slug, title, level, text in render_sections(DOCUMENT)}
+        titles = [title for title, _, _ in sections.values()]
+        assert 'Use bold text' in titles
+        assert 'The foo API' in titles
+        assert ('Setext Heading', 1) in [(title, level) for title, level, _ in sections.values()]
+        assert any(text == 'strong words & more' for _, _, text in sections.values())
+        # 代码块中以 # 开头的行不切分段落
+        assert any('# not a heading' in text for _, _, text in sections.values())
+
+    def test_tokenize_cjk_bigrams(self):
+        """测试中日韩文字按相邻两字切分"""
+        assert tokenize("增量渲染 Snake_Case") == ['增量', '量渲', '渲染', 'snake', 'case']
+        assert tokenize("增") == ['增']
+
+
+class TestSearchIndex:
+    def test_search_returns_toc_anchor(self, docs_dir):
+        """测试搜索结果的锚点可以直接跳转"""
+        index = SearchIndex(docs_dir)
+        index.update(jobs=1)
+        hits = index.search("zebra")
+        assert hits[0]['md'] == 'a.md'
+        assert hits[0]['slug'] == 'Setext-Heading'
+        assert 'zebra' in hits[0]['snippet']
+        hits = index.search("bold")
+        toc_slugs = [slug for _, slug, _ in MarkdownProcessor().render(DOCUMENT).toc]
+        assert hits[0]['slug'] in toc_slugs
+        assert hits[0]['title'] == 'Use bold text'
+
+    def test_cjk_prefix_and_subdirectory(self, docs_dir):
+        """测试单字前缀查询和子目录中的文档"""
+        index = SearchIndex(docs_dir)
+        index.update(jobs=1)
+        assert index.search("渲染")[0]['md'] == 'sub/b.md'
+        assert index.search("增")[0]['md'] == 'sub/b.md'
+
+    def test_incremental_update_and_persistence(self, docs_dir):
+        """测试增量更新、删除和保存后重新读取"""
+        path = docs_dir / "index.bin"
+        index = SearchIndex(docs_dir, path)
+        index.update(jobs=1)
+        index.save()
+
+        reopened = SearchIndex.open(docs_dir, path)
+        assert len(reopened) == 2
+        stats = reopened.update(jobs=1)
+        assert stats['skipped'] == 2 and not stats['changed']
+
+        (docs_dir / "sub" / "b.md").unlink()
+        (docs_dir / "c.md").write_text("# New\n\nquokka\n", encoding="utf-8")
+        stats = reopened.update(jobs=1)
+        assert stats['indexed'] == 1 and stats['removed'] == 1
+        assert reopened.search("渲染") == []
+        assert reopened.search("quokka")[0]['slug'] == 'New'
+        reopened.save()
+        assert SearchIndex.open(docs_dir, path).search("quokka")[0]['md'] == 'c.md'
+
+    def test_snippet_uses_indexed_excerpt(self, docs_dir, monkeypatch):
+        """测试摘要来自建立索引时保存的摘录：查询时不渲染文件，文件改动后摘要仍对应命中的段落"""
+        index = SearchIndex(docs_dir)
+        index.update(jobs=1)
+        (docs_dir / "a.md").write_text("# 完全不同的内容\n", encoding="utf-8")
+
+        def fail(text):
+            raise AssertionError("查询时不应渲染文件")
+
+        monkeypatch.setattr(search_index, 'render_sections', fail)
+        hit = index.search("zebra")[0]
+        assert hit['slug'] == 'Setext-Heading'
+        assert 'zebra' in hit['snippet']
+        results = index.search_sections("zebra")
+        assert results[0][2] == ['zebra'] and 'zebra' in results[0][1]
+
+    def test_repeated_edits_are_compacted_without_save(self, docs_dir):
+        """测试不保存索引时，反复修改同一文档后已删除的记录也会被压缩"""
+        index = SearchIndex(docs_dir)
+        index.update(jobs=1)
+        path = docs_dir / "sub" / "b.md"
+        for i in range(40):
+            path.write_text(f"# 第{i}版\n\n内容 quokka{i} 渲染\n", encoding="utf-8")
+            index.update(jobs=1)
+        assert len(index.docs) <= 2 / (1 - search_index.COMPACT_RATIO) + 1
+        assert len(index._deleted) <= search_index.COMPACT_RATIO * len(index.docs)
+        assert len(index.postings['渲染']) // 3 == 1
+        assert index.search("quokka39")[0]['md'] == 'sub/b.md'
+        assert index.search("quokka0") == []
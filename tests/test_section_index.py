@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+from lad_markdown_viewer.section_index import SectionIndex
+
+DOCUMENT = """前言
+# 第一章
+正文
+## 1.1 小节
+```bash
+# 注释不是标题
+```
+#### 四级标题不分段
+## 1.2 小节
+# 第二章
+结尾
+"""
+
+
+def replace(lines, index, start, end, new_lines):
+    """替换行列表的 [start, end) 并增量更新索引"""
+    lines[start:end] = new_lines
+    index.apply_edit(start, end, new_lines, lines)
+
+
+def assert_matches_rebuild(index, lines):
+    fresh = SectionIndex(lines, max_level=index.max_level)
+    assert index.starts == fresh.starts
+    assert index.levels == fresh.levels
+    assert index.titles == fresh.titles
+    assert index.line_count == fresh.line_count
+
+
+class TestLookup:
+    def setup_method(self):
+        self.index = SectionIndex.from_text(DOCUMENT)
+
+    def test_scan(self):
+        """测试标题行号、级别和文本，围栏代码块中的 # 行和四级标题不参与分段"""
+        assert self.index.starts == [1, 3, 8, 9]
+        assert self.index.headings() == ['# 第一章', '## 1.1 小节', '## 1.2 小节', '# 第二章']
+        assert self.index.line_count == 11
+
+    def test_section_at(self):
+        """测试按行号二分查找所在段落"""
+        assert self.index.section_at(0) == -1
+        assert [self.index.section_at(line) for line in range(1, 11)] == [0, 0, 1, 1, 1, 1, 1, 2, 3, 3]
+        assert self.index.section_range(1) == (3, 8)
+        assert self.index.section_range(3) == (9, 11)
+        assert self.index.next_heading(3) == 8
+        assert self.index.next_heading(9) == 11
+        assert self.index.find('1.2 小节') == 2
+        assert self.index.find('第一章', level=2) == -1
+
+
+class TestApplyEdit:
+    def setup_method(self):
+        self.lines = DOCUMENT.splitlines(True)
+        self.index = SectionIndex(self.lines)
+
+    def test_insert_heading_shifts_following(self):
+        """测试插入标题后，其后的标题行号整体平移"""
+        replace(self.lines, self.index, 2, 2, ['## 新小节\n', '内容\n'])
+        assert self.index.starts == [1, 2, 5, 10, 11]
+        assert self.index.section_at(3) == 1
+        assert self.index.section_at(12) == 4
+        assert_matches_rebuild(self.index, self.lines)
+
+    def test_delete_heading(self):
+        """测试删除包含标题的行区间"""
+        replace(self.lines, self.index, 8, 10, [])
+        assert self.index.headings() == ['# 第一章', '## 1.1 小节']
+        assert self.index.section_range(1) == (3, 9)
+        assert_matches_rebuild(self.index, self.lines)
+
+    def test_edit_inside_fence(self):
+        """测试在代码块内写入 # 行不会产生标题"""
+        replace(self.lines, self.index, 5, 6, ['# 仍是注释\n', '# 另一行\n'])
+        assert len(self.index) == 4
+        assert_matches_rebuild(self.index, self.lines)
+
+    def test_remove_fence_marker_rebuilds(self):
+        """测试删除围栏标记后，原代码块中的 # 行变成标题"""
+        replace(self.lines, self.index, 4, 5, [])
+        assert '# 注释不是标题' in self.index.headings()
+        assert_matches_rebuild(self.index, self.lines)
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_random_edits_match_rebuild(self, seed):
+        """测试随机编辑序列后的增量索引与完整重建一致"""
+        rng = random.Random(seed)
+        pool = ['# 标题\n', '## 小节\n', '### 三级\n', '正文\n', '```\n', '# 注释\n', '\n']
+        for _ in range(200):
+            start = rng.randint(0, len(self.lines))
+            end = rng.randint(start, min(len(self.lines), start + 3))
+            new_lines = [rng.choice(pool) for _ in range(rng.randint(0, 3))]
+            replace(self.lines, self.index, start, end, new_lines)
+            assert_matches_rebuild(self.index, self.lines)
+            line = rng.randint(0, max(len(self.lines) - 1, 0))
+            expected = max((i for i, s in enumerate(self.index.starts) if s <= line), default=-1)
+            assert self.index.section_at(line) == expected
@@ -0,0 +1,177 @@
+import json
+
+from lad_markdown_viewer.document_buffer import DocumentBuffer
+from lad_markdown_viewer.section_index import SectionIndex
+from lad_markdown_viewer.undo_history import JOURNAL_SUFFIX, UndoHistory, compact_edit
+
+LINES = ["# 标题\n", "第一行\n", "第二行\n", "第三行\n"]
+
+
+def edit(document, history, start, end, new_lines):
+    """修改文档并记录到历史"""
+    old_lines = document.replace(start, end, new_lines)
+    history.record(start, old_lines, new_lines, line_count=len(document))
+
+
+class TestUndoRedo:
+    def test_compact_edit(self):
+        """测试去掉新旧内容中相同的首尾行"""
+        assert compact_edit(3, ["a", "b", "c"], ["a", "x", "c"]) == (4, ["b"], ["x"])
+        assert compact_edit(0, ["a"], ["a"]) == (1, [], [])
+
+    def test_undo_redo_roundtrip(self):
+        """测试撤销、重做恢复到对应的文档内容，新的编辑清空重做栈"""
+        document = DocumentBuffer(LINES)
+        history = UndoHistory()
+        edit(document, history, 1, 2, ["修改\n"])
+        edit(document, history, 4, 4, ["追加\n"])
+        after = document[:]
+        assert len(history) == 2
+
+        assert history.undo(document) == [(4, 5, [])]
+        history.undo(document)
+        assert document[:] == LINES
+        assert history.undo(document) is None
+
+        history.redo(document)
+        history.redo(document)
+        assert document[:] == after
+        assert history.redo(document) is None
+
+        history.undo(document)
+        edit(document, history, 0, 1, ["# 新标题\n"])
+        assert not history.can_redo
+
+    def test_group_undoes_together(self):
+        """测试 group() 中的多处编辑作为一条记录撤销和重做"""
+        document = DocumentBuffer(LINES)
+        history = UndoHistory()
+        with history.group():
+            edit(document, history, 1, 2, ["甲\n", "乙\n"])
+            with history.group():
+                edit(document, history, 5, 5, ["日志\n"])
+        after = document[:]
+        assert len(history) == 1
+        applied = history.undo(document)
+        assert [start for start, _, _ in applied] == [5, 1]
+        assert document[:] == LINES
+        history.redo(document)
+        assert document[:] == after
+
+    def test_unchanged_edit_is_ignored(self):
+        """测试内容不变的编辑和空的 group 不产生记录"""
+        history = UndoHistory()
+        history.record(0, ["a\n"], ["a\n"])
+        with history.group():
+            pass
+        assert not history.can_undo
+
+    def test_eviction_keeps_latest(self):
+        """测试总大小超过上限时淘汰最早的记录，最新的一条总会保留"""
+        document = DocumentBuffer(LINES)
+        history = UndoHistory(max_bytes=40)
+        for i in range(5):
+            edit(document, history, 1, 2, [f"第{i}次修改\n"])
+        assert history.size_bytes <= 40
+        assert history.evicted == 5 - len(history)
+        assert history.evicted > 0
+
+        big = UndoHistory(max_bytes=1)
+        edit(document, big, 0, 1, ["很长的一行" * 10 + "\n"])
+        assert len(big) == 1 and big.size_bytes > 1
+
+
+class TestJournal:
+    def make(self, tmp_path):
+        journal = str(tmp_path / ("doc.md" + JOURNAL_SUFFIX))
+        document = DocumentBuffer(LINES)
+        history = UndoHistory(journal_path=journal)
+        edit(document, history, 1, 2, ["修改\n"])
+        edit(document, history, 4, 4, ["追加\n", "两行\n"])
+        history.undo(document)
+        return journal, document, history
+
+    def test_recover_undo_and_redo_stacks(self, tmp_path):
+        """测试从日志恢复撤销和重做栈"""
+        journal, document, history = self.make(tmp_path)
+        recovered = UndoHistory.open(journal, len(document))
+        assert len(recovered) == 1 and recovered.can_redo
+        recovered.redo(document)
+        recovered.undo(document)
+        recovered.undo(document)
+        assert document[:] == LINES
+
+    def test_truncated_last_line(self, tmp_path):
+        """测试崩溃时只写了一半的最后一行被忽略"""
+        journal, document, history = self.make(tmp_path)
+        with open(journal, 'a', encoding='utf-8') as f:
+            f.write('{"op": "do", "edits": [[0, ["# 标')
+        recovered = UndoHistory.open(journal, len(document))
+        assert len(recovered) == 1 and recovered.can_redo
+        # 日志被重写为不含残缺行的最小日志
+        with open(journal, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        assert records[-1]['lines'] == len(document)
+        recovered.undo(document)
+        assert document[:] == LINES
+
+    def test_line_count_mismatch_discards_history(self, tmp_path):
+        """测试文件被其他程序修改（行数不一致）时丢弃历史并清空日志"""
+        journal, document, history = self.make(tmp_path)
+        recovered = UndoHistory.open(journal, len(document) + 1)
+        assert not recovered.can_undo and not recovered.can_redo
+        assert not (tmp_path / ("doc.md" + JOURNAL_SUFFIX)).exists()
+
+    def test_missing_journal(self, tmp_path):
+        """测试日志文件不存在时返回空的历史"""
+        recovered = UndoHistory.open(str(tmp_path / "none.jsonl"), 3)
+        assert len(recovered) == 0
+
+    def test_journal_is_compacted(self, tmp_path):
+        """测试日志超过上限后按当前历史重写"""
+        journal = str(tmp_path / ("doc.md" + JOURNAL_SUFFIX))
+        document = DocumentBuffer(LINES)
+        history = UndoHistory(max_bytes=64, journal_path=journal)
+        for i in range(2000):
+            edit(document, history, 1, 2, [f"第{i}次\n"])
+        with open(journal, 'r', encoding='utf-8') as f:
+            assert len(f.readlines()) < 2000
+        recovered = UndoHistory.open(journal, len(document), max_bytes=64)
+        assert len(recovered) == len(history)
+        recovered.undo(document)
+        assert document[1] == "第1998次\n"
+
+
+class TestAppendText:
+    def append(self, document, index, history, text):
+        """与 v1.1 编辑器的 append_text 相同：拼接到最后一行后更新索引和历史"""
+        start, old_lines, new_lines = document.append_text(text)
+        index.apply_edit(start, start + len(old_lines), new_lines, document)
+        history.record(start, old_lines, new_lines, len(document))
+
+    def test_file_without_trailing_newline(self, tmp_path):
+        """测试原文末行没有换行符时追加模板，保存、撤销和日志恢复的行号保持一致"""
+        path = tmp_path / "doc.md"
+        original = "# 标题\n正文最后一行"
+        path.write_text(original, encoding="utf-8")
+        journal = str(path) + JOURNAL_SUFFIX
+        document = DocumentBuffer.open(str(path))
+        index = SectionIndex(document)
+        history = UndoHistory(journal_path=journal)
+
+        self.append(document, index, history, "\n## 模板\n模板内容\n")
+        document.save()
+        assert len(document) == 4 and index.line_count == 4
+        assert index.headings() == ['# 标题', '## 模板']
+        assert path.read_text(encoding="utf-8") == original + "\n## 模板\n模板内容\n"
+
+        # 日志中最后记录的行数与保存后的文件一致，重新打开时历史仍然可用
+        recovered = UndoHistory.open(journal, len(document))
+        assert recovered.can_undo
+
+        for start, end, lines in history.undo(document):
+            index.apply_edit(start, end, lines, document)
+        document.save()
+        assert path.read_text(encoding="utf-8") == original
+        assert index.headings() == ['# 标题'] and index.line_count == len(document) == 2
+        document.close()
@@ -0,0 +1,178 @@
+import threading
+
+import pytest
+
+from lad_markdown_viewer import web_viewer
+from lad_markdown_viewer.file_watcher import LiveDocument
+from lad_markdown_viewer.search_index import SearchIndex
+from lad_markdown_viewer.web_viewer import create_app
+
+
+@pytest.fixture
+def docs_dir(tmp_path):
+    for name in ("README.md", "a.md", "b.md", "c.md"):
+        (tmp_path / name).write_text(f"# {name}\n\n正文\n", encoding="utf-8")
+    return tmp_path
+
+
+class TestLiveDocuments:
+    def make_app(self, docs_dir, **kwargs):
+        app = create_app(str(docs_dir), watch=True, metrics=False, **kwargs)
+        return app, app.test_client(), app.extensions['lad_live_documents']
+
+    def test_bounded_eviction_stops_documents(self, docs_dir):
+        """测试监视的文档数超过上限时停止最久未使用的文档"""
+        app, client, live_documents = self.make_app(docs_dir, max_live_documents=2)
+        for name in ("a.md", "b.md"):
+            assert client.get(f"/?md={name}").status_code == 200
+        first = live_documents[str(docs_dir / "a.md")]
+        assert client.get("/?md=c.md").status_code == 200
+        assert len(live_documents) == 2
+        assert str(docs_dir / "a.md") not in live_documents
+        assert first.stopped
+        # 轮询线程或系统通知的观察者已结束
+        assert first.watcher._thread is None and first.watcher._observer is None
+        for live in list(live_documents.values()):
+            live.stop()
+
+    def test_idle_documents_are_stopped(self, docs_dir):
+        """测试没有订阅者的文档闲置超时后停止监视，再次打开时重新创建"""
+        app, client, live_documents = self.make_app(docs_dir, live_idle_timeout=0)
+        client.get("/?md=a.md")
+        first = live_documents[str(docs_dir / "a.md")]
+        client.get("/?md=b.md")
+        assert first.stopped
+        assert list(live_documents) == [str(docs_dir / "b.md")]
+        client.get("/?md=a.md")
+        assert live_documents[str(docs_dir / "a.md")] is not first
+        for live in list(live_documents.values()):
+            live.stop()
+
+    def test_subscribed_documents_are_kept(self, docs_dir):
+        """测试有 /events 订阅者的文档不会因闲置而停止"""
+        app, client, live_documents = self.make_app(docs_dir, live_idle_timeout=0)
+        client.get("/?md=a.md")
+        first = live_documents[str(docs_dir / "a.md")]
+        first.subscribe()
+        client.get("/?md=b.md")
+        assert not first.stopped
+        first.unsubscribe()
+        client.get("/?md=c.md")
+        assert first.stopped
+        for live in list(live_documents.values()):
+            live.stop()
+
+    def test_first_render_does_not_block_other_documents(self, docs_dir, monkeypatch):
+        """测试一个文档的首次渲染进行中时，其他文档的请求不被 live_lock 阻塞"""
+        release = threading.Event()
+        created = []
+
+        class SlowLiveDocument(LiveDocument):
+            def __init__(self, path, **kwargs):
+                if path.endswith("a.md"):
+                    release.wait(10)
+                super().__init__(path, **kwargs)
+                created.append(self)
+
+        monkeypatch.setattr(web_viewer, "LiveDocument", SlowLiveDocument)
+        app, client, live_documents = self.make_app(docs_dir)
+        slow = threading.Thread(target=lambda: app.test_client().get("/?md=a.md"))
+        slow.start()
+        try:
+            assert client.get("/?md=b.md").status_code == 200
+            assert list(live_documents) == [str(docs_dir / "b.md")]
+        finally:
+            release.set()
+            slow.join()
+        assert len(live_documents) == 2
+        for live in created:
+            live.stop()
+
+    def test_concurrent_creation_keeps_one_document(self, docs_dir, monkeypatch):
+        """测试多个请求同时首次打开同一文档时只保留一个实例，其余的被停止"""
+        barrier = threading.Barrier(3)
+        created = []
+
+        class RacingLiveDocument(LiveDocument):
+            def __init__(self, path, **kwargs):
+                super().__init__(path, **kwargs)
+                created.append(self)
+                barrier.wait(10)
+
+        monkeypatch.setattr(web_viewer, "LiveDocument", RacingLiveDocument)
+        app, client, live_documents = self.make_app(docs_dir)
+        threads = [threading.Thread(target=lambda: app.test_client().get("/?md=a.md")) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        kept = live_documents[str(docs_dir / "a.md")]
+        assert len(created) == 3
+        assert [live.stopped for live in created].count(False) == 1 and not kept.stopped
+        kept.stop()
+
+
+class TestEtags:
+    def test_etag_depends_on_encoding(self, docs_dir):
+        """测试不同编码的响应使用不同的强ETag，304只对同一编码生效"""
+        (docs_dir / "README.md").write_text("# 标题\n\n" + "正文内容 " * 2000, encoding="utf-8")
+        client = create_app(str(docs_dir), metrics=False).test_client()
+        identity = client.get("/", headers={"Accept-Encoding": "identity"})
+        gzipped = client.get("/", headers={"Accept-Encoding": "gzip"})
+        assert gzipped.headers["Content-Encoding"] == "gzip"
+        assert identity.headers["ETag"] != gzipped.headers["ETag"]
+        assert gzipped.headers["ETag"].endswith('-gzip"')
+
+        # 未压缩版本的ETag不能用于验证gzip版本，反之亦然
+        response = client.get("/", headers={"Accept-Encoding": "gzip",
+                                            "If-None-Match": identity.headers["ETag"]})
+        assert response.status_code == 200
+        response = client.get("/", headers={"Accept-Encoding": "gzip",
+                                            "If-None-Match": gzipped.headers["ETag"]})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == gzipped.headers["ETag"]
+        response = client.get("/", headers={"Accept-Encoding": "identity",
+                                            "If-None-Match": "W/" + identity.headers["ETag"]})
+        assert response.status_code == 304
+
+
+class TestSearch:
+    def test_search_does_not_wait_for_first_build(self, docs_dir, monkeypatch):
+        """测试索引在后台建立，建立完成前搜索立即返回 indexing，完成后返回带摘要的结果"""
+        (docs_dir / "a.md").write_text("# 标题\n\n斑马 zebra 出没\n", encoding="utf-8")
+        release = threading.Event()
+        update = SearchIndex.update
+
+        def slow_update(self, jobs=None):
+            release.wait(5)
+            return update(self, jobs)
+
+        monkeypatch.setattr(SearchIndex, 'update', slow_update)
+        app = create_app(str(docs_dir), metrics=False)
+        client = app.test_client()
+        data = client.get("/search?q=zebra").get_json()
+        assert data['indexing'] and data['hits'] == []
+
+        release.set()
+        assert app.extensions['lad_directory_indexes']['search_index']['ready'].wait(5)
+        data = client.get("/search?q=zebra").get_json()
+        assert not data['indexing']
+        assert data['hits'][0]['md'] == 'a.md'
+        assert 'zebra' in data['hits'][0]['snippet']
+        assert data['hits'][0]['url'].startswith('/?md=a.md#')
+
+    def test_refresh_runs_in_background(self, docs_dir):
+        """测试到期后的增量更新在后台完成，新文档随后可以搜索到"""
+        app = create_app(str(docs_dir), metrics=False, index_refresh_interval=0)
+        entry = app.extensions['lad_directory_indexes']['search_index']
+        assert entry['ready'].wait(5)
+        (docs_dir / "new.md").write_text("# 新文档\n\nquokka\n", encoding="utf-8")
+        client = app.test_client()
+        for _ in range(100):
+            client.get("/search?q=quokka")
+            with entry['refreshing']:
+                pass
+            hits = client.get("/search?q=quokka").get_json()['hits']
+            if hits:
+                break
+        assert hits[0]['md'] == 'new.md'
@@ -1,50 +1,30 @@
-from flask import Flask, request, Response
+from flask import Flask, request, Response, abort, send_file
 import os
 
 # ----------------- 重构部分开始 -----------------
 # 从新的包名 lad_markdown_viewer 中导入渲染函数
 # from lad_markdown_viewer.markdown_processor import render_markdown_to_html
-from lad_markdown_viewer.markdown_processor import render_markdown_with_zoom
+from lad_markdown_viewer.markdown_processor import render_file, render_markdown_with_zoom, enable_render_cache, iter_render, ZOOM_JS_CSS
+from lad_markdown_viewer.markdown_utils import iter_file_lines
+from lad_markdown_viewer.assets import mermaid_runtime_tags, resolve_asset, vendor_tags
 # ----------------- 重构部分结束 -----------------
 
-app = Flask(__name__)
+# 启用渲染缓存；设置 LAD_MARKDOWN_CACHE_DIR 后多个worker共享同一磁盘缓存
+enable_render_cache(disk_dir=os.environ.get('LAD_MARKDOWN_CACHE_DIR'))
 
-@app.route('/', methods=['GET'])
-def index():
-    md_path = request.args.get('md', 'D:/lad/LAD_Project/00_Platform_Strategy/02_Strategic_Subdocs/01_Platform_Model/LAD-00-02-01-001.md')
+# 超过该大小的文件改为流式渲染，避免源文本和完整HTML同时驻留内存
+STREAM_THRESHOLD = 8 * 1024 * 1024
 
-    try:
-        with open(md_path, 'r', encoding='utf-8') as f:
-            md_text = f.read()
-    except Exception as e:
-        md_text = f"无法读取文件: {e}"
+app = Flask(__name__, static_folder=None)
 
-    # ----------------- 重构部分 -----------------
-    # 只需一行代码即可完成所有Markdown处理
-    # html_body = render_markdown_to_html(md_text)
-    html_body = render_markdown_with_zoom(md_text)
-    # ----------------- 重构结束 -----------------
-
-    html = """
+PAGE_HEAD = """
     <html>
     <head>
         <meta charset=\"utf-8\">
-        <link rel=\"stylesheet\" href=\"https://cdn.jsdelivr.net/npm/github-markdown-css@5.5.1/github-markdown.min.css\">
-        <script src=\"https://cdn.jsdelivr.net/npm/mermaid@9.4.3/dist/mermaid.min.js\"></script>
+        """ + vendor_tags(static_url='/static/', css=True) + """
+        """ + mermaid_runtime_tags(static_url='/static/') + """
         <script>
             document.addEventListener('DOMContentLoaded', function() {
-                try {
-                    if (typeof mermaid !== 'undefined') {
-                        mermaid.initialize({
-                            startOnLoad: true,
-                            theme: 'default',
-                            securityLevel: 'loose',
-                            flowchart: { htmlLabels: true, useMaxWidth: true },
-                        });
-                    }
-                } catch(e) {
-                    console.error('Mermaid initialization error:', e);
-                }
                 // 只保留a标签拦截
                 document.body.addEventListener('click', function(e) {
                     let a = e.target.closest('a');
@@ -84,11 +64,45 @@ def index():
         </style>
     </head>
     <body>
-<div class=\"markdown-body\">""" + html_body + """</div>
+<div class=\"markdown-body\">"""
+
+PAGE_TAIL = """</div>
     </body>
     </html>
-    """
+"""
+
+@app.route('/', methods=['GET'])
+def index():
+    md_path = request.args.get('md', 'D:/lad/LAD_Project/00_Platform_Strategy/02_Strategic_Subdocs/01_Platform_Model/LAD-00-02-01-001.md')
+
+    try:
+        if os.path.getsize(md_path) > STREAM_THRESHOLD:
+            return Response(stream_markdown_page(md_path), mimetype='text/html')
+        # ----------------- 重构部分 -----------------
+        # 与桌面查看器、预览工具共用的文件渲染接口
+        html_body = render_file(md_path) + ZOOM_JS_CSS
+        # ----------------- 重构结束 -----------------
+    except Exception as e:
+        html_body = render_markdown_with_zoom(f"无法读取文件: {e}")
+
+    html = PAGE_HEAD + html_body + PAGE_TAIL
     return Response(html, mimetype='text/html')
 
+@app.route('/static/<path:filename>', methods=['GET'])
+def static_asset(filename):
+    # 包内静态资源（本地Mermaid等）；带内容哈希的URL可以长期缓存
+    full_path, versioned = resolve_asset(filename)
+    if full_path is None:
+        abort(404)
+    return send_file(full_path, max_age=31536000 if versioned else 0)
+
+def stream_markdown_page(md_path):
+    """逐片产出大文件的渲染结果，内存占用与文件大小无关。"""
+    yield PAGE_HEAD
+    for chunk in iter_render(iter_file_lines(md_path)):
+        yield chunk
+    yield ZOOM_JS_CSS
+    yield PAGE_TAIL
+
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file